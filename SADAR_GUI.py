@@ -17,6 +17,7 @@ import os
 import matplotlib.pyplot as plt
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Image
 from reportlab.lib.styles import getSampleStyleSheet
+from sadar_kernels import normalized_difference
 
 # ---------------- GLOBALS ----------------
 image_path = None
@@ -281,13 +282,7 @@ def run_calculation():
             swir  = src.read(2).astype(float)   # B11
             profile = src.profile
 
-        denom = green + swir
-
-        with np.errstate(divide='ignore', invalid='ignore'):
-            result_data = (green - swir) / denom
-
-        result_data[denom == 0] = np.nan
-        result_data = np.clip(result_data, -1, 1)
+        result_data = normalized_difference(green, swir)
 
         # Calculate statistics for display
         total_pixels = result_data.size
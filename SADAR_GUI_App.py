@@ -9,19 +9,86 @@
 # FULL SCREEN + ENHANCED UI
 # ==========================================
 
+import time
+STARTED = time.perf_counter()  # For the time-to-first-paint measurement
+
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import rasterio
-import numpy as np
 import os
-import matplotlib.pyplot as plt
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Image
-from reportlab.lib.styles import getSampleStyleSheet
-from PIL import Image as PILImage, ImageTk
+import sys
+import queue
+import threading
+import multiprocessing
+import sadar_cache
+import sadar_jobs
+import sadar_settings
+import sadar_thumbgrid
+
+# ---------------- LAZY IMPORTS ----------------
+# numpy, rasterio, PIL and the engine make up most of the startup time, so
+# they are imported on a background thread once the window has been drawn.
+# Callbacks that need them call require_modules() first; reportlab is only
+# imported when a report is written.
+np = None
+rasterio = None
+PILImage = None
+ImageTk = None
+sadar_engine = None
+sadar_output = None
+sadar_render = None
+sadar_stats = None
+sadar_session = None
+modules_ready = threading.Event()
+modules_lock = threading.Lock()  # One load_modules() at a time (UI thread vs warm-up)
+
+def load_modules():
+    """Import the numeric/raster stack into this module's globals (once)"""
+    global np, rasterio, PILImage, ImageTk, sadar_engine, sadar_output, sadar_render, sadar_stats
+    global sadar_session
+    with modules_lock:
+        if modules_ready.is_set():
+            return
+        import numpy as np
+        import rasterio
+        from PIL import Image as PILImage, ImageTk
+        import sadar_engine
+        import sadar_output
+        import sadar_render
+        import sadar_stats
+        import sadar_session
+        # Keep input datasets open and decoded windows in memory for the session
+        sadar_engine.set_session_cache(sadar_session.SessionCache())
+        modules_ready.set()
+
+def require_modules():
+    """Make sure load_modules() has run (waits if the warm-up is still going)"""
+    if not modules_ready.is_set():
+        load_modules()
+
+def warm_up():
+    """Background thread: load modules and compile kernels ahead of first use"""
+    load_modules()
+    import sadar_kernels
+    sadar_kernels.warm_up()
+    if DEBUG:
+        print(f"Modules ready after {(time.perf_counter() - STARTED) * 1000:.0f} ms")
+
+def on_first_paint():
+    """Runs once the window is up: report startup time, start the warm-up"""
+    root.update_idletasks()
+    elapsed_ms = (time.perf_counter() - STARTED) * 1000
+    if DEBUG:
+        print(f"First paint after {elapsed_ms:.0f} ms")
+        status.config(text=f"⏱ First paint after {elapsed_ms:.0f} ms", fg=COLORS['text_light'])
+    threading.Thread(target=warm_up, daemon=True).start()
 
 # ---------------- GLOBALS ----------------
 image_path = None
 result_data = None
+calc_stats = None   # Statistics of result_data, computed once with it
+calc_index_stats = None  # sadar_stats.IndexStats of result_data (slider recounts from its histogram)
+preview_base = None      # Grayscale PIL image shown on the preview canvas
+overlay_values = None    # result_data resampled to preview_base's size
 profile = None
 green = None
 swir = None
@@ -29,7 +96,34 @@ ndsi_threshold = 0.4
 folder_path = None
 image_files = []
 current_image_index = 0
+current_image = None  # sadar_engine.LazyImage of image_path
 output_folder_path = None
+scratch_dir = None  # Folder for disk-backed scene arrays (None = SCRATCH_DIR / system temp)
+DEBUG = '--debug' in sys.argv or os.environ.get('SADAR_DEBUG') == '1'
+JOB_POLL_MS = 16  # ~60 fps polling of background job events
+PREVIEW_DELAY_MS = 40  # Let arrow-key scrolling settle before drawing a preview
+pending_preview = None
+overview_builds = set()     # Images whose .ovr is being built
+overview_lock = threading.Lock()  # Guards overview_builds (UI and prefetch thread)
+overview_failed = set()     # Images whose .ovr could not be written
+preview_events = queue.Queue()  # Finished overview builds, drained by poll_jobs
+DIAGNOSTICS_REFRESH_MS = 500
+PREFETCH_AHEAD = 3  # Images after the selected one warmed up in the background
+prefetcher = None   # sadar_session.Prefetcher, created with the first folder
+THUMBNAIL_WORKERS = min(8, 2 * (os.cpu_count() or 1))  # Parallel quicklook reads
+thumbnail_events = queue.Queue()  # (folder generation, {index: PNG bytes}), drained by poll_jobs
+thumbnail_pool = None             # ThreadPoolExecutor, created with the first folder
+thumbnail_lock = threading.Lock()
+folder_generation = 0             # Bumped per folder so stale scan/thumbnail work stops
+SCAN_BATCH = 200                  # Images per scan update...
+SCAN_FLUSH_S = 0.1                # ...or at least this often while images are found
+scan_events = queue.Queue()       # (folder generation, paths, invalid count, end), drained by poll_jobs
+diagnostics_window = None
+POOL_WARM_DELAY_MS = 500          # Let the worker count settle before starting processes
+pending_pool_warm_up = None
+band_stats_events = queue.Queue()  # (image path, stats or exception), drained by poll_jobs
+band_stats_pending = set()        # Images whose band statistics are being computed
+THRESHOLD_METHOD_NAMES = {'fixed': 'fixed', 'otsu': 'Otsu', 'valley': 'valley'}  # Label text
 
 # ---------------- MODERN COLORS ----------------
 COLORS = {
@@ -49,6 +143,13 @@ COLORS = {
     'border': '#d2d2d7'
 }
 
+# Tint of the positive class in the live classification overlay
+CLASS_COLORS = {
+    'NDSI': (0, 200, 255),          # Snow
+    'NDWI': (0, 80, 255),           # Water
+    'NDVI': (40, 190, 60),          # Vegetation
+}
+
 # ---------------- THRESHOLD HANDLER ----------------
 def on_threshold_change(val):
     global ndsi_threshold
@@ -56,6 +157,7 @@ def on_threshold_change(val):
     threshold_value_label.config(
         text=f"{ndsi_threshold:.2f}"
     )
+    update_classification(ndsi_threshold)
 
 # ---------------- SELECT OUTPUT FOLDER ----------------
 def select_output_folder():
@@ -78,113 +180,310 @@ def select_output_folder():
             fg=COLORS['text_light']
         )
 
+# ---------------- SELECT SCRATCH FOLDER ----------------
+def select_scratch_folder():
+    """Pick where scenes too big for RAM are memory-mapped (cancel = default)"""
+    global scratch_dir
+
+    scratch_dir = filedialog.askdirectory(title="Select Scratch Folder for Large Scenes") or None
+    scratch_folder_display.config(
+        text=os.path.basename(scratch_dir) if scratch_dir else scratch_default_text(),
+        fg=COLORS['success'] if scratch_dir else COLORS['text_light']
+    )
+
+def scratch_default_text():
+    """Label for the scratch folder used when none was picked"""
+    if sadar_settings.SCRATCH_DIR:
+        return f"{os.path.basename(sadar_settings.SCRATCH_DIR)} (SADAR_SCRATCH_DIR)"
+    return "System temp folder"
+
 # ---------------- DISPLAY IMAGE PREVIEW ----------------
+def preview_canvas_size():
+    """Current canvas size, or a default before it is first drawn"""
+    canvas_width = preview_canvas.winfo_width()
+    canvas_height = preview_canvas.winfo_height()
+
+    # If canvas not rendered yet, use default size
+    if canvas_width <= 1:
+        canvas_width = 600
+    if canvas_height <= 1:
+        canvas_height = 500
+    return canvas_width, canvas_height
+
 def display_image_preview(img_path):
     """Display image preview in the right panel"""
+    require_modules()
     try:
-        from PIL import Image, ImageTk
-        import matplotlib.pyplot as plt
-        import io
-
-        # Read the image using rasterio
-        with rasterio.open(img_path) as src:
-            # Read first band for preview
-            band_data = src.read(1)
-
-            # Normalize for display
-            band_min = np.nanmin(band_data)
-            band_max = np.nanmax(band_data)
-
-            if band_max > band_min:
-                normalized = (band_data - band_min) / (band_max - band_min)
-            else:
-                normalized = band_data
-
-            # Convert to 0-255 range
-            preview_data = (normalized * 255).astype(np.uint8)
-
-            # Create PIL Image
-            pil_img = Image.fromarray(preview_data, mode='L')
-
-            # Get canvas size
-            canvas_width = preview_canvas.winfo_width()
-            canvas_height = preview_canvas.winfo_height()
-
-            # If canvas not rendered yet, use default size
-            if canvas_width <= 1:
-                canvas_width = 600
-            if canvas_height <= 1:
-                canvas_height = 500
-
-            # Calculate scaling to fit canvas
-            img_width, img_height = pil_img.size
-            scale = min(canvas_width / img_width, canvas_height / img_height) * 0.95
-
-            new_width = int(img_width * scale)
-            new_height = int(img_height * scale)
-
-            # Resize image
-            pil_img = pil_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-            # Convert to PhotoImage
-            photo = ImageTk.PhotoImage(pil_img)
-
-            # Clear canvas
-            preview_canvas.delete("all")
-
-            # Display image centered
-            preview_canvas.create_image(
-                canvas_width // 2,
-                canvas_height // 2,
-                image=photo,
-                anchor='center'
-            )
+        # Big images without overviews get a sidecar .ovr built in the
+        # background first (here or by the prefetcher); the preview is
+        # drawn when it is ready
+        if img_path in overview_builds or (
+                img_path not in overview_failed and sadar_engine.needs_overviews(img_path)):
+            show_preview_message("⏳ Building overview...", COLORS['text_light'])
+            if claim_overview_build(img_path):
+                threading.Thread(target=overview_job, args=(img_path,), daemon=True).start()
+            return
+
+        draw_preview(img_path)
+
+    except Exception as e:
+        print(f"Preview error: {e}")
+        show_preview_message(f"Preview not available\n\n{str(e)[:50]}", COLORS['error'])
 
-            # Keep reference to prevent garbage collection
-            preview_canvas.image = photo
+def schedule_preview(img_path):
+    """Draw the preview once the selection stops changing"""
+    global pending_preview
+    if pending_preview is not None:
+        root.after_cancel(pending_preview)
+    pending_preview = root.after(PREVIEW_DELAY_MS, display_image_preview, img_path)
 
-            # Hide the "no image" label
-            preview_label.place_forget()
+def preview_fit_size():
+    """Size previews are read at (the prefetcher reads the same)"""
+    canvas_width, canvas_height = preview_canvas_size()
+    return canvas_width * 0.95, canvas_height * 0.95
 
-            # Update info label
-            image_info_label.config(
-                text=f"📐 {img_width} x {img_height} px  |  Band 1 preview",
-                fg=COLORS['text']
-            )
+def draw_preview(img_path):
+    """Read band 1 at canvas resolution (from overviews if present) and show it"""
+    global preview_base
+
+    # Read only as many pixels as will be displayed
+    band_data, (img_width, img_height) = sadar_engine.read_fitted(img_path, *preview_fit_size())
 
+    # Normalize for display
+    band_min = np.nanmin(band_data)
+    band_max = np.nanmax(band_data)
+
+    if band_max > band_min:
+        normalized = (band_data - band_min) / (band_max - band_min)
+    else:
+        normalized = band_data
+
+    # Convert to 0-255 range
+    preview_data = (np.nan_to_num(normalized) * 255).astype(np.uint8)
+
+    # Create PIL Image
+    preview_base = PILImage.fromarray(preview_data, mode='L')
+    show_preview_image(preview_base)
+
+    # Update info label
+    image_info_label.config(
+        text=f"📐 {img_width} x {img_height} px  |  Band 1 preview",
+        fg=COLORS['text']
+    )
+
+    # Drawn after a calculation finished (e.g. once overviews were built)
+    if result_data is not None:
+        prepare_classification()
+        update_classification(ndsi_threshold, show_counts=False)
+
+def show_preview_image(pil_img):
+    """Show pil_img centered on the preview canvas"""
+    canvas_width, canvas_height = preview_canvas_size()
+    photo = ImageTk.PhotoImage(pil_img)
+
+    # Clear canvas
+    preview_canvas.delete("all")
+
+    # Display image centered
+    preview_canvas.create_image(
+        canvas_width // 2,
+        canvas_height // 2,
+        image=photo,
+        anchor='center'
+    )
+
+    # Keep reference to prevent garbage collection
+    preview_canvas.image = photo
+
+    # Hide the "no image" label
+    preview_label.place_forget()
+
+def show_preview_message(text, color):
+    preview_canvas.delete("all")
+    preview_label.config(text=text, fg=color)
+    preview_label.place(relx=0.5, rely=0.5, anchor='center')
+
+def claim_overview_build(img_path):
+    """True if the caller should build img_path's overviews (nobody else is)"""
+    with overview_lock:
+        if img_path in overview_builds:
+            return False
+        overview_builds.add(img_path)
+        return True
+
+def overview_job(img_path):
+    """Thread: build the sidecar .ovr, then ask the UI to draw the preview"""
+    try:
+        sadar_engine.build_overviews(img_path)
     except Exception as e:
-        print(f"Preview error: {e}")
-        preview_canvas.delete("all")
-        preview_label.config(
-            text=f"Preview not available\n\n{str(e)[:50]}",
-            fg=COLORS['error']
+        # e.g. read-only input folder: fall back to plain decimated reads
+        print(f"Overview build failed for {img_path}: {e}")
+        overview_failed.add(img_path)
+    preview_events.put(img_path)
+
+def dispatch_previews():
+    """Draw previews whose overviews finished, if still selected"""
+    while True:
+        try:
+            img_path = preview_events.get_nowait()
+        except queue.Empty:
+            return
+        with overview_lock:
+            overview_builds.discard(img_path)
+        if img_path == image_path:
+            display_image_preview(img_path)
+
+# ---------------- PREFETCH ----------------
+def prefetch_image(item):
+    """Prefetch thread: read what selecting an image will need, into the caches.
+
+    The header goes to the metadata cache, overviews are built if missing
+    and the preview lands in the session block cache. Band statistics are
+    optional; the windows they decode stay cached for a calculation too.
+    """
+    img_path, preview_size, with_stats, precision = item
+    image = sadar_engine.LazyImage(img_path, metadata_cache)
+
+    if img_path not in overview_failed and sadar_engine.needs_overviews(img_path):
+        if not claim_overview_build(img_path):
+            return  # Already being built for the selected image
+        overview_job(img_path)
+
+    sadar_engine.read_fitted(img_path, *preview_size)
+    if with_stats:
+        image.stats(precision)
+
+def schedule_prefetch():
+    """Queue the images after the selected one for the prefetcher"""
+    global prefetcher
+    if prefetcher is None:
+        prefetcher = sadar_session.Prefetcher(prefetch_image, paused=lambda: job_runner.busy)
+
+    upcoming = image_files[current_image_index + 1:current_image_index + 1 + PREFETCH_AHEAD]
+    size = preview_fit_size()
+    prefetcher.schedule([
+        (path, size, prefetch_stats_var.get(), precision_var.get()) for path in upcoming
+    ])
+
+# ---------------- BAND STATISTICS ----------------
+def show_band_stats(stats):
+    """Band statistics panel: green/SWIR value ranges and the NDSI range"""
+    lines = [stats['band_mode']]
+    for name, key, digits in (("Green", 'green', 1), ("SWIR", 'swir', 1), ("NDSI", 'ndsi', 3)):
+        lines.append(f"{name}: {stats[f'{key}_min']:.{digits}f} – {stats[f'{key}_max']:.{digits}f} "
+                     f"(mean {stats[f'{key}_mean']:.{digits}f})")
+    band_stats_label.config(text="\n".join(lines), font=("Segoe UI", 9),
+                            fg=COLORS['text_light'], cursor='')
+
+def reset_band_stats():
+    """Selection changed: show cached statistics, else offer to compute them"""
+    if current_image is None or current_image.band_count < 2:
+        band_stats_label.config(text="", cursor='')
+    elif current_image.stats_ready:
+        show_band_stats(current_image.stats())
+    elif current_image.path in band_stats_pending:
+        band_stats_label.config(text="⏳ Computing band statistics...", font=("Segoe UI", 9),
+                                fg=COLORS['text_light'], cursor='')
+    else:
+        band_stats_label.config(text="📈 Show band statistics", font=("Segoe UI", 9, "underline"),
+                                fg=COLORS['secondary'], cursor="hand2")
+
+def request_band_stats(event=None):
+    """Link click: compute the selected image's band statistics in the background"""
+    if current_image is None or current_image.band_count < 2 or current_image.stats_ready:
+        return
+    if current_image.path in band_stats_pending:
+        return
+    band_stats_pending.add(current_image.path)
+    band_stats_label.config(text="⏳ Computing band statistics...", font=("Segoe UI", 9),
+                            fg=COLORS['text_light'], cursor='')
+    threading.Thread(target=band_stats_job, args=(current_image, precision_var.get()),
+                     daemon=True).start()
+
+def band_stats_job(image, precision):
+    """Thread: one streamed pass over the green/SWIR bands (no Tk calls)"""
+    try:
+        band_stats_events.put((image.path, image.stats(precision)))
+    except Exception as e:
+        band_stats_events.put((image.path, e))
+
+def dispatch_band_stats():
+    """Show finished band statistics if their image is still selected"""
+    while True:
+        try:
+            img_path, stats = band_stats_events.get_nowait()
+        except queue.Empty:
+            return
+        band_stats_pending.discard(img_path)
+        if img_path != image_path:
+            continue
+        if isinstance(stats, Exception):
+            band_stats_label.config(text=f"❌ Band statistics failed: {stats}",
+                                    font=("Segoe UI", 9), fg=COLORS['error'], cursor='')
+        else:
+            show_band_stats(stats)
+
+# ---------------- LIVE CLASSIFICATION ----------------
+def prepare_classification():
+    """Resample the calculated index to the preview once, for the slider overlay"""
+    global overlay_values
+    overlay_values = None
+    if preview_base is not None and result_data is not None:
+        overlay_values = sadar_render.resample(result_data, preview_base.size)
+
+def update_classification(threshold, show_counts=True):
+    """Recount the classes from the histogram and redraw the overlay.
+
+    No pixel pass: counts come from calc_index_stats in O(bins) and the
+    overlay only touches the preview-sized overlay_values. The threshold is
+    snapped to the nearest histogram bin edge (0.001 apart), where those
+    counts are exact, so the percentages shown match the overlay.
+    """
+    global calc_stats
+    if calc_index_stats is None or calc_stats is None:
+        return
+    calc_type = calc_stats['index_type']
+    if calculation_var.get() != calc_type:
+        return
+
+    started = time.perf_counter()
+    threshold = calc_index_stats.edge_value(calc_index_stats.bin_edge(threshold))
+    calc_stats = {**calc_stats, **calc_index_stats.summary(threshold)}
+    if show_counts:
+        image_info_label.config(
+            text=f"🎚 {calc_type} ≥ {threshold:.2f} | "
+                 f"{calc_stats['class1_name']}: {calc_stats['positive_percentage']:.1f}% | "
+                 f"{calc_stats['class2_name']}: {calc_stats['negative_percentage']:.1f}% | "
+                 f"NoData: {calc_stats['nodata_percentage']:.1f}%",
+            fg=COLORS['text']
         )
-        preview_label.place(relx=0.5, rely=0.5, anchor='center')
+    if overlay_values is not None:
+        show_preview_image(sadar_render.classification_overlay(
+            preview_base, overlay_values, threshold, CLASS_COLORS[calc_type]
+        ))
+    if DEBUG:
+        print(f"Threshold {threshold:.2f} updated in {(time.perf_counter() - started) * 1000:.1f} ms")
 
 # ---------------- UPLOAD FOLDER ----------------
 def upload_folder():
     global folder_path, image_files, current_image_index, image_path, result_data
+    global calc_index_stats, overlay_values, folder_generation
 
     folder_path = filedialog.askdirectory(title="Select Folder Containing GeoTIFF Images")
 
     if not folder_path:
         return
 
-    # Find all TIFF files in the folder
-    image_files = []
-    for file in os.listdir(folder_path):
-        if file.lower().endswith(('.tif', '.tiff')):
-            image_files.append(os.path.join(folder_path, file))
-
-    image_files.sort()  # Sort alphabetically
-
-    if not image_files:
-        messagebox.showwarning("No Images Found", "No GeoTIFF files found in the selected folder.")
-        folder_path = None
-        return
+    require_modules()
 
+    # Images are scanned off the UI thread and appear as they are found;
+    # work still running for a previous folder stops
+    folder_generation += 1
+    image_files = []
     current_image_index = 0
     result_data = None
+    calc_index_stats = None
+    overlay_values = None
 
     # Update UI
     folder_label.config(
@@ -192,30 +491,181 @@ def upload_folder():
         fg=COLORS['success']
     )
 
-    folder_info_label.config(
-        text=f"{len(image_files)} GeoTIFF images found",
-        fg=COLORS['text_light']
-    )
+    folder_info_label.config(text="⏳ Scanning...", fg=COLORS['text_light'])
 
-    # Show and populate image listbox
+    # Show the (empty) image listbox and thumbnail grid
     listbox_frame.pack(fill='both', expand=True, pady=(10, 0))
     image_listbox.delete(0, tk.END)
-    for img_file in image_files:
-        image_listbox.insert(tk.END, os.path.basename(img_file))
+    thumbnail_grid.set_items([])
+
+    status.config(text="⏳ Scanning folder for GeoTIFF images...", fg=COLORS['warning'])
+    threading.Thread(
+        target=scan_job,
+        args=(folder_path, parse_patterns(include_var.get()), parse_patterns(exclude_var.get()),
+              recursive_var.get(), folder_generation),
+        daemon=True
+    ).start()
+
+def parse_patterns(text):
+    """Glob patterns from a ';' or ',' separated entry"""
+    return tuple(p.strip() for p in text.replace(',', ';').split(';') if p.strip())
+
+def scan_job(folder, include, exclude, recursive, generation):
+    """Thread: post the images found under folder in small batches"""
+    batch = []
+    invalid = []
+    flushed = time.perf_counter()
+    try:
+        for path in sadar_engine.scan_geotiffs(folder, include, exclude, recursive,
+                                               on_invalid=invalid.append):
+            if generation != folder_generation:
+                return  # Another folder was opened
+            batch.append(path)
+            if len(batch) >= SCAN_BATCH or time.perf_counter() - flushed >= SCAN_FLUSH_S:
+                scan_events.put((generation, batch, len(invalid), None))
+                batch = []
+                flushed = time.perf_counter()
+        scan_events.put((generation, batch, len(invalid), 'done'))
+    except Exception as e:
+        scan_events.put((generation, batch, len(invalid), e))
+
+def dispatch_scan():
+    """Add newly found images to the list and grid; finish up after the scan"""
+    while True:
+        try:
+            generation, paths, invalid, end = scan_events.get_nowait()
+        except queue.Empty:
+            return
+        if generation != folder_generation:
+            continue
+
+        add_images(paths)
+        if end is None:
+            folder_info_label.config(text=f"⏳ Scanning... {len(image_files)} images found")
+        else:
+            finish_scan(invalid, end)
+
+def add_images(paths):
+    """Append scanned images to image_files, the listbox and the thumbnail grid"""
+    if not paths:
+        return
+    first = len(image_files)
+    image_files.extend(paths)
+    for img_file in paths:
+        image_listbox.insert(tk.END, os.path.relpath(img_file, folder_path))
+    thumbnail_grid.add_items([os.path.basename(f) for f in paths])
+    queue_thumbnails(paths, first)
 
     # Select first image
-    if image_files:
+    if first == 0:
         image_listbox.selection_set(0)
         load_selected_image()
 
+def finish_scan(invalid, end):
+    global folder_path
+    skipped = f" ({invalid} skipped: not TIFF)" if invalid else ""
+
+    if isinstance(end, Exception):
+        messagebox.showerror("Scan Error", f"Failed to scan the folder:\n{str(end)}")
+
+    if not image_files:
+        listbox_frame.pack_forget()
+        folder_info_label.config(text=f"No GeoTIFF images found{skipped}", fg=COLORS['text_light'])
+        status.config(text="⚪ Ready - Select input folder to begin", fg=COLORS['text'])
+        if not isinstance(end, Exception):
+            messagebox.showwarning("No Images Found", "No GeoTIFF files found in the selected folder.")
+        folder_path = None
+        return
+
+    folder_info_label.config(
+        text=f"{len(image_files)} GeoTIFF images found{skipped}",
+        fg=COLORS['text_light']
+    )
     status.config(
         text=f"✓ Folder loaded with {len(image_files)} images - Select an image to begin",
         fg=COLORS['success']
     )
 
+# ---------------- THUMBNAILS ----------------
+def queue_thumbnails(paths, first_index):
+    """Fill grid cells first_index.. for paths (cached ones first)"""
+    threading.Thread(target=thumbnail_job, args=(list(paths), first_index, folder_generation),
+                     daemon=True).start()
+
+def make_thumbnail(path):
+    """Quicklook PNG of path (from overviews when present), stored in the cache"""
+    gray = sadar_engine.read_quicklook(path, sadar_thumbgrid.THUMB_SIZE)
+    image = sadar_render.thumbnail_png(gray)
+    thumbnail_cache.put(path, sadar_thumbgrid.THUMB_SIZE, image)
+    return image
+
+def thumbnail_job(paths, first_index, generation):
+    """Thread: post cached thumbnails at once, then queue the rest for generation"""
+    global thumbnail_pool
+    from concurrent.futures import ThreadPoolExecutor
+
+    cached = thumbnail_cache.get_many(paths, sadar_thumbgrid.THUMB_SIZE)
+    index = {path: first_index + i for i, path in enumerate(paths)}
+    thumbnail_events.put((generation, {index[path]: image for path, image in cached.items()}))
+
+    # One shared pool; GDAL releases the GIL while decoding, so its
+    # threads read in parallel
+    with thumbnail_lock:
+        if thumbnail_pool is None:
+            thumbnail_pool = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS)
+    for path in paths:
+        if path not in cached:
+            thumbnail_pool.submit(thumbnail_task, path, index[path], generation)
+
+def thumbnail_task(path, index, generation):
+    """Pool thread: generate one missing thumbnail unless the folder changed"""
+    if generation != folder_generation:
+        return
+    try:
+        thumbnail_events.put((generation, {index: make_thumbnail(path)}))
+    except Exception as e:
+        print(f"Thumbnail failed for {path}: {e}")
+
+def dispatch_thumbnails():
+    """Hand finished thumbnails of the current folder to the grid"""
+    images = {}
+    while True:
+        try:
+            generation, batch = thumbnail_events.get_nowait()
+        except queue.Empty:
+            break
+        if generation == folder_generation:
+            images.update(batch)
+    if images:
+        thumbnail_grid.add_thumbnails(images)
+
+def on_thumbnail_select(index):
+    """Grid click: select the same image in the list and load it"""
+    image_listbox.selection_clear(0, tk.END)
+    image_listbox.selection_set(index)
+    image_listbox.see(index)
+    load_selected_image()
+
+def set_folder_view(view):
+    """Show the image list as 'grid' (thumbnails) or 'list' (file names)"""
+    if view == 'grid':
+        listbox_scroll_container.pack_forget()
+        thumbnail_grid.pack(fill='both', expand=True, before=prefetch_stats_check)
+        view_toggle.config(text="☰ List", command=lambda: set_folder_view('list'))
+        if thumbnail_grid.selected is not None:
+            # Scroll to the selection once the grid knows its width again
+            thumbnail_grid.after_idle(thumbnail_grid.select, thumbnail_grid.selected)
+    else:
+        thumbnail_grid.pack_forget()
+        listbox_scroll_container.pack(fill='both', expand=True, before=prefetch_stats_check)
+        view_toggle.config(text="▦ Thumbnails", command=lambda: set_folder_view('grid'))
+
 # ---------------- LOAD SELECTED IMAGE ----------------
 def load_selected_image(event=None):
-    global image_path, current_image_index, result_data
+    global image_path, current_image_index, result_data, current_image
+    global calc_index_stats, overlay_values
+
+    require_modules()
 
     selection = image_listbox.curselection()
 
@@ -224,64 +674,26 @@ def load_selected_image(event=None):
 
     current_image_index = selection[0]
     image_path = image_files[current_image_index]
+    thumbnail_grid.select(current_image_index)
     result_data = None
+    calc_index_stats = None
+    overlay_values = None
+    current_image = None
+    reset_band_stats()
 
     btn_run.config(state='disabled', bg=COLORS['button_disabled'])
     # btn_save removed
 
     try:
-        with rasterio.open(image_path) as src:
-            band_count = src.count
-            width = src.width
-            height = src.height
-            dtype = str(src.dtypes[0])
-            crs = str(src.crs) if src.crs else "Not specified"
-
-            # Get band statistics if available
-            image_data = {
-                'filename': os.path.basename(image_path),
-                'bands': band_count,
-                'width': width,
-                'height': height,
-                'dtype': dtype,
-                'crs': crs
-            }
-
-            if band_count >= 2:
-                # Smart band detection
-                if band_count >= 11:
-                    # Full satellite image - use B3 and B11
-                    green_band = src.read(3).astype(float)
-                    swir_band = src.read(11).astype(float)
-                    image_data['band_mode'] = 'Full image (B3 & B11)'
-                elif band_count == 2:
-                    # Pre-processed 2-band image
-                    green_band = src.read(1).astype(float)
-                    swir_band = src.read(2).astype(float)
-                    image_data['band_mode'] = '2-band (B3 & B11)'
-                else:
-                    # 3+ band image (not full satellite)
-                    green_band = src.read(1).astype(float)
-                    swir_band = src.read(2).astype(float)
-                    image_data['band_mode'] = f'{band_count}-band (using first 2: B3 & B11)'
-
-                image_data['green_min'] = np.nanmin(green_band)
-                image_data['green_max'] = np.nanmax(green_band)
-                image_data['green_mean'] = np.nanmean(green_band)
-                image_data['swir_min'] = np.nanmin(swir_band)
-                image_data['swir_max'] = np.nanmax(swir_band)
-                image_data['swir_mean'] = np.nanmean(swir_band)
-
-                # Calculate NDSI preview for information display
-                denom = green_band + swir_band
-                with np.errstate(divide='ignore', invalid='ignore'):
-                    ndsi_preview = (green_band - swir_band) / denom
-                ndsi_preview[denom == 0] = np.nan
-                ndsi_preview = np.clip(ndsi_preview, -1, 1)
-
-                image_data['ndsi_min'] = np.nanmin(ndsi_preview)
-                image_data['ndsi_max'] = np.nanmax(ndsi_preview)
-                image_data['ndsi_mean'] = np.nanmean(ndsi_preview)
+        # Only the header is read (or taken from the metadata cache) here;
+        # band statistics are computed by current_image.stats() when the
+        # statistics link asks for them
+        current_image = sadar_engine.LazyImage(image_path, metadata_cache)
+        reset_band_stats()
+
+        band_count = current_image.band_count
+        width = current_image.header['width']
+        height = current_image.header['height']
 
         file_name_label.config(
             text=f"Current: {os.path.basename(image_path)}",
@@ -303,320 +715,284 @@ def load_selected_image(event=None):
                 text=f"✓ Image {current_image_index + 1}/{len(image_files)} loaded - Ready to calculate",
                 fg=COLORS['success']
             )
-            btn_run.config(state='normal', bg=COLORS['button_bg'])
-            display_image_preview(image_path)
+            if not job_runner.busy:
+                btn_run.config(state='normal', bg=COLORS['button_bg'])
+            schedule_preview(image_path)
+
+        # Warm up the next images while this one is being looked at
+        schedule_prefetch()
 
     except Exception as e:
         messagebox.showerror("Error", f"Failed to load image: {str(e)}")
         status.config(text=f"❌ Error loading image", fg=COLORS['error'])
 
 
+def remember_index_stats(img_path, stats):
+    """Keep {index: summary} from a run in the metadata cache for img_path"""
+    cached = metadata_cache.get(img_path) or {}
+    index_stats = cached.get('index_stats', {})
+    index_stats.update(stats)
+    metadata_cache.update(img_path, index_stats=index_stats)
+
+
 # ---------------- CALCULATE SINGLE INDEX ----------------
-def calculate_index(calc_type, threshold_val, src):
+def calculate_index(calc_type, threshold_val, src, workers=1):
     """Calculate a single spectral index"""
     band_count = src.count
 
-    # Read bands based on calculation type
+    # Describe bands based on calculation type
     if calc_type == "NDSI":
         # NDSI = (Green - SWIR) / (Green + SWIR)
         if band_count >= 11:
-            band1 = src.read(3).astype(float)   # B3 (Green)
-            band2 = src.read(11).astype(float)  # B11 (SWIR)
             band_info = "B3 (Green) & B11 (SWIR)"
         else:
-            band1 = src.read(1).astype(float)
-            band2 = src.read(2).astype(float)
             band_info = "Band 1 (Green) & Band 2 (SWIR)"
         class1_name, class2_name = "Snow", "Non-snow"
 
     elif calc_type == "NDWI":
         # NDWI = (Green - NIR) / (Green + NIR)
         if band_count >= 11:
-            band1 = src.read(3).astype(float)   # B3 (Green)
-            band2 = src.read(8).astype(float)   # B8 (NIR)
             band_info = "B3 (Green) & B8 (NIR)"
         else:
-            band1 = src.read(1).astype(float)
-            band2 = src.read(2).astype(float)
             band_info = "Band 1 (Green) & Band 2 (NIR)"
         class1_name, class2_name = "Water", "Non-water"
 
     elif calc_type == "NDVI":
         # NDVI = (NIR - Red) / (NIR + Red)
         if band_count >= 11:
-            band1 = src.read(8).astype(float)   # B8 (NIR)
-            band2 = src.read(4).astype(float)   # B4 (Red)
             band_info = "B8 (NIR) & B4 (Red)"
         else:
-            band1 = src.read(1).astype(float)
-            band2 = src.read(2).astype(float)
             band_info = "Band 1 (NIR) & Band 2 (Red)"
         class1_name, class2_name = "Vegetation", "Non-vegetation"
 
-    # Calculate index
-    denom = band1 + band2
-    with np.errstate(divide='ignore', invalid='ignore'):
-        result = (band1 - band2) / denom
-    result[denom == 0] = np.nan
-    result = np.clip(result, -1, 1)
+    # Calculate index (tiled, optionally across worker processes); the
+    # statistics are gathered in the same pass
+    result, stats = sadar_engine.compute_index_array(
+        src.name, calc_type, workers=workers, threshold=threshold_val
+    )
 
-    # Calculate statistics
-    total_pixels = result.size
-    valid_mask = ~np.isnan(result)
-    valid_pixels = np.sum(valid_mask)
-    nodata_pixels = total_pixels - valid_pixels
+    calc_data = stats.summary(threshold_val)
+    calc_data.update(
+        result=result,
+        band_info=band_info,
+        class1_name=class1_name,
+        class2_name=class2_name
+    )
+    return calc_data
 
-    threshold_mask = result >= threshold_val
-    positive_pixels = np.sum(threshold_mask & valid_mask)
-    negative_pixels = valid_pixels - positive_pixels
+# ---------------- BACKGROUND JOBS ----------------
+def on_job_status(text, kind):
+    status.config(text=text, fg=COLORS[kind])
 
-    positive_percentage = (positive_pixels / total_pixels) * 100 if total_pixels > 0 else 0
-    negative_percentage = (negative_pixels / total_pixels) * 100 if total_pixels > 0 else 0
-    nodata_percentage = (nodata_pixels / total_pixels) * 100 if total_pixels > 0 else 0
+def on_job_progress(fraction, message):
+    progress_bar['value'] = fraction * 100
+    if message:
+        status.config(text=message, fg=COLORS['warning'])
 
-    range1 = np.sum((result >= -1) & (result < -0.5) & valid_mask)
-    range2 = np.sum((result >= -0.5) & (result < 0) & valid_mask)
-    range3 = np.sum((result >= 0) & (result < 0.5) & valid_mask)
-    range4 = np.sum((result >= 0.5) & (result <= 1) & valid_mask)
+job_runner = sadar_jobs.JobRunner(on_status=on_job_status, on_progress=on_job_progress)
 
-    return {
-        'result': result,
-        'band_info': band_info,
-        'class1_name': class1_name,
-        'class2_name': class2_name,
-        'min': np.nanmin(result),
-        'max': np.nanmax(result),
-        'mean': np.nanmean(result),
-        'std': np.nanstd(result),
-        'total_pixels': total_pixels,
-        'valid_pixels': valid_pixels,
-        'nodata_pixels': nodata_pixels,
-        'positive_pixels': positive_pixels,
-        'negative_pixels': negative_pixels,
-        'positive_percentage': positive_percentage,
-        'negative_percentage': negative_percentage,
-        'nodata_percentage': nodata_percentage,
-        'range1': range1,
-        'range2': range2,
-        'range3': range3,
-        'range4': range4
-    }
+def set_busy(busy):
+    """Swap Run/Cancel while a background job is active"""
+    if busy:
+        progress_bar['value'] = 0
+        btn_run.config(state='disabled', bg=COLORS['button_disabled'])
+        btn_cancel.config(state='normal', bg=COLORS['button_bg'])
+    else:
+        if image_path:
+            btn_run.config(state='normal', bg=COLORS['button_bg'])
+        btn_cancel.config(state='disabled', bg=COLORS['button_disabled'])
+
+def start_job(func, *args, on_done, on_error):
+    """Run func(job, *args) off the UI thread; callbacks run on the UI thread"""
+    def done(result):
+        set_busy(False)
+        on_done(result)
+
+    def error(e):
+        set_busy(False)
+        on_error(e)
+
+    def cancelled(_):
+        set_busy(False)
+        progress_bar['value'] = 0
+        status.config(text="⚪ Cancelled", fg=COLORS['text_light'])
+
+    if job_runner.start(func, *args, on_done=done, on_error=error, on_cancel=cancelled):
+        set_busy(True)
+
+def schedule_pool_warm_up(*_):
+    """Start the worker processes once the worker count stops changing"""
+    global pending_pool_warm_up
+    if pending_pool_warm_up is not None:
+        root.after_cancel(pending_pool_warm_up)
+    pending_pool_warm_up = root.after(POOL_WARM_DELAY_MS, warm_worker_pool)
+
+def warm_worker_pool():
+    """Spawn the shared worker pool in the background, so Run doesn't wait for it"""
+    try:
+        workers = worker_count_var.get()
+    except tk.TclError:
+        return      # Spinbox being edited
+    # A running job keeps its pool; it is replaced on the next Run instead
+    if workers > 1 and modules_ready.is_set() and not job_runner.busy:
+        threading.Thread(target=sadar_engine.warm_worker_pool, args=(workers,),
+                         daemon=True).start()
+
+def cancel_job():
+    if job_runner.busy:
+        job_runner.cancel()
+        btn_cancel.config(state='disabled', bg=COLORS['button_disabled'])
+        status.config(text="⏳ Cancelling...", fg=COLORS['warning'])
+
+def poll_jobs():
+    job_runner.dispatch()
+    dispatch_previews()
+    dispatch_scan()
+    dispatch_thumbnails()
+    dispatch_band_stats()
+    root.after(JOB_POLL_MS, poll_jobs)
 
 # ---------------- CALCULATE ALL INDICES ----------------
 def calculate_all_indices():
     """Calculate NDSI, NDWI, and NDVI together - OPTIMIZED"""
-    global result_data, profile
+    require_modules()
 
-    try:
-        # Check if output folder is selected
-        if not output_folder_path:
-            messagebox.showwarning("Warning", "Please select output folder first.")
-            return
+    # Check if output folder is selected
+    if not output_folder_path:
+        messagebox.showwarning("Warning", "Please select output folder first.")
+        return
 
-        status.config(text="⏳ Loading image data...", fg=COLORS['warning'])
-        root.update()
+    status.config(text="⏳ Loading image data...", fg=COLORS['warning'])
+    start_job(
+        all_indices_job,
+        image_path,
+        output_folder_path,
+        window_budget_var.get(),
+        worker_count_var.get(),
+        precision_var.get(),
+        output_format_var.get(),
+        compression_var.get(),
+        output_dtype_var.get(),
+        index_files_var.get(),
+        threshold_method_var.get(),
+        on_done=on_all_indices_done,
+        on_error=on_all_indices_error
+    )
 
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
+def all_indices_job(job, image_path, output_folder_path, budget_mb, workers, precision,
+                    output_format, compression, output_dtype, index_files, threshold_method):
+    """Background part of calculate_all_indices (no Tk calls)"""
+    # Stream indices window by window straight into the output TIFFs
+    run = sadar_engine.compute_indices_streaming(
+        image_path,
+        output_folder_path,
+        budget_mb=budget_mb,
+        workers=workers,
+        precision=precision,
+        output_format=output_format,
+        compression=compression,
+        output_dtype=output_dtype,
+        index_files=index_files,
+        threshold_method=threshold_method,
+        progress=lambda fraction, message: job.progress(
+            fraction, f"⏳ Calculating all indices... {fraction * 100:.0f}%"
+        )
+    )
+    base_name = run['base_name']
+    stats = run['stats']
+    remember_index_stats(image_path, stats)
+
+    # Decimated reads keep the previews independent of scene size
+    results = {
+        idx_type: sadar_engine.read_preview(path)
+        for idx_type, path in run['outputs'].items()
+    }
+    ndsi = results['NDSI']
+    ndwi = results['NDWI']
+    ndvi = results['NDVI']
 
-        # Read image ONCE and store all needed bands
-        with rasterio.open(image_path) as src:
-            profile = src.profile
-            band_count = src.count
+    # Create individual previews
+    job.status("🎨 Creating previews...")
 
-            # Check if we have enough bands
-            if band_count < 2:
-                messagebox.showerror("Error", "Image must have at least 2 bands")
-                return
-
-            # Read all bands once
-            if band_count >= 11:
-                green = src.read(3).astype(float)   # B3
-                red = src.read(4).astype(float)     # B4
-                nir = src.read(8).astype(float)     # B8
-                swir = src.read(11).astype(float)   # B11
-                band_mode = "Full satellite image (B3, B4, B8, B11)"
-            else:
-                # For 2-band images, reuse bands
-                band1 = src.read(1).astype(float)
-                band2 = src.read(2).astype(float)
-                green = band1
-                red = band2
-                nir = band1
-                swir = band2
-                band_mode = "2-band mode (using available bands)"
-
-        # Calculate NDSI
-        status.config(text="⏳ Calculating NDSI (1/3)...", fg=COLORS['warning'])
-        root.update()
-
-        denom_ndsi = green + swir
-        with np.errstate(divide='ignore', invalid='ignore'):
-            ndsi = (green - swir) / denom_ndsi
-        ndsi[denom_ndsi == 0] = np.nan
-        ndsi = np.clip(ndsi, -1, 1)
-
-        # Calculate NDWI
-        status.config(text="⏳ Calculating NDWI (2/3)...", fg=COLORS['warning'])
-        root.update()
-
-        denom_ndwi = green + nir
-        with np.errstate(divide='ignore', invalid='ignore'):
-            ndwi = (green - nir) / denom_ndwi
-        ndwi[denom_ndwi == 0] = np.nan
-        ndwi = np.clip(ndwi, -1, 1)
-
-        # Calculate NDVI
-        status.config(text="⏳ Calculating NDVI (3/3)...", fg=COLORS['warning'])
-        root.update()
-
-        denom_ndvi = nir + red
-        with np.errstate(divide='ignore', invalid='ignore'):
-            ndvi = (nir - red) / denom_ndvi
-        ndvi[denom_ndvi == 0] = np.nan
-        ndvi = np.clip(ndvi, -1, 1)
-
-        # Save all results
-        status.config(text="💾 Saving results...", fg=COLORS['warning'])
-        root.update()
-
-        temp_profile = profile.copy()
-        temp_profile.update(dtype=rasterio.float32, count=1, nodata=np.nan)
-
-        results = {
-            'NDSI': ndsi,
-            'NDWI': ndwi,
-            'NDVI': ndvi
-        }
-
-        stats = {}
-
-        for idx_type, idx_data in results.items():
-            # Save TIFF with _processed naming
-            out_tif = os.path.join(output_folder_path, f"{base_name}_{idx_type}_processed.tiff")
-            with rasterio.open(out_tif, 'w', **temp_profile) as dst:
-                dst.write(idx_data.astype(np.float32), 1)
-
-            # Calculate stats
-            stats[idx_type] = {
-                'min': np.nanmin(idx_data),
-                'max': np.nanmax(idx_data),
-                'mean': np.nanmean(idx_data)
-            }
-
-        # Create individual previews
-        for idx_type, idx_data in results.items():
-            png_path = os.path.join(output_folder_path, f"{base_name}_{idx_type}_processed_preview.png")
-
-            fig, ax = plt.subplots(figsize=(8, 6))
-            im = ax.imshow(idx_data, cmap='RdBu', vmin=-1, vmax=1)
-            plt.colorbar(im, ax=ax, label=idx_type)
-            ax.set_title(f"{idx_type} - {base_name}", fontsize=12, fontweight='bold')
-            ax.axis('off')
-            plt.tight_layout()
-            plt.savefig(png_path, dpi=150, bbox_inches='tight')
-            plt.close(fig)
-
-        # ============ CREATE COMPOSITE TIFF (3-band) ============
-        status.config(text="🎨 Creating composite TIFF...", fg=COLORS['warning'])
-        root.update()
-
-        # Create 3-band composite TIFF
-        composite_tiff_path = os.path.join(output_folder_path, f"{base_name}_processed_composite.tiff")
-
-        # Update profile for 3 bands
-        composite_profile = profile.copy()
-        composite_profile.update(
-            dtype=rasterio.float32,
-            count=3,  # 3 bands for NDSI, NDWI, NDVI
-            nodata=np.nan
+    for idx_type, idx_data in results.items():
+        png_path = os.path.join(output_folder_path, f"{base_name}_{idx_type}_processed_preview.png")
+        sadar_render.render_index_png(
+            png_path, idx_data, title=f"{idx_type} - {base_name}", label=idx_type
         )
 
-        # Write composite TIFF
-        with rasterio.open(composite_tiff_path, 'w', **composite_profile) as dst:
-            dst.write(ndsi.astype(np.float32), 1)  # Band 1: NDSI
-            dst.write(ndwi.astype(np.float32), 2)  # Band 2: NDWI
-            dst.write(ndvi.astype(np.float32), 3)  # Band 3: NDVI
-
-            # Add band descriptions
-            dst.set_band_description(1, 'NDSI (Snow Index)')
-            dst.set_band_description(2, 'NDWI (Water Index)')
-            dst.set_band_description(3, 'NDVI (Vegetation Index)')
-
-        # Create COMPOSITE PNG visualization with all three indices
-        status.config(text="🎨 Creating composite PNG preview...", fg=COLORS['warning'])
-        root.update()
-
-        composite_path = os.path.join(output_folder_path, f"{base_name}_processed_composite.png")
-
-        fig, axes = plt.subplots(1, 3, figsize=(18, 5))
-
-        # NDSI
-        im1 = axes[0].imshow(ndsi, cmap='RdBu', vmin=-1, vmax=1)
-        axes[0].set_title(f'NDSI (Snow Index)\nMean: {stats["NDSI"]["mean"]:.3f}', 
-                          fontsize=11, fontweight='bold')
-        axes[0].axis('off')
-        plt.colorbar(im1, ax=axes[0], fraction=0.046, pad=0.04)
-
-        # NDWI
-        im2 = axes[1].imshow(ndwi, cmap='RdBu', vmin=-1, vmax=1)
-        axes[1].set_title(f'NDWI (Water Index)\nMean: {stats["NDWI"]["mean"]:.3f}', 
-                          fontsize=11, fontweight='bold')
-        axes[1].axis('off')
-        plt.colorbar(im2, ax=axes[1], fraction=0.046, pad=0.04)
-
-        # NDVI
-        im3 = axes[2].imshow(ndvi, cmap='RdBu', vmin=-1, vmax=1)
-        axes[2].set_title(f'NDVI (Vegetation Index)\nMean: {stats["NDVI"]["mean"]:.3f}', 
-                          fontsize=11, fontweight='bold')
-        axes[2].axis('off')
-        plt.colorbar(im3, ax=axes[2], fraction=0.046, pad=0.04)
-
-        # Main title
-        fig.suptitle(f'All Spectral Indices - {base_name}', 
-                     fontsize=14, fontweight='bold', y=0.98)
-
-        plt.tight_layout()
-        plt.savefig(composite_path, dpi=150, bbox_inches='tight')
-        plt.close(fig)
+    # Create COMPOSITE PNG visualization with all three indices
+    job.status("🎨 Creating composite PNG preview...")
+
+    composite_path = os.path.join(output_folder_path, f"{base_name}_processed_composite.png")
+    sadar_render.render_composite_png(
+        composite_path,
+        [
+            (f'NDSI (Snow Index)\nMean: {stats["NDSI"]["mean"]:.3f}', ndsi),
+            (f'NDWI (Water Index)\nMean: {stats["NDWI"]["mean"]:.3f}', ndwi),
+            (f'NDVI (Vegetation Index)\nMean: {stats["NDVI"]["mean"]:.3f}', ndvi),
+        ],
+        title=f'All Spectral Indices - {base_name}'
+    )
 
-        status.config(
-            text=f"✓ All files saved: 3 individual TIFFs + 3 PNGs + composite TIFF + composite PNG",
-            fg=COLORS['success']
-        )
+    return {
+        'base_name': base_name,
+        'profile': run['profile'],
+        'stats': stats,
+        'outputs': run['outputs'],
+        'output_folder': output_folder_path
+    }
 
-        # Update image info
-        image_info_label.config(
-            text=f"✅ NDSI: {stats['NDSI']['mean']:.3f} | NDWI: {stats['NDWI']['mean']:.3f} | NDVI: {stats['NDVI']['mean']:.3f}",
-            fg=COLORS['success']
-        )
+def on_all_indices_done(run):
+    global profile
 
-        messagebox.showinfo(
-            "Success",
-            f"All 3 indices calculated and saved!\n\n"
-            f"Time saved by batch processing!\n\n"
-            f"Location: {output_folder_path}\n\n"
-            f"Individual TIFF Files (3):\n"
-            f"• {base_name}_NDSI_processed.tiff\n"
-            f"• {base_name}_NDWI_processed.tiff\n"
-            f"• {base_name}_NDVI_processed.tiff\n\n"
-            f"Individual PNG Previews (3):\n"
-            f"• {base_name}_NDSI_processed_preview.png\n"
-            f"• {base_name}_NDWI_processed_preview.png\n"
-            f"• {base_name}_NDVI_processed_preview.png\n\n"
-            f"Composite Files (2):\n"
-            f"• {base_name}_processed_composite.tiff (3-band)\n"
-            f"• {base_name}_processed_composite.png (visualization)\n\n"
-            f"Total: 8 files created"
-        )
+    profile = run['profile']
+    base_name = run['base_name']
+    stats = run['stats']
 
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to calculate all indices:\n{str(e)}")
-        status.config(text="❌ Calculation failed", fg=COLORS['error'])
+    progress_bar['value'] = 100
+    index_names = [os.path.basename(path) for path in run['outputs'].values()]
+    index_kind = "VRTs" if index_names[0].endswith('.vrt') else "TIFFs"
+    index_list = "".join(f"• {name}\n" for name in index_names)
+    status.config(
+        text=f"✓ All files saved: 3 individual {index_kind} + 3 PNGs + composite TIFF + composite PNG",
+        fg=COLORS['success']
+    )
+
+    # Update image info
+    image_info_label.config(
+        text="✅ " + " | ".join(
+            f"{idx}: {s['mean']:.3f} (≥ {s['threshold']:.3f}: {s['positive_percentage']:.1f}%)"
+            for idx, s in stats.items()
+        ),
+        fg=COLORS['success']
+    )
+
+    messagebox.showinfo(
+        "Success",
+        f"All 3 indices calculated and saved!\n\n"
+        f"Time saved by batch processing!\n\n"
+        f"Location: {run['output_folder']}\n\n"
+        f"Individual {index_kind[:-1]} Files (3):\n"
+        f"{index_list}\n"
+        f"Individual PNG Previews (3):\n"
+        f"• {base_name}_NDSI_processed_preview.png\n"
+        f"• {base_name}_NDWI_processed_preview.png\n"
+        f"• {base_name}_NDVI_processed_preview.png\n\n"
+        f"Composite Files (2):\n"
+        f"• {base_name}_processed_composite.tiff (3-band)\n"
+        f"• {base_name}_processed_composite.png (visualization)\n\n"
+        f"Total: 8 files created"
+    )
+
+def on_all_indices_error(e):
+    messagebox.showerror("Error", f"Failed to calculate all indices:\n{str(e)}")
+    status.config(text="❌ Calculation failed", fg=COLORS['error'])
 
 # ---------------- RUN CALCULATION ----------------
 def run_calculation():
-    global result_data, profile, green, swir
+    global profile
 
+    require_modules()
     calc_type = calculation_var.get()
 
     # Check if "All Indices" is selected
@@ -626,21 +1002,16 @@ def run_calculation():
 
     try:
         status.config(text=f"⏳ Calculating {calc_type}...", fg=COLORS['warning'])
-        root.update()
 
         with rasterio.open(image_path) as src:
             band_count = src.count
 
-            # Read bands based on calculation type
+            # Check bands based on calculation type
             if calc_type == "NDSI":
                 # NDSI = (Green - SWIR) / (Green + SWIR)
                 if band_count >= 11:
-                    band1 = src.read(3).astype(float)   # B3 (Green)
-                    band2 = src.read(11).astype(float)  # B11 (SWIR)
                     band_info = "Using B3 (Green) and B11 (SWIR)"
                 elif band_count >= 2:
-                    band1 = src.read(1).astype(float)
-                    band2 = src.read(2).astype(float)
                     if band_count == 2:
                         band_info = "Using Band 1 (Green) and Band 2 (SWIR)"
                     else:
@@ -654,12 +1025,8 @@ def run_calculation():
             elif calc_type == "NDWI":
                 # NDWI = (Green - NIR) / (Green + NIR)
                 if band_count >= 11:
-                    band1 = src.read(3).astype(float)   # B3 (Green)
-                    band2 = src.read(8).astype(float)   # B8 (NIR)
                     band_info = "Using B3 (Green) and B8 (NIR)"
                 elif band_count >= 2:
-                    band1 = src.read(1).astype(float)
-                    band2 = src.read(2).astype(float)
                     if band_count == 2:
                         band_info = "Using Band 1 (Green) and Band 2 (NIR)"
                     else:
@@ -673,12 +1040,8 @@ def run_calculation():
             elif calc_type == "NDVI":
                 # NDVI = (NIR - Red) / (NIR + Red)
                 if band_count >= 11:
-                    band1 = src.read(8).astype(float)   # B8 (NIR)
-                    band2 = src.read(4).astype(float)   # B4 (Red)
                     band_info = "Using B8 (NIR) and B4 (Red)"
                 elif band_count >= 2:
-                    band1 = src.read(1).astype(float)
-                    band2 = src.read(2).astype(float)
                     if band_count == 2:
                         band_info = "Using Band 1 (NIR) and Band 2 (Red)"
                     else:
@@ -691,93 +1054,113 @@ def run_calculation():
 
             profile = src.profile
 
-        # Calculate index
-        denom = band1 + band2
+    except Exception as e:
+        on_calculation_error(e)
+        return
 
-        with np.errstate(divide='ignore', invalid='ignore'):
-            result_data = (band1 - band2) / denom
+    start_job(
+        calculation_job,
+        image_path,
+        profile,
+        calc_type,
+        ndsi_threshold,
+        band_info,
+        window_budget_var.get(),
+        worker_count_var.get(),
+        precision_var.get(),
+        scratch_dir,
+        on_done=on_calculation_done,
+        on_error=on_calculation_error
+    )
 
-        result_data[denom == 0] = np.nan
-        result_data = np.clip(result_data, -1, 1)
+def calculation_job(job, image_path, profile, calc_type, threshold, band_info, budget_mb, workers,
+                    precision, scratch_dir):
+    """Background part of run_calculation (no Tk calls)"""
+    # Calculate index (tiled, optionally across worker processes); the
+    # statistics are gathered in the same pass
+    result_data, stats = sadar_engine.compute_index_array(
+        image_path,
+        calc_type,
+        budget_mb=budget_mb,
+        workers=workers,
+        precision=precision,
+        threshold=threshold,
+        scratch_dir=scratch_dir,
+        progress=lambda fraction, message: job.progress(
+            fraction, f"⏳ Calculating {calc_type}... {fraction * 100:.0f}%"
+        )
+    )
 
-        # Calculate statistics for display
-        total_pixels = result_data.size
-        valid_mask = ~np.isnan(result_data)
-        valid_pixels = np.sum(valid_mask)
-        nodata_pixels = total_pixels - valid_pixels
+    # Set meaningful labels based on index type
+    if calc_type == "NDSI":
+        class1_name = "Snow"
+        class2_name = "Non-snow"
+    elif calc_type == "NDWI":
+        class1_name = "Water"
+        class2_name = "Non-water"
+    elif calc_type == "NDVI":
+        class1_name = "Vegetation"
+        class2_name = "Non-vegetation"
+
+    calc_data = stats.summary(threshold)
+    calc_data.update(
+        filename=os.path.basename(image_path),
+        index_type=calc_type,
+        band_info=band_info,
+        class1_name=class1_name,
+        class2_name=class2_name
+    )
+    remember_index_stats(image_path, {calc_type: calc_data})
 
-        threshold_mask = result_data >= ndsi_threshold
-        positive_pixels = np.sum(threshold_mask & valid_mask)
-        negative_pixels = valid_pixels - positive_pixels
+    return image_path, profile, result_data, calc_data, stats
 
-        # Calculate percentages
-        positive_percentage = (positive_pixels / total_pixels) * 100 if total_pixels > 0 else 0
-        negative_percentage = (negative_pixels / total_pixels) * 100 if total_pixels > 0 else 0
-        nodata_percentage = (nodata_pixels / total_pixels) * 100 if total_pixels > 0 else 0
+def on_calculation_done(outcome):
+    global result_data, calc_stats, calc_index_stats
 
-        # Value distribution
-        range1 = np.sum((result_data >= -1) & (result_data < -0.5) & valid_mask)
-        range2 = np.sum((result_data >= -0.5) & (result_data < 0) & valid_mask)
-        range3 = np.sum((result_data >= 0) & (result_data < 0.5) & valid_mask)
-        range4 = np.sum((result_data >= 0.5) & (result_data <= 1) & valid_mask)
+    computed_path, computed_profile, result, calc_data, stats = outcome
+    calc_type = calc_data['index_type']
 
-        # Set meaningful labels based on index type
-        if calc_type == "NDSI":
-            class1_name = "Snow"
-            class2_name = "Non-snow"
-        elif calc_type == "NDWI":
-            class1_name = "Water"
-            class2_name = "Non-water"
-        elif calc_type == "NDVI":
-            class1_name = "Vegetation"
-            class2_name = "Non-vegetation"
-
-        calc_data = {
-            'filename': os.path.basename(image_path),
-            'index_type': calc_type,
-            'threshold': ndsi_threshold,
-            'min': np.nanmin(result_data),
-            'max': np.nanmax(result_data),
-            'mean': np.nanmean(result_data),
-            'std': np.nanstd(result_data),
-            'total_pixels': total_pixels,
-            'valid_pixels': valid_pixels,
-            'nodata_pixels': nodata_pixels,
-            'positive_pixels': positive_pixels,
-            'negative_pixels': negative_pixels,
-            'positive_percentage': positive_percentage,
-            'negative_percentage': negative_percentage,
-            'nodata_percentage': nodata_percentage,
-            'range1': range1,
-            'range2': range2,
-            'range3': range3,
-            'range4': range4,
-            'band_info': band_info,
-            'class1_name': class1_name,
-            'class2_name': class2_name
-        }
-
-        status.config(text=f"✓ {calc_type} calculated successfully ({band_info})", fg=COLORS['success'])
-
-        # Update image info with calculation results
-        image_info_label.config(
-            text=f"📊 {calc_type} calculated | Min: {calc_data['min']:.3f} | Max: {calc_data['max']:.3f} | Mean: {calc_data['mean']:.3f}",
+    if computed_path != image_path or calculation_var.get() != calc_type:
+        # Another image or index was selected while this one ran: save the
+        # result under its own name but leave the current preview alone
+        status.config(
+            text=f"✓ {calc_type} of {calc_data['filename']} calculated (no longer selected)",
             fg=COLORS['success']
         )
+        save_output(computed_path, computed_profile, result, calc_data)
+        return
 
-        # Auto-save immediately
-        root.update()
-        save_output()
+    result_data, calc_stats, calc_index_stats = result, calc_data, stats
 
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
-        status.config(text=f"❌ Calculation failed: {str(e)}", fg=COLORS['error'])
+    scratch_note = " | disk-backed (memmap)" if isinstance(result_data, np.memmap) else ""
+    status.config(
+        text=f"✓ {calc_type} calculated successfully ({calc_data['band_info']}){scratch_note}",
+        fg=COLORS['success']
+    )
 
-# ---------------- SAVE OUTPUT ----------------
-def save_output():
-    global output_folder_path
+    # Update image info with calculation results
+    image_info_label.config(
+        text=f"📊 {calc_type} calculated | Min: {calc_data['min']:.3f} | Max: {calc_data['max']:.3f} | "
+             f"Mean: {calc_data['mean']:.3f} | Median: {calc_data['p50']:.3f} | Otsu: {calc_data['otsu_threshold']:.3f}",
+        fg=COLORS['success']
+    )
+
+    # Classification overlay; the slider now updates it live
+    prepare_classification()
+    update_classification(ndsi_threshold, show_counts=False)
 
-    if result_data is None:
+    # Auto-save immediately (calc_stats now follows the slider's threshold)
+    save_output(computed_path, computed_profile, result_data, calc_stats)
+
+def on_calculation_error(e):
+    messagebox.showerror("Error", str(e))
+    status.config(text=f"❌ Calculation failed: {str(e)}", fg=COLORS['error'])
+
+# ---------------- SAVE OUTPUT ----------------
+def save_output(source_path, source_profile, result, calc_data):
+    """Write the outputs of one calculation, named after source_path and its index"""
+    require_modules()
+    if result is None:
         messagebox.showwarning("Warning", "No result to save. Please run calculation first.")
         return
 
@@ -786,73 +1169,136 @@ def save_output():
         messagebox.showwarning("Warning", "Please select output folder first.")
         return
 
-    try:
-        status.config(text="💾 Saving outputs...", fg=COLORS['warning'])
-        root.update()
+    status.config(text="💾 Saving outputs...", fg=COLORS['warning'])
+
+    # Calculation type and base filename of the image the result belongs to
+    calc_type = calc_data['index_type']
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+
+    start_job(
+        save_job,
+        result,
+        calc_data,
+        source_profile.copy(),
+        calc_type,
+        base_name,
+        calc_data['threshold'],
+        output_folder_path,
+        output_format_var.get(),
+        compression_var.get(),
+        output_dtype_var.get(),
+        on_done=on_save_done,
+        on_error=on_save_error
+    )
 
-        # Get calculation type and base filename
-        calc_type = calculation_var.get()
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
-
-        # ---- SAVE TIFF ----
-        out_tif = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed.tiff")
-        profile.update(dtype=rasterio.float32, count=1, nodata=np.nan)
-
-        with rasterio.open(out_tif, 'w', **profile) as dst:
-            dst.write(result_data.astype(np.float32), 1)
-
-        # ---- SAVE PNG ----
-        png_path = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed_preview.png")
-        plt.figure(figsize=(10, 8))
-        plt.imshow(result_data, cmap='RdBu', vmin=-1, vmax=1)
-        plt.colorbar(label=calc_type, shrink=0.8)
-        plt.title(f"{calc_type} Map - {base_name}", fontsize=16, fontweight='bold')
-        plt.axis("off")
-        plt.savefig(png_path, dpi=200, bbox_inches='tight')
-        plt.close()
-
-        # ---- PDF REPORT ----
-        pdf_path = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed_report.pdf")
-        doc = SimpleDocTemplate(pdf_path)
-        styles = getSampleStyleSheet()
-        story = []
-
-        story.append(Paragraph(f"<b>{calc_type} Analysis Report</b>", styles['Title']))
-        story.append(Paragraph(f"<b>Image:</b> {base_name}", styles['Normal']))
+def save_job(job, result_data, calc_data, profile, calc_type, base_name, threshold, output_folder_path,
+             output_format, compression, output_dtype):
+    """Background part of save_output (no Tk calls)"""
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Image
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    # ---- SAVE TIFF ----
+    job.status("💾 Saving TIFF...")
+    out_tif = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed.tiff")
+    sadar_output.write_array(out_tif, result_data, profile, output_format, compression, output_dtype)
+
+    # ---- SAVE PNG ----
+    job.status("🎨 Rendering preview...")
+    png_path = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed_preview.png")
+    sadar_render.render_index_png(
+        png_path, result_data, title=f"{calc_type} Map - {base_name}", label=calc_type
+    )
+
+    # ---- PDF REPORT ----
+    job.status("📄 Writing report...")
+    pdf_path = os.path.join(output_folder_path, f"{base_name}_{calc_type}_processed_report.pdf")
+    doc = SimpleDocTemplate(pdf_path)
+    styles = getSampleStyleSheet()
+    story = []
+
+    story.append(Paragraph(f"<b>{calc_type} Analysis Report</b>", styles['Title']))
+    story.append(Paragraph(f"<b>Image:</b> {base_name}", styles['Normal']))
+    story.append(Paragraph(
+        f"<b>Threshold:</b> {threshold:.2f}",
+        styles['Normal']
+    ))
+
+    story.append(Paragraph(f"<br/><b>{calc_type} Statistics</b><br/>", styles['Normal']))
+    story.append(Paragraph(f"Min: {calc_data['min']:.4f}", styles['Normal']))
+    story.append(Paragraph(f"Max: {calc_data['max']:.4f}", styles['Normal']))
+    story.append(Paragraph(f"Mean: {calc_data['mean']:.4f}", styles['Normal']))
+    story.append(Paragraph(f"Std: {calc_data['std']:.4f}", styles['Normal']))
+
+    # Everything below is read off the index histogram (no extra pixel pass)
+    story.append(Paragraph("<br/><b>Distribution</b><br/>", styles['Normal']))
+    story.append(Paragraph(
+        "Percentiles: " + " | ".join(
+            f"P{q}: {calc_data[f'p{q}']:.4f}" for q in sadar_stats.PERCENTILES
+        ),
+        styles['Normal']
+    ))
+    valid = calc_data['valid_pixels'] or 1
+    range_labels = ("[-1, -0.5)", "[-0.5, 0)", "[0, 0.5)", "[0.5, 1]")
+    for n, label in enumerate(range_labels, start=1):
+        count = calc_data[f'range{n}']
         story.append(Paragraph(
-            f"<b>Threshold:</b> {ndsi_threshold:.2f}",
-            styles['Normal']
+            f"{label}: {count:,} px ({count / valid * 100:.1f}% of valid)", styles['Normal']
         ))
 
-        story.append(Paragraph(f"<br/><b>{calc_type} Statistics</b><br/>", styles['Normal']))
-        story.append(Paragraph(f"Min: {np.nanmin(result_data):.4f}", styles['Normal']))
-        story.append(Paragraph(f"Max: {np.nanmax(result_data):.4f}", styles['Normal']))
-        story.append(Paragraph(f"Mean: {np.nanmean(result_data):.4f}", styles['Normal']))
+    story.append(Paragraph("<br/><b>Classification</b><br/>", styles['Normal']))
+    story.append(Paragraph(
+        f"{calc_data['class1_name']} (&gt;= {threshold:.2f}): {calc_data['positive_pixels']:,} px "
+        f"({calc_data['positive_percentage']:.1f}%)",
+        styles['Normal']
+    ))
+    story.append(Paragraph(
+        f"{calc_data['class2_name']}: {calc_data['negative_pixels']:,} px "
+        f"({calc_data['negative_percentage']:.1f}%)",
+        styles['Normal']
+    ))
+    story.append(Paragraph(
+        f"No data: {calc_data['nodata_pixels']:,} px ({calc_data['nodata_percentage']:.1f}%)",
+        styles['Normal']
+    ))
+    story.append(Paragraph(
+        f"Otsu threshold (histogram): {calc_data['otsu_threshold']:.3f}", styles['Normal']
+    ))
+
+    story.append(Paragraph(f"<br/><b>{calc_type} Map</b><br/>", styles['Normal']))
+    story.append(Image(png_path, width=400, height=300))
+
+    doc.build(story)
 
-        story.append(Paragraph(f"<br/><b>{calc_type} Map</b><br/>", styles['Normal']))
-        story.append(Image(png_path, width=400, height=300))
+    return {
+        'base_name': base_name,
+        'calc_type': calc_type,
+        'output_folder': output_folder_path
+    }
 
-        doc.build(story)
+def on_save_done(saved):
+    base_name = saved['base_name']
+    calc_type = saved['calc_type']
 
-        status.config(
-            text=f"✓ Saved: {base_name}_{calc_type}_processed.tiff + preview + report", 
-            fg=COLORS['success']
-        )
+    progress_bar['value'] = 100
+    status.config(
+        text=f"✓ Saved: {base_name}_{calc_type}_processed.tiff + preview + report", 
+        fg=COLORS['success']
+    )
 
-        # Show success message with file names
-        messagebox.showinfo(
-            "Success", 
-            f"Files saved successfully!\n\n"
-            f"Location: {output_folder_path}\n\n"
-            f"Files:\n"
-            f"• {base_name}_{calc_type}_processed.tiff\n"
-            f"• {base_name}_{calc_type}_processed_preview.png\n"
-            f"• {base_name}_{calc_type}_processed_report.pdf"
-        )
+    # Show success message with file names
+    messagebox.showinfo(
+        "Success", 
+        f"Files saved successfully!\n\n"
+        f"Location: {saved['output_folder']}\n\n"
+        f"Files:\n"
+        f"• {base_name}_{calc_type}_processed.tiff\n"
+        f"• {base_name}_{calc_type}_processed_preview.png\n"
+        f"• {base_name}_{calc_type}_processed_report.pdf"
+    )
 
-    except Exception as e:
-        messagebox.showerror("Save Error", f"Failed to save files:\n{str(e)}")
-        status.config(text="❌ Failed to save outputs", fg=COLORS['error'])
+def on_save_error(e):
+    messagebox.showerror("Save Error", f"Failed to save files:\n{str(e)}")
+    status.config(text="❌ Failed to save outputs", fg=COLORS['error'])
 
 # ---------------- BUTTON HOVER EFFECTS ----------------
 def on_enter_run(e):
@@ -863,486 +1309,952 @@ def on_leave_run(e):
     if btn_run['state'] == 'normal':
         btn_run['background'] = COLORS['button_bg']
 
+# ---------------- DIAGNOSTICS ----------------
+def diagnostics_text():
+    """Session cache counters as display lines"""
+    if not modules_ready.is_set():
+        return "Modules still loading..."
+    stats = sadar_engine.session_cache.stats()
+
+    def rate(hits, misses):
+        total = hits + misses
+        return f"{hits / total * 100:.0f}%" if total else "-"
+
+    prefetch = (f"  Fetched: {prefetcher.fetched}   Failed: {prefetcher.failed}"
+                f"   Queued: {prefetcher.queued}" if prefetcher else "  Idle")
+
+    return "\n".join([
+        "Dataset handles",
+        f"  Hits: {stats['handle_hits']}   Misses: {stats['handle_misses']}"
+        f"   Hit rate: {rate(stats['handle_hits'], stats['handle_misses'])}",
+        f"  Open: {stats['handles_open']}",
+        "",
+        "Decoded blocks",
+        f"  Hits: {stats['block_hits']}   Misses: {stats['block_misses']}"
+        f"   Hit rate: {rate(stats['block_hits'], stats['block_misses'])}",
+        f"  Entries: {stats['block_entries']}   Evictions: {stats['block_evictions']}",
+        f"  Size: {stats['block_mb']:.1f} / {stats['block_max_mb']:.0f} MB",
+        "",
+        "Prefetch",
+        prefetch,
+    ])
+
+def show_diagnostics(event=None):
+    """Open (or raise) the cache diagnostics window"""
+    global diagnostics_window
+    if diagnostics_window is not None and diagnostics_window.winfo_exists():
+        diagnostics_window.lift()
+        return
+
+    diagnostics_window = tk.Toplevel(root)
+    diagnostics_window.title("Cache Diagnostics")
+    diagnostics_window.config(bg=COLORS['card_bg'])
+    diagnostics_window.resizable(False, False)
+
+    label = tk.Label(
+        diagnostics_window,
+        text=diagnostics_text(),
+        font=("Consolas", 10) if os.name == 'nt' else ("Menlo", 10),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        justify='left',
+        anchor='w',
+        padx=20,
+        pady=15
+    )
+    label.pack(fill='both', expand=True)
+
+    def clear_cache():
+        if modules_ready.is_set():
+            sadar_engine.session_cache.clear()
+        label.config(text=diagnostics_text())
+
+    tk.Button(
+        diagnostics_window,
+        text="Clear Cache",
+        font=("Segoe UI", 9),
+        bg=COLORS['button_bg'],
+        fg="white",
+        activebackground=COLORS['button_hover'],
+        activeforeground="white",
+        relief='flat',
+        bd=0,
+        padx=12,
+        pady=4,
+        command=clear_cache
+    ).pack(pady=(0, 15))
+
+    window = diagnostics_window
+
+    def refresh():
+        if window.winfo_exists():
+            label.config(text=diagnostics_text())
+            window.after(DIAGNOSTICS_REFRESH_MS, refresh)
+
+    refresh()
+
 # ---------------- GUI ----------------
-root = tk.Tk()
-root.title("Raster Index Calculator - Professional Edition")
-
-# Get screen dimensions
-screen_width = root.winfo_screenwidth()
-screen_height = root.winfo_screenheight()
-
-# Set window to full screen
-root.geometry(f"{screen_width}x{screen_height}+0+0")
-root.state('zoomed')  # Maximized state
-
-root.config(bg=COLORS['background'])
-
-# Main container with padding
-main_container = tk.Frame(root, bg=COLORS['background'])
-main_container.pack(fill='both', expand=True, padx=30, pady=20)
-
-# Header section
-header_frame = tk.Frame(main_container, bg=COLORS['primary'], height=100)
-header_frame.pack(fill='x', pady=(0, 20))
-header_frame.pack_propagate(False)
-
-title = tk.Label(
-    header_frame,
-    text="🛰️ Raster Index Calculator",
-    font=("SF Pro Display", 28, "bold") if os.name == 'darwin' else ("Segoe UI", 28, "bold"),
-    bg=COLORS['primary'],
-    fg="white",
-    pady=15
-)
-title.pack()
-
-subtitle = tk.Label(
-    header_frame,
-    text="Professional GeoTIFF Analysis Tool",
-    font=("SF Pro Display", 12) if os.name == 'darwin' else ("Segoe UI", 12),
-    bg=COLORS['primary'],
-    fg="#a1a1a6"
-)
-subtitle.pack()
-
-# Content area with two columns
-content_frame = tk.Frame(main_container, bg=COLORS['background'])
-content_frame.pack(fill='both', expand=True)
-
-# Configure grid weights for better space distribution
-content_frame.grid_rowconfigure(0, weight=1)
-content_frame.grid_columnconfigure(0, weight=1)
-content_frame.grid_columnconfigure(1, weight=1)
-
-# Left column - Controls (with scrollbar)
-left_column_container = tk.Frame(content_frame, bg=COLORS['card_bg'], relief='flat', bd=0)
-left_column_container.grid(row=0, column=0, sticky='nsew', padx=(0, 10))
-left_column_container.config(highlightbackground=COLORS['border'], highlightthickness=1)
-
-# Create canvas and scrollbar for left column
-left_canvas = tk.Canvas(left_column_container, bg=COLORS['card_bg'], highlightthickness=0)
-left_scrollbar = tk.Scrollbar(left_column_container, orient="vertical", command=left_canvas.yview)
-
-left_column = tk.Frame(left_canvas, bg=COLORS['card_bg'])
-
-left_scrollbar.pack(side="right", fill="y")
-left_canvas.pack(side="left", fill="both", expand=True)
-left_canvas.create_window((0, 0), window=left_column, anchor="nw", width=left_canvas.winfo_reqwidth())
-
-left_canvas.configure(yscrollcommand=left_scrollbar.set)
-
-def on_left_frame_configure(event):
-    left_canvas.configure(scrollregion=left_canvas.bbox("all"))
-
-def on_left_canvas_configure(event):
-    # Update the width of the frame to fill the canvas
-    canvas_width = event.width
-    left_canvas.itemconfig(left_canvas.find_withtag("all")[0], width=canvas_width)
-
-left_column.bind("<Configure>", on_left_frame_configure)
-left_canvas.bind("<Configure>", on_left_canvas_configure)
-
-# Mouse wheel scrolling for left column
-def on_left_mousewheel(event):
-    left_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-
-left_canvas.bind_all("<MouseWheel>", on_left_mousewheel)
-
-# Right column - Information
-right_column = tk.Frame(content_frame, bg=COLORS['card_bg'], relief='flat', bd=0)
-right_column.grid(row=0, column=1, sticky='nsew', padx=(10, 0))
-right_column.config(highlightbackground=COLORS['border'], highlightthickness=1)
-
-# ========== LEFT COLUMN CONTENT ==========
-left_content = tk.Frame(left_column, bg=COLORS['card_bg'])
-left_content.pack(fill='both', expand=True, padx=20, pady=20)
-
-# Unified upload section
-upload_section = tk.LabelFrame(
-    left_content,
-    text="📁 Folders",
-    font=("Segoe UI", 12, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    padx=15,
-    pady=10
-)
-upload_section.pack(fill='both', expand=True, pady=(0, 15))
-
-# Info label
-upload_info = tk.Label(
-    upload_section,
-    text="Select input and output folders",
-    font=("Segoe UI", 9),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    anchor='w'
-)
-upload_info.pack(pady=(5, 10), fill='x')
-
-# Input folder section
-input_folder_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
-input_folder_frame.pack(fill='x', pady=(0, 10))
-
-input_folder_label = tk.Label(
-    input_folder_frame,
-    text="Input Folder:",
-    font=("Segoe UI", 9, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    anchor='w'
-)
-input_folder_label.pack(fill='x')
-
-folder_label = tk.Label(
-    input_folder_frame,
-    text="No folder selected",
-    font=("Segoe UI", 10),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    anchor='w'
-)
-folder_label.pack(pady=(2, 0), fill='x')
-
-folder_info_label = tk.Label(
-    input_folder_frame,
-    text="",
-    font=("Segoe UI", 9),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    anchor='w'
-)
-folder_info_label.pack(pady=(0, 5), fill='x')
-
-# Upload buttons frame
-upload_buttons_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
-upload_buttons_frame.pack(fill='x', pady=4)
-
-btn_input_folder = tk.Button(
-    upload_buttons_frame,
-    text="📂 Select Input Folder",
-    font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
-    bg=COLORS['button_bg'],
-    fg="white",
-    activebackground=COLORS['button_hover'],
-    activeforeground="white",
-    pady=12,
-    cursor="hand2",
-    relief='flat',
-    bd=0,
-    highlightthickness=0,
-    command=upload_folder
-)
-btn_input_folder.pack(side='left', fill='x', expand=True, padx=(0, 5))
-
-btn_output_folder = tk.Button(
-    upload_buttons_frame,
-    text="💾 Select Output Folder",
-    font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
-    bg=COLORS['button_bg'],
-    fg="white",
-    activebackground=COLORS['button_hover'],
-    activeforeground="white",
-    pady=12,
-    cursor="hand2",
-    relief='flat',
-    bd=0,
-    highlightthickness=0,
-    command=select_output_folder
-)
-btn_output_folder.pack(side='right', fill='x', expand=True, padx=(5, 0))
-
-# Output folder display
-output_folder_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
-output_folder_frame.pack(fill='x', pady=(10, 0))
-
-output_folder_label = tk.Label(
-    output_folder_frame,
-    text="Output Folder:",
-    font=("Segoe UI", 9, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    anchor='w'
-)
-output_folder_label.pack(fill='x')
-
-output_folder_display = tk.Label(
-    output_folder_frame,
-    text="Not selected",
-    font=("Segoe UI", 10),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    anchor='w'
-)
-output_folder_display.pack(pady=(2, 0), fill='x')
-
-# Image listbox with scrollbar (hidden initially)
-listbox_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
-listbox_frame.pack(fill='both', expand=True, pady=(10, 0))
-
-listbox_label = tk.Label(
-    listbox_frame,
-    text="Select an image:",
-    font=("Segoe UI", 9, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    anchor='w'
-)
-listbox_label.pack(fill='x', pady=(0, 5))
-
-listbox_scroll_container = tk.Frame(listbox_frame, bg=COLORS['card_bg'])
-listbox_scroll_container.pack(fill='both', expand=True)
-
-listbox_scrollbar = tk.Scrollbar(listbox_scroll_container)
-listbox_scrollbar.pack(side='right', fill='y')
-
-image_listbox = tk.Listbox(
-    listbox_scroll_container,
-    font=("Segoe UI", 9),
-    bg='white',
-    fg=COLORS['text'],
-    selectmode='single',
-    height=6,
-    yscrollcommand=listbox_scrollbar.set,
-    relief='solid',
-    bd=1
-)
-image_listbox.pack(side='left', fill='both', expand=True)
-listbox_scrollbar.config(command=image_listbox.yview)
-image_listbox.bind('<<ListboxSelect>>', load_selected_image)
-
-# Hide listbox initially
-listbox_frame.pack_forget()
-
-# File info section (shows current selected file)
-file_info_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
-file_info_frame.pack(fill='x', pady=(10, 0))
-
-file_name_label = tk.Label(
-    file_info_frame,
-    text="",
-    font=("Segoe UI", 10, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    anchor='w'
-)
-file_name_label.pack(fill='x')
-
-file_info_label = tk.Label(
-    file_info_frame,
-    text="",
-    font=("Segoe UI", 9),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    anchor='w'
-)
-file_info_label.pack(fill='x')
-
-# Calculation settings section
-calc_section = tk.LabelFrame(
-    left_content,
-    text="⚙️ Calculation Settings",
-    font=("Segoe UI", 12, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    padx=15,
-    pady=10
-)
-calc_section.pack(fill='x', pady=(0, 15))
-
-# Calculation type
-calc_type_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
-calc_type_frame.pack(fill='x', pady=(5, 10))
-
-calc_label = tk.Label(
-    calc_type_frame,
-    text="Index Type:",
-    font=("Segoe UI", 10, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text']
-)
-calc_label.pack(anchor='w', pady=(0, 3))
-
-calculation_var = tk.StringVar(value="NDSI")
-calc_dropdown = ttk.Combobox(
-    calc_type_frame,
-    textvariable=calculation_var,
-    values=["NDSI", "NDWI", "NDVI", "All Indices"],
-    state='readonly',
-    font=("Segoe UI", 10)
-)
-calc_dropdown.pack(fill='x')
-
-# Add event handler for dropdown change
-def on_calculation_change(event):
-    calc_type = calculation_var.get()
-    if calc_type == "NDSI":
-        threshold_label.config(text="NDSI Threshold:")
-        threshold_slider.config(from_=0.0, to=1.0)
-        threshold_slider.set(0.4)
-    elif calc_type == "NDWI":
-        threshold_label.config(text="NDWI Threshold:")
-        threshold_slider.config(from_=-1.0, to=1.0)
-        threshold_slider.set(0.3)
-    elif calc_type == "NDVI":
-        threshold_label.config(text="NDVI Threshold:")
-        threshold_slider.config(from_=-1.0, to=1.0)
-        threshold_slider.set(0.2)
-    elif calc_type == "All Indices":
-        threshold_label.config(text="Thresholds (Auto):")
-        threshold_slider.config(state='disabled')
-
-calc_dropdown.bind('<<ComboboxSelected>>', on_calculation_change)
-
-# Threshold slider
-threshold_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
-threshold_frame.pack(fill='x', pady=(0, 5))
-
-threshold_header = tk.Frame(threshold_frame, bg=COLORS['card_bg'])
-threshold_header.pack(fill='x')
-
-threshold_label = tk.Label(
-    threshold_header,
-    text="NDSI Threshold:",
-    font=("Segoe UI", 10, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text']
-)
-threshold_label.pack(side='left')
-
-threshold_value_label = tk.Label(
-    threshold_header,
-    text="0.40",
-    font=("Segoe UI", 10, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['secondary']
-)
-threshold_value_label.pack(side='right')
-
-threshold_slider = tk.Scale(
-    threshold_frame,
-    from_=0.0,
-    to=1.0,
-    resolution=0.05,
-    orient='horizontal',
-    command=on_threshold_change,
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    highlightthickness=0,
-    troughcolor=COLORS['border'],
-    activebackground=COLORS['secondary']
-)
-threshold_slider.set(0.4)
-threshold_slider.pack(fill='x', pady=(5, 0))
-
-# Action buttons section
-action_section = tk.LabelFrame(
-    left_content,
-    text="🚀 Actions",
-    font=("Segoe UI", 12, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    padx=15,
-    pady=10
-)
-action_section.pack(fill='x', pady=(0, 15))
-
-btn_run = tk.Button(
-    action_section,
-    text="▶️ Run Calculation",
-    font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
-    bg=COLORS['button_disabled'],
-    fg="white",
-    activebackground=COLORS['button_hover'],
-    activeforeground="white",
-    pady=12,
-    state='disabled',
-    cursor="hand2",
-    relief='flat',
-    bd=0,
-    highlightthickness=0,
-    command=run_calculation
-)
-btn_run.pack(fill='x', pady=4)
-btn_run.bind("<Enter>", on_enter_run)
-btn_run.bind("<Leave>", on_leave_run)
-
-# ========== RIGHT COLUMN CONTENT ==========
-right_content = tk.Frame(right_column, bg=COLORS['card_bg'])
-right_content.pack(fill='both', expand=True, padx=25, pady=25)
-
-# Image Preview section
-preview_section = tk.LabelFrame(
-    right_content,
-    text="🖼️ Image Preview",
-    font=("Segoe UI", 12, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    padx=15,
-    pady=10
-)
-preview_section.pack(fill='both', expand=True)
-
-# Create canvas for image display
-preview_canvas = tk.Canvas(
-    preview_section,
-    bg='#2c2c2e',
-    highlightthickness=1,
-    highlightbackground=COLORS['border']
-)
-preview_canvas.pack(fill='both', expand=True, padx=5, pady=5)
-
-# Initial message
-preview_label = tk.Label(
-    preview_canvas,
-    text="No image loaded\n\n📂 Select an image to see preview",
-    font=("Segoe UI", 12),
-    bg='#2c2c2e',
-    fg='#86868b',
-    justify='center'
-)
-preview_label.place(relx=0.5, rely=0.5, anchor='center')
-
-# Image info label below preview
-image_info_label = tk.Label(
-    preview_section,
-    text="",
-    font=("Segoe UI", 9),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text_light'],
-    justify='left',
-    anchor='w'
-)
-image_info_label.pack(fill='x', padx=5, pady=(5, 0))
-
-# Status bar (bigger and prominent)
-status_frame = tk.Frame(main_container, bg=COLORS['card_bg'], height=70)
-status_frame.pack(fill='x', pady=(10, 0))
-status_frame.pack_propagate(False)
-
-status = tk.Label(
-    status_frame,
-    text="⚪ Ready - Select input folder to begin",
-    font=("Segoe UI", 12, "bold"),
-    bg=COLORS['card_bg'],
-    fg=COLORS['text'],
-    anchor='w',
-    padx=20,
-    pady=15
-)
-status.pack(fill='both', expand=True)
-
-# Footer
-footer = tk.Label(
-    main_container,
-    text="Powered by Rasterio & Tkinter | © 2026",
-    font=("Segoe UI", 9),
-    bg=COLORS['background'],
-    fg=COLORS['text_light']
-)
-footer.pack(pady=(20, 0))
-
-root.mainloop()
+# Guarded so worker processes (spawn start method / frozen builds) can
+# import this module without opening a second window
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    metadata_cache = sadar_cache.open_cache()
+    thumbnail_cache = sadar_cache.open_thumbnail_cache()
+
+    root = tk.Tk()
+    root.title("Raster Index Calculator - Professional Edition")
+
+    # Get screen dimensions
+    screen_width = root.winfo_screenwidth()
+    screen_height = root.winfo_screenheight()
+
+    # Set window to full screen
+    root.geometry(f"{screen_width}x{screen_height}+0+0")
+    root.state('zoomed')  # Maximized state
+
+    root.config(bg=COLORS['background'])
+
+    # Main container with padding
+    main_container = tk.Frame(root, bg=COLORS['background'])
+    main_container.pack(fill='both', expand=True, padx=30, pady=20)
+
+    # Header section
+    header_frame = tk.Frame(main_container, bg=COLORS['primary'], height=100)
+    header_frame.pack(fill='x', pady=(0, 20))
+    header_frame.pack_propagate(False)
+
+    title = tk.Label(
+        header_frame,
+        text="🛰️ Raster Index Calculator",
+        font=("SF Pro Display", 28, "bold") if os.name == 'darwin' else ("Segoe UI", 28, "bold"),
+        bg=COLORS['primary'],
+        fg="white",
+        pady=15
+    )
+    title.pack()
+
+    subtitle = tk.Label(
+        header_frame,
+        text="Professional GeoTIFF Analysis Tool",
+        font=("SF Pro Display", 12) if os.name == 'darwin' else ("Segoe UI", 12),
+        bg=COLORS['primary'],
+        fg="#a1a1a6"
+    )
+    subtitle.pack()
+
+    # Content area with two columns
+    content_frame = tk.Frame(main_container, bg=COLORS['background'])
+    content_frame.pack(fill='both', expand=True)
+
+    # Configure grid weights for better space distribution
+    content_frame.grid_rowconfigure(0, weight=1)
+    content_frame.grid_columnconfigure(0, weight=1)
+    content_frame.grid_columnconfigure(1, weight=1)
+
+    # Left column - Controls (with scrollbar)
+    left_column_container = tk.Frame(content_frame, bg=COLORS['card_bg'], relief='flat', bd=0)
+    left_column_container.grid(row=0, column=0, sticky='nsew', padx=(0, 10))
+    left_column_container.config(highlightbackground=COLORS['border'], highlightthickness=1)
+
+    # Create canvas and scrollbar for left column
+    left_canvas = tk.Canvas(left_column_container, bg=COLORS['card_bg'], highlightthickness=0)
+    left_scrollbar = tk.Scrollbar(left_column_container, orient="vertical", command=left_canvas.yview)
+
+    left_column = tk.Frame(left_canvas, bg=COLORS['card_bg'])
+
+    left_scrollbar.pack(side="right", fill="y")
+    left_canvas.pack(side="left", fill="both", expand=True)
+    left_canvas.create_window((0, 0), window=left_column, anchor="nw", width=left_canvas.winfo_reqwidth())
+
+    left_canvas.configure(yscrollcommand=left_scrollbar.set)
+
+    def on_left_frame_configure(event):
+        left_canvas.configure(scrollregion=left_canvas.bbox("all"))
+
+    def on_left_canvas_configure(event):
+        # Update the width of the frame to fill the canvas
+        canvas_width = event.width
+        left_canvas.itemconfig(left_canvas.find_withtag("all")[0], width=canvas_width)
+
+    left_column.bind("<Configure>", on_left_frame_configure)
+    left_canvas.bind("<Configure>", on_left_canvas_configure)
+
+    # Mouse wheel scrolling for left column
+    def on_left_mousewheel(event):
+        left_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+
+    left_canvas.bind_all("<MouseWheel>", on_left_mousewheel)
+
+    # Right column - Information
+    right_column = tk.Frame(content_frame, bg=COLORS['card_bg'], relief='flat', bd=0)
+    right_column.grid(row=0, column=1, sticky='nsew', padx=(10, 0))
+    right_column.config(highlightbackground=COLORS['border'], highlightthickness=1)
+
+    # ========== LEFT COLUMN CONTENT ==========
+    left_content = tk.Frame(left_column, bg=COLORS['card_bg'])
+    left_content.pack(fill='both', expand=True, padx=20, pady=20)
+
+    # Unified upload section
+    upload_section = tk.LabelFrame(
+        left_content,
+        text="📁 Folders",
+        font=("Segoe UI", 12, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        padx=15,
+        pady=10
+    )
+    upload_section.pack(fill='both', expand=True, pady=(0, 15))
+
+    # Info label
+    upload_info = tk.Label(
+        upload_section,
+        text="Select input and output folders",
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w'
+    )
+    upload_info.pack(pady=(5, 10), fill='x')
+
+    # Input folder section
+    input_folder_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    input_folder_frame.pack(fill='x', pady=(0, 10))
+
+    input_folder_label = tk.Label(
+        input_folder_frame,
+        text="Input Folder:",
+        font=("Segoe UI", 9, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        anchor='w'
+    )
+    input_folder_label.pack(fill='x')
+
+    folder_label = tk.Label(
+        input_folder_frame,
+        text="No folder selected",
+        font=("Segoe UI", 10),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w'
+    )
+    folder_label.pack(pady=(2, 0), fill='x')
+
+    folder_info_label = tk.Label(
+        input_folder_frame,
+        text="",
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w'
+    )
+    folder_info_label.pack(pady=(0, 5), fill='x')
+
+    # Upload buttons frame
+    upload_buttons_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    upload_buttons_frame.pack(fill='x', pady=4)
+
+    btn_input_folder = tk.Button(
+        upload_buttons_frame,
+        text="📂 Select Input Folder",
+        font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
+        bg=COLORS['button_bg'],
+        fg="white",
+        activebackground=COLORS['button_hover'],
+        activeforeground="white",
+        pady=12,
+        cursor="hand2",
+        relief='flat',
+        bd=0,
+        highlightthickness=0,
+        command=upload_folder
+    )
+    btn_input_folder.pack(side='left', fill='x', expand=True, padx=(0, 5))
+
+    btn_output_folder = tk.Button(
+        upload_buttons_frame,
+        text="💾 Select Output Folder",
+        font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
+        bg=COLORS['button_bg'],
+        fg="white",
+        activebackground=COLORS['button_hover'],
+        activeforeground="white",
+        pady=12,
+        cursor="hand2",
+        relief='flat',
+        bd=0,
+        highlightthickness=0,
+        command=select_output_folder
+    )
+    btn_output_folder.pack(side='right', fill='x', expand=True, padx=(5, 0))
+
+    # Which files a folder scan picks up (glob patterns, ';' separated)
+    scan_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    scan_frame.pack(fill='x', pady=(10, 0))
+    scan_frame.columnconfigure(1, weight=1)
+
+    include_var = tk.StringVar(value='; '.join(sadar_settings.SCAN_INCLUDE))
+    exclude_var = tk.StringVar(value='; '.join(sadar_settings.SCAN_EXCLUDE))
+    for row, (text, var) in enumerate((("Include:", include_var), ("Exclude:", exclude_var))):
+        tk.Label(
+            scan_frame,
+            text=text,
+            font=("Segoe UI", 9, "bold"),
+            bg=COLORS['card_bg'],
+            fg=COLORS['text'],
+            anchor='w'
+        ).grid(row=row, column=0, sticky='w', pady=2)
+        tk.Entry(
+            scan_frame,
+            textvariable=var,
+            font=("Segoe UI", 9),
+            relief='solid',
+            bd=1
+        ).grid(row=row, column=1, sticky='ew', padx=(8, 0), pady=2)
+
+    recursive_var = tk.BooleanVar(value=True)
+    tk.Checkbutton(
+        scan_frame,
+        text="Include subfolders",
+        variable=recursive_var,
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        activebackground=COLORS['card_bg'],
+        anchor='w'
+    ).grid(row=2, column=0, columnspan=2, sticky='w')
+
+    # Output folder display
+    output_folder_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    output_folder_frame.pack(fill='x', pady=(10, 0))
+
+    output_folder_label = tk.Label(
+        output_folder_frame,
+        text="Output Folder:",
+        font=("Segoe UI", 9, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        anchor='w'
+    )
+    output_folder_label.pack(fill='x')
+
+    output_folder_display = tk.Label(
+        output_folder_frame,
+        text="Not selected",
+        font=("Segoe UI", 10),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w'
+    )
+    output_folder_display.pack(pady=(2, 0), fill='x')
+
+    # Image listbox with scrollbar (hidden initially)
+    listbox_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    listbox_frame.pack(fill='both', expand=True, pady=(10, 0))
+
+    listbox_header = tk.Frame(listbox_frame, bg=COLORS['card_bg'])
+    listbox_header.pack(fill='x', pady=(0, 5))
+
+    listbox_label = tk.Label(
+        listbox_header,
+        text="Select an image:",
+        font=("Segoe UI", 9, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        anchor='w'
+    )
+    listbox_label.pack(side='left')
+
+    # Switches between the thumbnail grid and the file name list
+    view_toggle = tk.Button(
+        listbox_header,
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['secondary'],
+        activebackground=COLORS['card_bg'],
+        activeforeground=COLORS['accent'],
+        relief='flat',
+        bd=0,
+        cursor="hand2"
+    )
+    view_toggle.pack(side='right')
+
+    listbox_scroll_container = tk.Frame(listbox_frame, bg=COLORS['card_bg'])
+    listbox_scroll_container.pack(fill='both', expand=True)
+
+    listbox_scrollbar = tk.Scrollbar(listbox_scroll_container)
+    listbox_scrollbar.pack(side='right', fill='y')
+
+    image_listbox = tk.Listbox(
+        listbox_scroll_container,
+        font=("Segoe UI", 9),
+        bg='white',
+        fg=COLORS['text'],
+        selectmode='single',
+        height=6,
+        yscrollcommand=listbox_scrollbar.set,
+        relief='solid',
+        bd=1
+    )
+    image_listbox.pack(side='left', fill='both', expand=True)
+    listbox_scrollbar.config(command=image_listbox.yview)
+    image_listbox.bind('<<ListboxSelect>>', load_selected_image)
+
+    # Quicklooks of the whole folder; only the visible rows are drawn
+    thumbnail_grid = sadar_thumbgrid.ThumbnailGrid(
+        listbox_frame,
+        on_select=on_thumbnail_select,
+        bg='white',
+        fg=COLORS['text'],
+        muted=COLORS['text_light'],
+        highlight=COLORS['secondary']
+    )
+
+    # Band statistics of the next images are read ahead only on request
+    # (several seconds of I/O per big scene)
+    prefetch_stats_var = tk.BooleanVar(value=False)
+    prefetch_stats_check = tk.Checkbutton(
+        listbox_frame,
+        text="Prefetch band statistics of the next images",
+        variable=prefetch_stats_var,
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        activebackground=COLORS['card_bg'],
+        anchor='w'
+    )
+    prefetch_stats_check.pack(fill='x', pady=(5, 0))
+    set_folder_view('grid')
+
+    # Hide listbox initially
+    listbox_frame.pack_forget()
+
+    # File info section (shows current selected file)
+    file_info_frame = tk.Frame(upload_section, bg=COLORS['card_bg'])
+    file_info_frame.pack(fill='x', pady=(10, 0))
+
+    file_name_label = tk.Label(
+        file_info_frame,
+        text="",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        anchor='w'
+    )
+    file_name_label.pack(fill='x')
+
+    file_info_label = tk.Label(
+        file_info_frame,
+        text="",
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w'
+    )
+    file_info_label.pack(fill='x')
+
+    # Band statistics of the selected image, computed only when clicked
+    band_stats_label = tk.Label(
+        file_info_frame,
+        text="",
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='w',
+        justify='left'
+    )
+    band_stats_label.pack(fill='x')
+    band_stats_label.bind("<Button-1>", request_band_stats)
+
+    # Calculation settings section
+    calc_section = tk.LabelFrame(
+        left_content,
+        text="⚙️ Calculation Settings",
+        font=("Segoe UI", 12, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        padx=15,
+        pady=10
+    )
+    calc_section.pack(fill='x', pady=(0, 15))
+
+    # Calculation type
+    calc_type_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    calc_type_frame.pack(fill='x', pady=(5, 10))
+
+    calc_label = tk.Label(
+        calc_type_frame,
+        text="Index Type:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    calc_label.pack(anchor='w', pady=(0, 3))
+
+    calculation_var = tk.StringVar(value="NDSI")
+    calc_dropdown = ttk.Combobox(
+        calc_type_frame,
+        textvariable=calculation_var,
+        values=["NDSI", "NDWI", "NDVI", "All Indices"],
+        state='readonly',
+        font=("Segoe UI", 10)
+    )
+    calc_dropdown.pack(fill='x')
+
+    # Add event handler for dropdown change
+    def on_calculation_change(event):
+        calc_type = calculation_var.get()
+        if calc_type != "All Indices":
+            threshold_slider.config(state='normal')
+        if calc_type == "NDSI":
+            threshold_label.config(text="NDSI Threshold:")
+            threshold_slider.config(from_=0.0, to=1.0)
+            threshold_slider.set(0.4)
+        elif calc_type == "NDWI":
+            threshold_label.config(text="NDWI Threshold:")
+            threshold_slider.config(from_=-1.0, to=1.0)
+            threshold_slider.set(0.3)
+        elif calc_type == "NDVI":
+            threshold_label.config(text="NDVI Threshold:")
+            threshold_slider.config(from_=-1.0, to=1.0)
+            threshold_slider.set(0.2)
+        elif calc_type == "All Indices":
+            show_threshold_method()
+            threshold_slider.config(state='disabled')
+
+    def show_threshold_method(*_):
+        """Name the method "All Indices" will use in the threshold label"""
+        if calculation_var.get() == "All Indices":
+            method = threshold_method_var.get()
+            threshold_label.config(
+                text=f"Thresholds ({THRESHOLD_METHOD_NAMES.get(method, method)}):"
+            )
+
+    calc_dropdown.bind('<<ComboboxSelected>>', on_calculation_change)
+
+    # Threshold slider
+    threshold_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    threshold_frame.pack(fill='x', pady=(0, 5))
+
+    threshold_header = tk.Frame(threshold_frame, bg=COLORS['card_bg'])
+    threshold_header.pack(fill='x')
+
+    threshold_label = tk.Label(
+        threshold_header,
+        text="NDSI Threshold:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    threshold_label.pack(side='left')
+
+    threshold_value_label = tk.Label(
+        threshold_header,
+        text="0.40",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['secondary']
+    )
+    threshold_value_label.pack(side='right')
+
+    threshold_slider = tk.Scale(
+        threshold_frame,
+        from_=0.0,
+        to=1.0,
+        resolution=0.05,
+        orient='horizontal',
+        command=on_threshold_change,
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        highlightthickness=0,
+        troughcolor=COLORS['border'],
+        activebackground=COLORS['secondary']
+    )
+    threshold_slider.set(0.4)
+    threshold_slider.pack(fill='x', pady=(5, 0))
+
+    # How "All Indices" picks thresholds: fixed defaults or per scene
+    # from the index histograms (Otsu / valley between the two modes)
+    method_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    method_frame.pack(fill='x', pady=(5, 5))
+
+    method_label = tk.Label(
+        method_frame,
+        text="Threshold Method:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    method_label.pack(side='left')
+
+    threshold_method_var = tk.StringVar(value=sadar_settings.DEFAULT_THRESHOLD_METHOD)
+    method_dropdown = ttk.Combobox(
+        method_frame,
+        textvariable=threshold_method_var,
+        values=list(sadar_settings.THRESHOLD_METHODS),
+        state='readonly',
+        width=8,
+        font=("Segoe UI", 10)
+    )
+    method_dropdown.pack(side='right')
+    threshold_method_var.trace_add('write', show_threshold_method)
+
+    # Memory budget for the streaming engine
+    budget_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    budget_frame.pack(fill='x', pady=(10, 5))
+
+    budget_label = tk.Label(
+        budget_frame,
+        text="Window Memory (MB):",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    budget_label.pack(side='left')
+
+    window_budget_var = tk.IntVar(value=sadar_settings.DEFAULT_WINDOW_BUDGET_MB)
+    budget_spinbox = tk.Spinbox(
+        budget_frame,
+        from_=16,
+        to=4096,
+        increment=16,
+        width=6,
+        textvariable=window_budget_var,
+        font=("Segoe UI", 10),
+        relief='solid',
+        bd=1
+    )
+    budget_spinbox.pack(side='right')
+
+    # Worker processes for tiled parallel execution (1 = run in this process)
+    workers_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    workers_frame.pack(fill='x', pady=(5, 5))
+
+    workers_label = tk.Label(
+        workers_frame,
+        text="Worker Processes:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    workers_label.pack(side='left')
+
+    worker_count_var = tk.IntVar(value=1)
+    workers_spinbox = tk.Spinbox(
+        workers_frame,
+        from_=1,
+        to=sadar_settings.default_workers(),
+        increment=1,
+        width=6,
+        textvariable=worker_count_var,
+        font=("Segoe UI", 10),
+        relief='solid',
+        bd=1
+    )
+    workers_spinbox.pack(side='right')
+    worker_count_var.trace_add('write', schedule_pool_warm_up)
+
+    # Compute precision (float32 halves memory; float64 matches older releases)
+    precision_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    precision_frame.pack(fill='x', pady=(5, 5))
+
+    precision_label = tk.Label(
+        precision_frame,
+        text="Precision:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    precision_label.pack(side='left')
+
+    precision_var = tk.StringVar(value=sadar_settings.DEFAULT_PRECISION)
+    precision_dropdown = ttk.Combobox(
+        precision_frame,
+        textvariable=precision_var,
+        values=list(sadar_settings.PRECISIONS),
+        state='readonly',
+        width=8,
+        font=("Segoe UI", 10)
+    )
+    precision_dropdown.pack(side='right')
+
+    # Where scenes too big for the free RAM are memory-mapped
+    scratch_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    scratch_frame.pack(fill='x', pady=(5, 5))
+
+    scratch_label = tk.Label(
+        scratch_frame,
+        text="Scratch Folder:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    scratch_label.pack(side='left')
+
+    scratch_button = tk.Button(
+        scratch_frame,
+        text="Change",
+        command=select_scratch_folder,
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['secondary'],
+        activebackground=COLORS['card_bg'],
+        activeforeground=COLORS['accent'],
+        relief='flat',
+        bd=0,
+        cursor="hand2"
+    )
+    scratch_button.pack(side='right')
+
+    scratch_folder_display = tk.Label(
+        scratch_frame,
+        text=scratch_default_text(),
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        anchor='e'
+    )
+    scratch_folder_display.pack(side='right', padx=(0, 5))
+
+    # Output layout of the index GeoTIFFs (COG = tiled, compressed, overviews)
+    format_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    format_frame.pack(fill='x', pady=(5, 5))
+
+    format_label = tk.Label(
+        format_frame,
+        text="Output Format:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    format_label.pack(side='left')
+
+    compression_var = tk.StringVar(value=sadar_settings.DEFAULT_COMPRESSION)
+    compression_dropdown = ttk.Combobox(
+        format_frame,
+        textvariable=compression_var,
+        values=list(sadar_settings.COMPRESSIONS),
+        state='readonly',
+        width=8,
+        font=("Segoe UI", 10)
+    )
+    compression_dropdown.pack(side='right')
+
+    output_format_var = tk.StringVar(value=sadar_settings.DEFAULT_OUTPUT_FORMAT)
+    format_dropdown = ttk.Combobox(
+        format_frame,
+        textvariable=output_format_var,
+        values=list(sadar_settings.OUTPUT_FORMATS),
+        state='readonly',
+        width=6,
+        font=("Segoe UI", 10)
+    )
+    format_dropdown.pack(side='right', padx=(0, 5))
+
+    # Sample type of the index GeoTIFFs (int16 = scaled by 1/10000, half the size)
+    dtype_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    dtype_frame.pack(fill='x', pady=(5, 5))
+
+    dtype_label = tk.Label(
+        dtype_frame,
+        text="Output Type:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    dtype_label.pack(side='left')
+
+    output_dtype_var = tk.StringVar(value=sadar_settings.DEFAULT_OUTPUT_DTYPE)
+    dtype_dropdown = ttk.Combobox(
+        dtype_frame,
+        textvariable=output_dtype_var,
+        values=list(sadar_settings.OUTPUT_DTYPES),
+        state='readonly',
+        width=8,
+        font=("Segoe UI", 10)
+    )
+    dtype_dropdown.pack(side='right')
+
+    # Per-index files: own TIFFs, or VRTs over the composite (written once)
+    index_files_frame = tk.Frame(calc_section, bg=COLORS['card_bg'])
+    index_files_frame.pack(fill='x', pady=(5, 5))
+
+    index_files_label = tk.Label(
+        index_files_frame,
+        text="Index Files:",
+        font=("Segoe UI", 10, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text']
+    )
+    index_files_label.pack(side='left')
+
+    index_files_var = tk.StringVar(value=sadar_settings.DEFAULT_INDEX_FILE_TYPE)
+    index_files_dropdown = ttk.Combobox(
+        index_files_frame,
+        textvariable=index_files_var,
+        values=list(sadar_settings.INDEX_FILE_TYPES),
+        state='readonly',
+        width=8,
+        font=("Segoe UI", 10)
+    )
+    index_files_dropdown.pack(side='right')
+
+    # Action buttons section
+    action_section = tk.LabelFrame(
+        left_content,
+        text="🚀 Actions",
+        font=("Segoe UI", 12, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        padx=15,
+        pady=10
+    )
+    action_section.pack(fill='x', pady=(0, 15))
+
+    btn_run = tk.Button(
+        action_section,
+        text="▶️ Run Calculation",
+        font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
+        bg=COLORS['button_disabled'],
+        fg="white",
+        activebackground=COLORS['button_hover'],
+        activeforeground="white",
+        pady=12,
+        state='disabled',
+        cursor="hand2",
+        relief='flat',
+        bd=0,
+        highlightthickness=0,
+        command=run_calculation
+    )
+    btn_run.pack(fill='x', pady=4)
+    btn_run.bind("<Enter>", on_enter_run)
+    btn_run.bind("<Leave>", on_leave_run)
+
+    btn_cancel = tk.Button(
+        action_section,
+        text="⏹ Cancel",
+        font=("SF Pro Display", 11, "bold") if os.name == 'darwin' else ("Segoe UI", 11, "bold"),
+        bg=COLORS['button_disabled'],
+        fg="white",
+        activebackground=COLORS['button_hover'],
+        activeforeground="white",
+        pady=12,
+        state='disabled',
+        cursor="hand2",
+        relief='flat',
+        bd=0,
+        highlightthickness=0,
+        command=cancel_job
+    )
+    btn_cancel.pack(fill='x', pady=4)
+
+    # ========== RIGHT COLUMN CONTENT ==========
+    right_content = tk.Frame(right_column, bg=COLORS['card_bg'])
+    right_content.pack(fill='both', expand=True, padx=25, pady=25)
+
+    # Image Preview section
+    preview_section = tk.LabelFrame(
+        right_content,
+        text="🖼️ Image Preview",
+        font=("Segoe UI", 12, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        padx=15,
+        pady=10
+    )
+    preview_section.pack(fill='both', expand=True)
+
+    # Create canvas for image display
+    preview_canvas = tk.Canvas(
+        preview_section,
+        bg='#2c2c2e',
+        highlightthickness=1,
+        highlightbackground=COLORS['border']
+    )
+    preview_canvas.pack(fill='both', expand=True, padx=5, pady=5)
+
+    # Initial message
+    preview_label = tk.Label(
+        preview_canvas,
+        text="No image loaded\n\n📂 Select an image to see preview",
+        font=("Segoe UI", 12),
+        bg='#2c2c2e',
+        fg='#86868b',
+        justify='center'
+    )
+    preview_label.place(relx=0.5, rely=0.5, anchor='center')
+
+    # Image info label below preview
+    image_info_label = tk.Label(
+        preview_section,
+        text="",
+        font=("Segoe UI", 9),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text_light'],
+        justify='left',
+        anchor='w'
+    )
+    image_info_label.pack(fill='x', padx=5, pady=(5, 0))
+
+    # Status bar (bigger and prominent)
+    status_frame = tk.Frame(main_container, bg=COLORS['card_bg'], height=70)
+    status_frame.pack(fill='x', pady=(10, 0))
+    status_frame.pack_propagate(False)
+
+    status = tk.Label(
+        status_frame,
+        text="⚪ Ready - Select input folder to begin",
+        font=("Segoe UI", 12, "bold"),
+        bg=COLORS['card_bg'],
+        fg=COLORS['text'],
+        anchor='w',
+        padx=20,
+        pady=15
+    )
+    # Progress of the running background job
+    progress_bar = ttk.Progressbar(
+        status_frame,
+        orient='horizontal',
+        mode='determinate',
+        maximum=100,
+        length=240
+    )
+    progress_bar.pack(side='right', padx=20)
+
+    status.pack(side='left', fill='both', expand=True)
+
+    # Footer
+    footer = tk.Label(
+        main_container,
+        text="Powered by Rasterio & Tkinter | © 2026",
+        font=("Segoe UI", 9),
+        bg=COLORS['background'],
+        fg=COLORS['text_light']
+    )
+    footer.pack(pady=(20, 0))
+
+    # Cache counters (also F12)
+    diagnostics_link = tk.Label(
+        main_container,
+        text="Cache diagnostics",
+        font=("Segoe UI", 9, "underline"),
+        bg=COLORS['background'],
+        fg=COLORS['text_light'],
+        cursor="hand2"
+    )
+    diagnostics_link.pack()
+    diagnostics_link.bind("<Button-1>", show_diagnostics)
+    root.bind("<F12>", show_diagnostics)
+
+    # Deliver background job events on the Tk thread
+    root.after(JOB_POLL_MS, poll_jobs)
+
+    # Measure startup and load the heavy modules once the window is drawn
+    root.after_idle(on_first_paint)
+
+    root.mainloop()
 
 
 # In[ ]:
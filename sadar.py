@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# ==========================================
+# SADAR COMMAND LINE
+# HEADLESS BATCH PROCESSING (NO DISPLAY NEEDED)
+# ==========================================
+#
+# Usage:
+#   python sadar.py batch --input DIR --output DIR \
+#       [--indices NDSI,NDWI,NDVI] [--threshold 0.4 | NDSI=0.4,NDWI=0.3]
+#       [--format GTiff|COG] [--compress DEFLATE|ZSTD|LERC] [--dtype float32|int16]
+#       [--index-files tiff|vrt] [--threshold-method fixed|otsu|valley] [--force]
+#
+# Finished images are recorded in sadar_manifest.sqlite in the output
+# folder; re-running skips images whose input, settings and outputs are
+# unchanged (--force redoes everything).
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sadar_engine
+from sadar_cache import file_key
+from sadar_manifest import RunManifest
+
+PROGRESS_WIDTH = 80
+
+
+# ---------------- ARGUMENT PARSING ----------------
+def parse_indices(text):
+    """'NDSI,NDWI' -> ('NDSI', 'NDWI')"""
+    indices = tuple(part.strip().upper() for part in text.split(',') if part.strip())
+    unknown = [idx for idx in indices if idx not in sadar_engine.INDEX_BANDS]
+    if not indices or unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown index {', '.join(unknown) or text!r}; "
+            f"choose from {', '.join(sadar_engine.ALL_INDICES)}"
+        )
+    return indices
+
+
+def parse_thresholds(text):
+    """'0.4' applies to every index; 'NDSI=0.4,NDVI=0.2' overrides per index"""
+    thresholds = dict(sadar_engine.DEFAULT_THRESHOLDS)
+    try:
+        if '=' not in text:
+            return {idx: float(text) for idx in thresholds}
+        for part in text.split(','):
+            idx, value = part.split('=')
+            idx = idx.strip().upper()
+            if idx not in thresholds:
+                raise ValueError(idx)
+            thresholds[idx] = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid threshold {text!r}")
+    return thresholds
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='sadar',
+        description="Raster Index Calculator - headless processing"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help="process every GeoTIFF in a folder")
+    batch.add_argument('--input', required=True, help="folder containing GeoTIFF images")
+    batch.add_argument('--output', required=True, help="folder for the processed outputs")
+    batch.add_argument('--indices', type=parse_indices, default=sadar_engine.ALL_INDICES,
+                       help="comma-separated indices (default: NDSI,NDWI,NDVI)")
+    batch.add_argument('--threshold', type=parse_thresholds,
+                       default=dict(sadar_engine.DEFAULT_THRESHOLDS),
+                       help="one value for all indices, or NDSI=0.4,NDWI=0.3,NDVI=0.2")
+    batch.add_argument('--jobs', type=int, default=sadar_engine.default_workers(),
+                       help="images processed in parallel (default: CPU count)")
+    batch.add_argument('--budget-mb', type=int, default=sadar_engine.DEFAULT_WINDOW_BUDGET_MB,
+                       help="window memory budget per image in MB")
+    batch.add_argument('--precision', choices=sadar_engine.PRECISIONS,
+                       default=sadar_engine.DEFAULT_PRECISION,
+                       help="compute precision (default: float32)")
+    batch.add_argument('--format', dest='output_format', choices=sadar_engine.OUTPUT_FORMATS,
+                       default=sadar_engine.DEFAULT_OUTPUT_FORMAT,
+                       help="GTiff (like the input) or COG (Cloud-Optimized GeoTIFF)")
+    batch.add_argument('--compress', dest='compression', choices=sadar_engine.COMPRESSIONS,
+                       default=sadar_engine.DEFAULT_COMPRESSION,
+                       help="COG compression (default: DEFLATE)")
+    batch.add_argument('--dtype', dest='output_dtype', choices=sadar_engine.OUTPUT_DTYPES,
+                       default=sadar_engine.DEFAULT_OUTPUT_DTYPE,
+                       help="float32, or int16 scaled by 1/10000 (half the size)")
+    batch.add_argument('--index-files', choices=sadar_engine.INDEX_FILE_TYPES,
+                       default=sadar_engine.DEFAULT_INDEX_FILE_TYPE,
+                       help="per-index TIFFs, or VRTs over the composite bands")
+    batch.add_argument('--threshold-method', choices=sadar_engine.THRESHOLD_METHODS,
+                       default=sadar_engine.DEFAULT_THRESHOLD_METHOD,
+                       help="fixed (--threshold) or per image from its histogram (otsu, valley)")
+    batch.add_argument('--force', action='store_true',
+                       help="reprocess images that are already up to date")
+    return parser
+
+
+# ---------------- BATCH ----------------
+def process_image(image_path, output_folder, indices, thresholds, budget_mb, precision,
+                  output_format, compression, output_dtype, index_files, threshold_method):
+    """Process one image; runs inside a batch worker process"""
+    run = sadar_engine.compute_indices_streaming(
+        image_path,
+        output_folder,
+        indices=indices,
+        budget_mb=budget_mb,
+        thresholds=thresholds,
+        precision=precision,
+        output_format=output_format,
+        compression=compression,
+        output_dtype=output_dtype,
+        index_files=index_files,
+        threshold_method=threshold_method
+    )
+    files = list(run['outputs'].values()) + [run['composite']]
+    return run['stats'], files
+
+
+def run_settings(args):
+    """Everything besides the input image that decides the batch outputs"""
+    return {
+        'version': sadar_engine.OUTPUT_VERSION,
+        'indices': list(args.indices),
+        'thresholds': {idx: args.threshold[idx] for idx in args.indices},
+        'bands': {idx: sadar_engine.INDEX_BANDS[idx] for idx in args.indices},
+        'precision': args.precision,
+        'output_format': args.output_format,
+        'compression': args.compression,
+        'output_dtype': args.output_dtype,
+        'index_files': args.index_files,
+        'threshold_method': args.threshold_method,
+    }
+
+
+def format_stats(stats):
+    return " | ".join(
+        f"{idx} mean {s['mean']:.3f}, {s['positive_percentage']:.1f}% >= {s['threshold']:.3f}"
+        for idx, s in stats.items()
+    )
+
+
+def print_progress(done, total, name, started):
+    """Redraw the single progress line on stderr"""
+    elapsed = time.time() - started
+    sys.stderr.write(
+        f"\r[{done}/{total}] {done * 100 // total:3d}%  {elapsed:6.1f}s  {name[:50]:<50}"
+    )
+    sys.stderr.flush()
+
+
+def clear_progress():
+    sys.stderr.write("\r" + " " * PROGRESS_WIDTH + "\r")
+
+
+def run_batch(args):
+    if not os.path.isdir(args.input):
+        print(f"Input folder not found: {args.input}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+
+    image_files = sadar_engine.find_geotiffs(args.input)
+    if not image_files:
+        print(f"No GeoTIFF files found in {args.input}", file=sys.stderr)
+        return 1
+
+    settings = run_settings(args)
+    manifest = RunManifest(args.output)
+    try:
+        return process_pending(args, image_files, settings, manifest)
+    finally:
+        manifest.close()
+
+
+def process_pending(args, image_files, settings, manifest):
+    """Process every image the manifest does not show as up to date"""
+    if args.force:
+        pending = image_files
+    else:
+        pending = [path for path in image_files if manifest.lookup(path, settings) is None]
+    skipped = len(image_files) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} up-to-date image(s) (use --force to redo them)")
+    if not pending:
+        print(f"Nothing to do: all {skipped} images are up to date in {args.output}")
+        return 0
+
+    total = len(pending)
+    interactive = sys.stderr.isatty()
+    failures = []
+    started = time.time()
+    print(f"Processing {total} images with {args.jobs} worker(s): {', '.join(args.indices)}")
+
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {}
+        for path in pending:
+            # Identify the input version before it is read
+            key = file_key(path)
+            future = pool.submit(process_image, path, args.output, args.indices,
+                                 args.threshold, args.budget_mb, args.precision,
+                                 args.output_format, args.compression, args.output_dtype,
+                                 args.index_files, args.threshold_method)
+            futures[future] = (path, key)
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            path, key = futures[future]
+            name = os.path.basename(path)
+            try:
+                stats, files = future.result()
+                manifest.record(key, settings, files, stats)
+                line = f"✓ {name}: {format_stats(stats)}"
+            except Exception as e:
+                manifest.forget(path)
+                failures.append(name)
+                line = f"❌ {name}: {e}"
+
+            if interactive:
+                clear_progress()
+                print(line, flush=True)
+                print_progress(done, total, name, started)
+            else:
+                print(f"[{done}/{total}] {line}", flush=True)
+
+    if interactive:
+        sys.stderr.write("\n")
+    print(f"Done: {total - len(failures)}/{total} images in {time.time() - started:.1f}s "
+          f"-> {args.output}" + (f" ({skipped} up to date)" if skipped else ""))
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'batch':
+        return run_batch(args)
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# ==========================================
+# SADAR METADATA CACHE
+# PER-IMAGE HEADER, STATISTICS AND THUMBNAILS, PERSISTED IN SQLITE
+# ==========================================
+#
+# Entries are keyed on the image path and are only returned while the
+# file's mtime and size still match, so edited or replaced images are
+# recomputed automatically. Each database is trimmed to a size limit by
+# dropping the least recently used entries.
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# ---------------- SETTINGS ----------------
+CACHE_FILE = 'metadata.sqlite'
+DEFAULT_CACHE_MAX_MB = 32
+THUMBNAIL_FILE = 'thumbnails.sqlite'
+DEFAULT_THUMBNAIL_MAX_MB = 128     # ~25,000 thumbnails at ~5 KB
+SQL_BATCH = 500                    # Paths per query (SQLite variable limit)
+
+
+def cache_dir():
+    """Per-user cache folder (LOCALAPPDATA on Windows, XDG cache elsewhere)"""
+    if sys.platform.startswith('win'):
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'sadar')
+
+
+def file_key(path):
+    """(absolute path, mtime_ns, size) identifying one version of a file"""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+def _json_default(value):
+    """numpy scalars -> Python numbers"""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# ---------------- CACHE ----------------
+class MetadataCache:
+    """Small JSON documents per image, valid while the file is unchanged.
+
+    Safe to share between the UI thread and background jobs.
+    """
+
+    def __init__(self, db_path=None, max_mb=DEFAULT_CACHE_MAX_MB):
+        if db_path is None:
+            os.makedirs(cache_dir(), exist_ok=True)
+            db_path = os.path.join(cache_dir(), CACHE_FILE)
+        self.db_path = db_path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS images ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self._db.commit()
+        # Running size of the stored data, so puts don't re-sum the table
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM images"
+        ).fetchone()[0]
+
+    def get(self, path):
+        """Cached dict for path, or None if missing or the file has changed"""
+        try:
+            key = file_key(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            return self._get(*key)
+
+    def _get(self, key, mtime_ns, size):
+        """get() for an already stat'ed file; the caller holds the lock"""
+        row = self._db.execute(
+            "SELECT mtime_ns, size, data FROM images WHERE path = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if (row[0], row[1]) != (mtime_ns, size):
+            self._db.execute("DELETE FROM images WHERE path = ?", (key,))
+            self._db.commit()
+            self._bytes -= len(row[2])
+            return None
+        self._db.execute(
+            "UPDATE images SET accessed = ? WHERE path = ?", (time.time(), key)
+        )
+        self._db.commit()
+        return json.loads(row[2])
+
+    def update(self, path, **fields):
+        """Merge fields into the entry for path (starting fresh if stale).
+
+        Read, merge and write happen under one lock, so concurrent updates
+        of the same image (prefetcher, calculation job) keep each other's
+        fields.
+        """
+        key, mtime_ns, size = file_key(path)
+
+        with self._lock:
+            data = self._get(key, mtime_ns, size) or {}
+            data.update(fields)
+            text = json.dumps(data, default=_json_default)
+            old = self._db.execute(
+                "SELECT LENGTH(data) FROM images WHERE path = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO images (path, mtime_ns, size, accessed, data)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, mtime_ns, size, time.time(), text)
+            )
+            self._bytes += len(text) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+        return data
+
+    def _evict(self):
+        """Drop least recently used entries until the data fits max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT path, LENGTH(data) FROM images ORDER BY accessed"
+        ).fetchall()
+        for path, length in rows:
+            if self._bytes <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM images WHERE path = ?", (path,))
+            self._bytes -= length
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM images")
+            self._db.commit()
+            self._bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_cache(db_path=None, max_mb=DEFAULT_CACHE_MAX_MB):
+    """MetadataCache on disk, or in memory if the cache folder is unusable"""
+    try:
+        return MetadataCache(db_path, max_mb)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Metadata cache unavailable ({e}); using a session-only cache")
+        return MetadataCache(':memory:', max_mb)
+
+
+# ---------------- THUMBNAILS ----------------
+class ThumbnailCache:
+    """Encoded thumbnail images per image file and thumbnail size.
+
+    Kept apart from the metadata so a whole folder's thumbnails can be
+    fetched in one pass without touching the JSON entries. Safe to share
+    between threads.
+    """
+
+    def __init__(self, db_path=None, max_mb=DEFAULT_THUMBNAIL_MAX_MB):
+        if db_path is None:
+            os.makedirs(cache_dir(), exist_ok=True)
+            db_path = os.path.join(cache_dir(), THUMBNAIL_FILE)
+        self.db_path = db_path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS thumbnails ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " thumb_size INTEGER NOT NULL,"
+            " accessed REAL NOT NULL,"
+            " image BLOB NOT NULL)"
+        )
+        self._db.commit()
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(image)), 0) FROM thumbnails"
+        ).fetchone()[0]
+
+    def get_many(self, paths, thumb_size):
+        """{path: image bytes} for the paths with an up-to-date thumbnail"""
+        keys = {}
+        for path in paths:
+            try:
+                keys[path] = file_key(path)
+            except OSError:
+                pass
+        by_key = {key[0]: (path, key) for path, key in keys.items()}
+
+        found = {}
+        with self._lock:
+            names = list(by_key)
+            for start in range(0, len(names), SQL_BATCH):
+                batch = names[start:start + SQL_BATCH]
+                rows = self._db.execute(
+                    "SELECT path, mtime_ns, size, thumb_size, image FROM thumbnails"
+                    f" WHERE path IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for name, mtime_ns, size, stored_size, image in rows:
+                    path, key = by_key[name]
+                    if (mtime_ns, size, stored_size) == (key[1], key[2], thumb_size):
+                        found[path] = image
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE thumbnails SET accessed = ? WHERE path = ?",
+                    [(now, keys[path][0]) for path in found]
+                )
+                self._db.commit()
+        return found
+
+    def put(self, path, thumb_size, image):
+        key, mtime_ns, size = file_key(path)
+        with self._lock:
+            old = self._db.execute(
+                "SELECT LENGTH(image) FROM thumbnails WHERE path = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO thumbnails (path, mtime_ns, size, thumb_size, accessed, image)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, mtime_ns, size, thumb_size, time.time(), image)
+            )
+            self._bytes += len(image) - (old[0] if old else 0)
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least recently used thumbnails until they fit max_bytes"""
+        if self._bytes <= self.max_bytes:
+            return
+
+        rows = self._db.execute(
+            "SELECT path, LENGTH(image) FROM thumbnails ORDER BY accessed"
+        ).fetchall()
+        for path, length in rows:
+            if self._bytes <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM thumbnails WHERE path = ?", (path,))
+            self._bytes -= length
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_thumbnail_cache(db_path=None, max_mb=DEFAULT_THUMBNAIL_MAX_MB):
+    """ThumbnailCache on disk, or in memory if the cache folder is unusable"""
+    try:
+        return ThumbnailCache(db_path, max_mb)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Thumbnail cache unavailable ({e}); using a session-only cache")
+        return ThumbnailCache(':memory:', max_mb)
@@ -0,0 +1,806 @@
+# ==========================================
+# SADAR INDEX ENGINE
+# WINDOWED / BLOCK-STREAMING COMPUTATION
+# ==========================================
+
+import fnmatch
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+from sadar_cache import file_key
+from sadar_kernels import normalized_difference
+from sadar_output import IndexWriter, quantize, write_band_vrt
+from sadar_stats import IndexStats
+# Settings live in a light module so the GUI can read them before numpy loads
+from sadar_settings import (
+    DEFAULT_WINDOW_BUDGET_MB, PREVIEW_MAX_SIZE, PRECISIONS, DEFAULT_PRECISION,
+    ALL_INDICES, DEFAULT_THRESHOLDS, INDEX_BANDS, INDEX_DESCRIPTIONS, default_workers,
+    OUTPUT_FORMATS, DEFAULT_OUTPUT_FORMAT, COMPRESSIONS, DEFAULT_COMPRESSION,
+    OUTPUT_DTYPES, DEFAULT_OUTPUT_DTYPE, INDEX_FILE_TYPES, DEFAULT_INDEX_FILE_TYPE,
+    OUTPUT_VERSION, THRESHOLD_METHODS, DEFAULT_THRESHOLD_METHOD,
+    MEMMAP_RAM_FRACTION, SCRATCH_DIR, available_memory_mb, SCAN_INCLUDE, SCAN_EXCLUDE
+)
+
+
+# ---------------- SESSION CACHE ----------------
+# The GUI installs a sadar_session.SessionCache with set_session_cache(), so
+# input images are opened through its dataset pool and decoded windows are
+# kept between actions. Without one (CLI, worker processes) every call
+# opens the file itself and nothing is cached.
+session_cache = None
+
+
+def set_session_cache(cache):
+    global session_cache
+    session_cache = cache
+
+
+def open_dataset(path):
+    """Open an input image for reading (use as a context manager)"""
+    if session_cache is None:
+        return rasterio.open(path)
+    return session_cache.pool.open(path)
+
+
+def _block_key(src, *parts):
+    """Block cache key for data read from src, or None if src is not cached"""
+    if session_cache is None:
+        return None
+    identity = session_cache.pool.identity(src)
+    return None if identity is None else (identity,) + parts
+
+
+# ---------------- BAND MAPPING ----------------
+def index_bands(calc_type, band_count):
+    """Return the (band1, band2) numbers used for an index"""
+    mode = 'full' if band_count >= 11 else 'fallback'
+    return INDEX_BANDS[calc_type][mode]
+
+
+def band_mode_text(band_count):
+    """Describe which bands are used for a given band count"""
+    if band_count >= 11:
+        return "Full satellite image (B3, B4, B8, B11)"
+    return "2-band mode (using available bands)"
+
+
+# ---------------- INPUT FILES ----------------
+def find_geotiffs(folder):
+    """Sorted paths of the .tif/.tiff files directly inside folder"""
+    image_files = []
+    for file in os.listdir(folder):
+        if file.lower().endswith(('.tif', '.tiff')):
+            image_files.append(os.path.join(folder, file))
+    return sorted(image_files)
+
+
+# Classic TIFF and BigTIFF, little- and big-endian
+TIFF_SIGNATURES = (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+')
+
+
+def is_tiff(path):
+    """True if the file starts with a TIFF signature (reads 4 bytes)"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(4) in TIFF_SIGNATURES
+    except OSError:
+        return False
+
+
+def matches_any(rel_path, patterns):
+    """True if a glob pattern matches rel_path ('/'-separated) or its file name"""
+    rel_path = rel_path.lower()
+    name = rel_path.rsplit('/', 1)[-1]
+    return any(fnmatch.fnmatchcase(rel_path if '/' in p else name, p.lower()) for p in patterns)
+
+
+def scan_geotiffs(folder, include=SCAN_INCLUDE, exclude=SCAN_EXCLUDE, recursive=True,
+                  validate=True, on_invalid=None):
+    """Yield image paths under folder as they are found (os.scandir, depth first).
+
+    Each folder's files come in name order, before its subfolders. Files
+    must match an ``include`` pattern and no ``exclude`` pattern; folders
+    matching ``exclude`` are not entered. With ``validate`` only files
+    with a TIFF signature are yielded, the others are passed to
+    ``on_invalid``. Unreadable folders are skipped and symlink loops are
+    only followed once.
+    """
+    stack = [(folder, '')]
+    seen = set()
+    while stack:
+        path, rel = stack.pop()
+        try:
+            st = os.stat(path)
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subfolders = []
+        for entry in entries:
+            rel_entry = rel + entry.name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir:
+                if recursive and not matches_any(rel_entry, exclude):
+                    subfolders.append((entry.path, rel_entry + '/'))
+            elif matches_any(rel_entry, include) and not matches_any(rel_entry, exclude):
+                if not validate or is_tiff(entry.path):
+                    yield entry.path
+                elif on_invalid:
+                    on_invalid(entry.path)
+        stack.extend(reversed(subfolders))
+
+
+# ---------------- WINDOWING ----------------
+def working_bytes_per_pixel(n_bands, n_indices, itemsize=4):
+    """Estimate bytes held per pixel while a window is being processed"""
+    # Input bands + one output per index + two temporaries for the formula
+    return (n_bands + n_indices + 2) * itemsize
+
+
+def iter_windows(src, bytes_per_pixel, budget_mb=DEFAULT_WINDOW_BUDGET_MB):
+    """Yield block-aligned windows whose working set fits the memory budget.
+
+    Windows are unions of the raster's internal blocks (``src.block_windows``):
+    whole block rows spanning the full width when they fit, otherwise runs
+    of blocks along a single block row.
+    """
+    block_h, block_w = src.block_shapes[0]
+    budget_px = max(1, int(budget_mb * 1024 * 1024) // bytes_per_pixel)
+
+    if block_h * src.width <= budget_px:
+        rows = (budget_px // (block_h * src.width)) * block_h
+        cols = src.width
+    else:
+        rows = block_h
+        cols = max(1, budget_px // (block_h * block_w)) * block_w
+
+    for row_off in range(0, src.height, rows):
+        for col_off in range(0, src.width, cols):
+            yield Window(
+                col_off,
+                row_off,
+                min(cols, src.width - col_off),
+                min(rows, src.height - row_off)
+            )
+
+
+# ---------------- PREVIEWS ----------------
+def read_preview(path, band=1, max_size=PREVIEW_MAX_SIZE):
+    """Read an index band decimated so its longest side is at most max_size.
+
+    Returns float32 index values with NaN for nodata, unpacking quantized
+    (scale/offset) outputs.
+    """
+    with rasterio.open(path) as src:
+        scale = min(1.0, max_size / max(src.width, src.height))
+        out_shape = (max(1, int(src.height * scale)), max(1, int(src.width * scale)))
+        data = src.read(band, out_shape=out_shape, out_dtype='float32', masked=True)
+        data = data.filled(np.nan)
+        if (src.scales[band - 1], src.offsets[band - 1]) != (1.0, 0.0):
+            data *= np.float32(src.scales[band - 1])
+            data += np.float32(src.offsets[band - 1])
+        return data
+
+
+def fit_shape(width, height, max_width, max_height):
+    """(rows, cols) of width x height scaled down to fit inside max_width x max_height"""
+    scale = min(1.0, max_width / width, max_height / height)
+    return max(1, int(height * scale)), max(1, int(width * scale))
+
+
+def read_fitted(path, max_width, max_height, band=1):
+    """Read a band at (about) the size it will be shown at.
+
+    GDAL serves decimated reads from the closest overview level, internal
+    or a sidecar .ovr, so only the pixels needed for display are decoded.
+    Returns (data, (width, height)) where the size is the full resolution;
+    data may be a read-only array shared with the session cache.
+    """
+    with open_dataset(path) as src:
+        out_shape = fit_shape(src.width, src.height, max_width, max_height)
+        key = _block_key(src, 'fitted', band, out_shape)
+        data = session_cache.blocks.get(key) if key else None
+        if data is None:
+            data = src.read(band, out_shape=out_shape, out_dtype='float32', masked=True)
+            data = data.filled(np.nan)
+            if key:
+                session_cache.blocks.put(key, data)
+        return data, (src.width, src.height)
+
+
+def read_quicklook(path, max_size, band=1):
+    """uint8 grayscale of a band scaled to fit max_size x max_size (min-max stretch).
+
+    Served from overviews when the image has them, like read_fitted. Opened
+    directly rather than through the session pool, since a folder's worth
+    of thumbnails would only flush it.
+    """
+    with rasterio.open(path) as src:
+        out_shape = fit_shape(src.width, src.height, max_size, max_size)
+        data = src.read(band, out_shape=out_shape, out_dtype='float32', masked=True)
+    data = data.filled(np.nan)
+    valid = np.isfinite(data)
+    if not valid.any():
+        return np.zeros(out_shape, dtype=np.uint8)
+    band_min, band_max = data[valid].min(), data[valid].max()
+    if band_max <= band_min:
+        return np.zeros(out_shape, dtype=np.uint8)
+    data = (data - band_min) * (255.0 / (band_max - band_min))
+    data[~valid] = 0
+    return data.astype(np.uint8)
+
+
+# ---------------- OVERVIEWS ----------------
+OVERVIEW_MIN_SIZE = 256            # Stop adding levels below this size
+OVERVIEW_OPTIONS = {
+    'COMPRESS_OVERVIEW': 'DEFLATE',
+    'GDAL_TIFF_OVR_BLOCKSIZE': 512,
+}
+
+
+def overview_factors(width, height, min_size=OVERVIEW_MIN_SIZE):
+    """Decimation factors 2, 4, 8, ... until the longest side is below min_size"""
+    factors = []
+    factor = 2
+    while max(width, height) / factor >= min_size:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+
+def needs_overviews(path):
+    """True if the image is big enough to want overviews but has none"""
+    with open_dataset(path) as src:
+        return not src.overviews(1) and bool(overview_factors(src.width, src.height))
+
+
+def build_overviews(path, resampling='average'):
+    """Build missing overviews into a sidecar .ovr next to the image.
+
+    The image itself is never modified. Returns True if overviews were
+    built, False if the image already has them or is too small to need them.
+    """
+    from rasterio.enums import Resampling
+
+    with rasterio.open(path) as src:
+        if src.overviews(1):
+            return False
+        factors = overview_factors(src.width, src.height)
+        if not factors:
+            return False
+    # TIFF_USE_OVR sends the levels to path + '.ovr' instead of the image
+    if session_cache is not None:
+        session_cache.pool.invalidate(path)
+    try:
+        with rasterio.Env(TIFF_USE_OVR=True, **OVERVIEW_OPTIONS):
+            with rasterio.open(path, 'r+') as dst:
+                dst.build_overviews(factors, getattr(Resampling, resampling))
+    finally:
+        # Handles opened before the .ovr existed would never use it
+        if session_cache is not None:
+            session_cache.pool.invalidate(path)
+    return True
+
+
+# ---------------- IMAGE SUMMARY ----------------
+def read_header(path):
+    """Header-only description of an image (no pixel data is read)"""
+    with open_dataset(path) as src:
+        return {
+            'filename': os.path.basename(path),
+            'bands': src.count,
+            'width': src.width,
+            'height': src.height,
+            'dtype': str(src.dtypes[0]),
+            'crs': str(src.crs) if src.crs else "Not specified"
+        }
+
+
+def summary_band_mode(band_count):
+    """Label for the bands band_summary uses"""
+    if band_count >= 11:
+        return 'Full image (B3 & B11)'
+    if band_count == 2:
+        return '2-band (B3 & B11)'
+    return f'{band_count}-band (using first 2: B3 & B11)'
+
+
+def band_summary(path, precision=DEFAULT_PRECISION, budget_mb=DEFAULT_WINDOW_BUDGET_MB):
+    """Green/SWIR min/max/mean and NDSI min/max/mean, streamed over windows"""
+    with open_dataset(path) as src:
+        green_band, swir_band = index_bands('NDSI', src.count)
+        bands = {'green': green_band, 'swir': swir_band}
+        acc = {name: [np.inf, -np.inf, 0.0, 0] for name in bands}   # min, max, sum, count
+        ndsi = IndexStats()
+
+        for window in iter_windows(src, working_bytes_per_pixel(2, 1, np.dtype(precision).itemsize),
+                                   budget_mb):
+            decoded = read_bands(src, sorted(set(bands.values())), window, precision)
+            data = {name: decoded[b] for name, b in bands.items()}
+            for name, values in data.items():
+                valid = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+                if valid.size:
+                    a = acc[name]
+                    a[0] = min(a[0], float(valid.min()))
+                    a[1] = max(a[1], float(valid.max()))
+                    a[2] += float(valid.sum(dtype=np.float64))
+                    a[3] += valid.size
+            ndsi.update(normalized_difference(data['green'], data['swir'], nodata=src.nodata))
+
+        summary = {'band_mode': summary_band_mode(src.count)}
+        for name, (vmin, vmax, total, count) in acc.items():
+            summary[f'{name}_min'] = vmin if count else np.nan
+            summary[f'{name}_max'] = vmax if count else np.nan
+            summary[f'{name}_mean'] = total / count if count else np.nan
+        has_data = ndsi.valid > 0
+        summary['ndsi_min'] = ndsi.min if has_data else np.nan
+        summary['ndsi_max'] = ndsi.max if has_data else np.nan
+        summary['ndsi_mean'] = ndsi.mean if has_data else np.nan
+        return summary
+
+
+class LazyImage:
+    """An input image whose header is read up front and statistics on demand.
+
+    ``cache`` (a sadar_cache.MetadataCache, or None) is consulted before
+    anything is read and receives whatever gets computed.
+    """
+
+    def __init__(self, path, cache=None):
+        self.path = path
+        self.cache = cache
+        self._data = (cache.get(path) if cache is not None else None) or {}
+        if 'bands' not in self._data:
+            self._store(read_header(path))
+
+    def _store(self, fields):
+        self._data.update(fields)
+        if self.cache is not None:
+            self.cache.update(self.path, **fields)
+
+    @property
+    def header(self):
+        return {key: self._data[key]
+                for key in ('filename', 'bands', 'width', 'height', 'dtype', 'crs')}
+
+    @property
+    def band_count(self):
+        return self._data['bands']
+
+    @property
+    def stats_ready(self):
+        return 'ndsi_mean' in self._data
+
+    def stats(self, precision=DEFAULT_PRECISION):
+        """Band and NDSI statistics (band_summary), computed on first use"""
+        if not self.stats_ready and self.band_count >= 2:
+            self._store(band_summary(self.path, precision))
+        return {key: value for key, value in self._data.items()
+                if key.startswith(('band_mode', 'green_', 'swir_', 'ndsi_'))}
+
+
+# ---------------- BAND ACCESS ----------------
+def needed_bands(pairs):
+    """Sorted set of the bands the indices in pairs read"""
+    return sorted({b for pair in pairs.values() for b in pair})
+
+
+def read_bands(src, bands, window, precision=DEFAULT_PRECISION, out=None):
+    """{band: 2-D array} for one window, decoded with a single read call.
+
+    One multi-band read lets GDAL decode each block of a pixel-interleaved
+    file once for all bands, instead of once per band read. ``out`` is an
+    optional (len(bands), rows, cols) buffer to decode into; without it the
+    arrays may be read-only ones shared with the session cache.
+
+    With a session cache, bands already decoded for this window come from
+    memory and only the rest are read.
+    """
+    window_key = (int(window.col_off), int(window.row_off), int(window.width), int(window.height))
+    keys = {b: _block_key(src, 'window', b, window_key, np.dtype(precision).str) for b in bands}
+    cached = {b: session_cache.blocks.get(key) for b, key in keys.items() if key}
+    missing = [b for b in bands if cached.get(b) is None]
+
+    direct = out is not None and len(missing) == len(bands)
+    if direct:
+        data = src.read(bands, window=window, out=out)
+    elif missing:
+        data = src.read(missing, window=window, out_dtype=precision)
+    else:
+        data = []
+    for b, values in zip(missing, data):
+        cached[b] = values
+        if keys[b]:
+            session_cache.blocks.put(keys[b], values)
+
+    if out is None:
+        return {b: cached[b] for b in bands}
+    if not direct:
+        for i, b in enumerate(bands):
+            out[i] = cached[b]
+    return dict(zip(bands, out))
+
+
+# ---------------- TILE EXECUTION ----------------
+def window_buffers(shape, pairs, precision=DEFAULT_PRECISION):
+    """Preallocated output buffers (one per index plus shared work buffers)"""
+    buffers = {idx: np.empty(shape, dtype=precision) for idx in pairs}
+    buffers['_bands'] = np.empty((len(needed_bands(pairs)),) + shape, dtype=precision)
+    buffers['_scratch'] = np.empty(shape, dtype=precision)
+    buffers['_mask'] = np.empty(shape, dtype=bool)
+    return buffers
+
+
+def compute_window(src, window, pairs, precision=DEFAULT_PRECISION, buffers=None):
+    """Compute every index in pairs for one window of an open dataset.
+
+    Results are written into ``buffers`` (see window_buffers) when given,
+    otherwise into freshly allocated arrays.
+    """
+    if buffers is None:
+        buffers = window_buffers((int(window.height), int(window.width)), pairs, precision)
+
+    # Every needed band in one read, decoded straight into precision and
+    # shared by all indices
+    bands = read_bands(src, needed_bands(pairs), window, precision, out=buffers['_bands'])
+
+    return {
+        idx: normalized_difference(
+            bands[b1], bands[b2],
+            out=buffers[idx],
+            scratch=buffers['_scratch'],
+            mask=buffers['_mask'],
+            nodata=src.nodata
+        )
+        for idx, (b1, b2) in pairs.items()
+    }
+
+
+# ---------------- WORKER POOL ----------------
+# Worker processes are spawned once and reused by every run with the same
+# worker count: starting an interpreter, importing numpy/rasterio and
+# loading the compiled kernels costs about a second per process, which
+# would otherwise be paid again on every calculation.
+_worker_pool = None
+_worker_pool_size = 0
+_worker_pool_lock = threading.Lock()
+
+# Each worker keeps the dataset of the image it last worked on open
+_worker_src = None
+_worker_src_key = None
+
+
+def _init_worker():
+    # Never use a session cache that came along with the parent's state
+    set_session_cache(None)
+    # Load (or compile) the kernels before the first tile arrives
+    import sadar_kernels
+    sadar_kernels.warm_up()
+    for precision in PRECISIONS:
+        IndexStats().update(np.zeros((1, 1), dtype=precision))
+
+
+def _worker_dataset(image_path):
+    """The worker's handle on image_path, reopened when the file changes"""
+    global _worker_src, _worker_src_key
+    key = file_key(image_path)
+    if key != _worker_src_key:
+        if _worker_src is not None:
+            _worker_src.close()
+        _worker_src = rasterio.open(image_path)
+        _worker_src_key = key
+    return _worker_src
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def worker_pool(workers):
+    """Shared process pool with ``workers`` processes (replaced if the count differs)"""
+    global _worker_pool, _worker_pool_size
+    with _worker_pool_lock:
+        if _worker_pool is None or _worker_pool_size != workers:
+            if _worker_pool is not None:
+                _worker_pool.shutdown(wait=False, cancel_futures=True)
+            # Spawned, not forked: the GUI has threads (warm-up, prefetch,
+            # thumbnails) that may hold GDAL, SQLite or Python locks at fork time
+            _worker_pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _worker_pool_size = workers
+        return _worker_pool
+
+
+def warm_worker_pool(workers):
+    """Start the pool's processes now (blocks until they are all up)"""
+    if workers > 1:
+        pool = worker_pool(workers)
+        for future in [pool.submit(_worker_ready) for _ in range(workers)]:
+            future.result()
+
+
+def shutdown_worker_pool():
+    global _worker_pool, _worker_pool_size
+    with _worker_pool_lock:
+        if _worker_pool is not None:
+            _worker_pool.shutdown(wait=False, cancel_futures=True)
+        _worker_pool = None
+        _worker_pool_size = 0
+
+
+def window_stats(results, thresholds):
+    """IndexStats of one window's results, ready to be merged"""
+    return {
+        idx: IndexStats(thresholds=(thresholds[idx],)).update(result)
+        for idx, result in results.items()
+    }
+
+
+def _compute_tile(image_path, window_tuple, pairs, precision, thresholds):
+    col_off, row_off, width, height = window_tuple
+    window = Window(col_off, row_off, width, height)
+    results = compute_window(_worker_dataset(image_path), window, pairs, precision)
+    return window_tuple, results, window_stats(results, thresholds)
+
+
+def iter_index_windows(image_path, pairs, budget_mb=DEFAULT_WINDOW_BUDGET_MB, workers=1,
+                       precision=DEFAULT_PRECISION, thresholds=None):
+    """Yield (window, results, stats, n, total) for every window, in order.
+
+    ``stats`` maps each index to the IndexStats of that window (computed
+    where the window was computed) for the caller to merge.
+
+    With ``workers > 1`` tiles are computed in the shared worker pool
+    (see worker_pool) where each worker opens its own rasterio handle;
+    results are still yielded in
+    window order so callers can write them sequentially. The budget is
+    split across the tiles in flight, keeping peak memory bounded.
+
+    In-process, result arrays are reused from one window to the next;
+    consume (write or copy) them before advancing the iterator.
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    needed = needed_bands(pairs)
+    itemsize = np.dtype(precision).itemsize
+    bytes_per_pixel = working_bytes_per_pixel(len(needed), len(pairs), itemsize)
+
+    with open_dataset(image_path) as src:
+        if workers <= 1:
+            windows = list(iter_windows(src, bytes_per_pixel, budget_mb))
+            buffers = {}  # keyed by window shape; only edge windows differ
+            for n, window in enumerate(windows, start=1):
+                shape = (int(window.height), int(window.width))
+                if shape not in buffers:
+                    buffers[shape] = window_buffers(shape, pairs, precision)
+                results = compute_window(src, window, pairs, precision, buffers[shape])
+                yield window, results, window_stats(results, thresholds), n, len(windows)
+            return
+
+        in_flight = workers * 2
+        tile_budget = budget_mb / in_flight
+        windows = list(iter_windows(src, bytes_per_pixel, tile_budget))
+
+    total = len(windows)
+    pool = worker_pool(workers)
+    pending = deque()
+    n = 0
+    try:
+        for window in windows:
+            window_tuple = (window.col_off, window.row_off, window.width, window.height)
+            pending.append(pool.submit(_compute_tile, image_path, window_tuple, pairs,
+                                       precision, thresholds))
+            if len(pending) >= in_flight:
+                window_tuple, results, stats = pending.popleft().result()
+                n += 1
+                yield Window(*window_tuple), results, stats, n, total
+        while pending:
+            window_tuple, results, stats = pending.popleft().result()
+            n += 1
+            yield Window(*window_tuple), results, stats, n, total
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory): start fresh next time
+        shutdown_worker_pool()
+        raise
+    finally:
+        # Consumer stopped early (error or cancel): drop queued tiles
+        for future in pending:
+            future.cancel()
+
+
+def allocate_scene_array(shape, dtype, scratch_dir=None):
+    """Empty full-scene array: in memory, or memory-mapped if RAM is short.
+
+    The memmap lives in an anonymous temporary file in ``scratch_dir``
+    (SCRATCH_DIR / the system temp folder when None) that is deleted as
+    soon as the array is released.
+    """
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    free_mb = available_memory_mb()
+    if free_mb is None or nbytes / (1024 * 1024) <= free_mb * MEMMAP_RAM_FRACTION:
+        return np.empty(shape, dtype=dtype)
+
+    scratch = tempfile.TemporaryFile(prefix='sadar-', suffix='.scratch',
+                                     dir=scratch_dir or SCRATCH_DIR)
+    return np.memmap(scratch, dtype=dtype, mode='w+', shape=shape)
+
+
+def compute_index_array(image_path, calc_type, budget_mb=DEFAULT_WINDOW_BUDGET_MB,
+                        workers=1, progress=None, precision=DEFAULT_PRECISION, threshold=None,
+                        scratch_dir=None):
+    """Compute one index for the whole scene, assembling tiles into one array.
+
+    Returns ``(result, stats)`` where stats is the merged IndexStats, with
+    pixels >= ``threshold`` (the index default when None) counted. Scenes
+    too big for the free RAM get a memory-mapped result (see
+    allocate_scene_array).
+    """
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[calc_type]
+
+    with open_dataset(image_path) as src:
+        if src.count < 2:
+            raise ValueError(f"{calc_type} requires at least 2 bands")
+        pairs = {calc_type: index_bands(calc_type, src.count)}
+        result = allocate_scene_array((src.height, src.width), precision, scratch_dir)
+
+    stats = IndexStats(thresholds=(threshold,))
+    tiles = iter_index_windows(image_path, pairs, budget_mb, workers, precision,
+                               thresholds={calc_type: threshold})
+    with closing(tiles):
+        for window, results, tile_stats, n, total in tiles:
+            rows, cols = window.toslices()
+            result[rows, cols] = results[calc_type]
+            stats.merge(tile_stats[calc_type])
+            if progress:
+                progress(n / total, f"Processing tile {n}/{total}")
+
+    return result, stats
+
+
+# ---------------- STREAMING ENGINE ----------------
+def threshold_tags(idx, threshold, method):
+    """GDAL metadata items recording how an index output was classified"""
+    return {
+        'SADAR_INDEX': idx,
+        'SADAR_THRESHOLD': f"{threshold:.6g}",
+        'SADAR_THRESHOLD_METHOD': method,
+    }
+
+
+def compute_indices_streaming(image_path, output_folder, indices=ALL_INDICES,
+                              budget_mb=DEFAULT_WINDOW_BUDGET_MB, workers=1, progress=None,
+                              thresholds=None, precision=DEFAULT_PRECISION,
+                              output_format=DEFAULT_OUTPUT_FORMAT,
+                              compression=DEFAULT_COMPRESSION,
+                              output_dtype=DEFAULT_OUTPUT_DTYPE,
+                              index_files=DEFAULT_INDEX_FILE_TYPE,
+                              threshold_method=DEFAULT_THRESHOLD_METHOD):
+    """Compute indices window by window and write them straight to GeoTIFF.
+
+    Writes one ``{base}_{idx}_processed.tiff`` per index and a multi-band
+    ``{base}_processed_composite.tiff``. Only one window of bands and results
+    is held in memory at a time (one per tile in flight when ``workers > 1``),
+    so peak memory follows ``budget_mb`` rather than the scene size.
+    ``progress(fraction, message)`` is called after every window.
+    Pixels at or above ``thresholds[idx]`` (DEFAULT_THRESHOLDS when None)
+    are counted as the positive class. ``output_format`` 'COG' writes
+    Cloud-Optimized GeoTIFFs compressed with ``compression``; ``output_dtype``
+    'int16' stores the indices quantized (see sadar_output). With
+    ``index_files`` 'vrt' only the composite is written and each index gets
+    a ``{base}_{idx}_processed.vrt`` over its composite band instead.
+    ``threshold_method`` 'otsu' or 'valley' replaces the thresholds with
+    ones derived per index from this scene's histogram. The threshold used
+    is stored in each output's metadata (SADAR_THRESHOLD*).
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    if threshold_method not in THRESHOLD_METHODS:
+        raise ValueError(f"Unknown threshold method: {threshold_method}")
+    base_name = os.path.splitext(os.path.basename(image_path))[0]
+
+    with open_dataset(image_path) as src:
+        band_count = src.count
+        if band_count < 2:
+            raise ValueError("Image must have at least 2 bands")
+        profile = src.profile.copy()
+
+    pairs = {idx: index_bands(idx, band_count) for idx in indices}
+
+    if index_files not in INDEX_FILE_TYPES:
+        raise ValueError(f"Unknown index file type: {index_files}")
+    extension = 'vrt' if index_files == 'vrt' else 'tiff'
+    outputs = {
+        idx: os.path.join(output_folder, f"{base_name}_{idx}_processed.{extension}")
+        for idx in indices
+    }
+    composite_path = os.path.join(output_folder, f"{base_name}_processed_composite.tiff")
+
+    stats = {idx: IndexStats(thresholds=(thresholds[idx],)) for idx in indices}
+
+    dsts = {
+        idx: IndexWriter(path, profile, 1, output_format, compression, output_dtype)
+        for idx, path in outputs.items()
+    } if index_files == 'tiff' else {}
+    composite = IndexWriter(composite_path, profile, len(indices), output_format, compression,
+                            output_dtype)
+    writers = list(dsts.values()) + [composite]
+    tiles = iter_index_windows(image_path, pairs, budget_mb, workers, precision, thresholds)
+    try:
+        for window, results, tile_stats, n, total in tiles:
+            for band_idx, idx in enumerate(indices, start=1):
+                result = results[idx]
+                if output_dtype == 'int16':
+                    result = quantize(result)   # Once for both files
+
+                if dsts:
+                    dsts[idx].write(result, 1, window=window)
+                composite.write(result, band_idx, window=window)
+                stats[idx].merge(tile_stats[idx])
+
+            if progress:
+                progress(n / total, f"Processing window {n}/{total}")
+
+        # Automatic thresholds come from the finished histograms (no second pass)
+        if threshold_method != 'fixed':
+            thresholds = {
+                **thresholds,
+                **{idx: stats[idx].auto_threshold(threshold_method, thresholds[idx])
+                   for idx in indices}
+            }
+        tags = {idx: threshold_tags(idx, thresholds[idx], threshold_method) for idx in indices}
+
+        for band_idx, idx in enumerate(indices, start=1):
+            composite.set_band_description(band_idx, INDEX_DESCRIPTIONS[idx])
+            composite.update_tags(band_idx, **tags[idx])
+            if dsts:
+                dsts[idx].update_tags(**tags[idx])
+
+        if progress and output_format == 'COG':
+            progress(1.0, "Writing Cloud-Optimized GeoTIFFs...")
+        for writer in writers:
+            writer.close()
+
+        if index_files == 'vrt':
+            for band_idx, idx in enumerate(indices, start=1):
+                write_band_vrt(outputs[idx], composite_path, band_idx, INDEX_DESCRIPTIONS[idx],
+                               tags[idx])
+    except BaseException:
+        # Never leave half-written outputs behind (errors and cancellation)
+        for writer in writers:
+            writer.discard()
+        for path in outputs.values():
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        tiles.close()
+
+    summary = {idx: stats[idx].summary(thresholds[idx]) for idx in indices}
+    for idx in indices:
+        summary[idx]['threshold_method'] = threshold_method
+
+    return {
+        'base_name': base_name,
+        'band_mode': band_mode_text(band_count),
+        'profile': profile,
+        'outputs': outputs,
+        'composite': composite_path,
+        'stats': summary,
+        'index_stats': stats,
+    }
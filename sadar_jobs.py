@@ -0,0 +1,106 @@
+# ==========================================
+# SADAR BACKGROUND JOBS
+# RUN LONG PIPELINES OFF THE TK THREAD
+# ==========================================
+
+import queue
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once Cancel has been pressed"""
+
+
+class Job:
+    """Handle a pipeline uses to report back to the UI"""
+
+    def __init__(self, events, cancel_event):
+        self._events = events
+        self._cancel_event = cancel_event
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def status(self, text, kind='warning'):
+        """Show text in the status bar (kind is a COLORS key)"""
+        self.check_cancelled()
+        self._events.put(('status', text, kind))
+
+    def progress(self, fraction, message=''):
+        """Report progress in [0, 1]; also the cancellation point for engines"""
+        self.check_cancelled()
+        self._events.put(('progress', fraction, message))
+
+
+class JobRunner:
+    """Runs one pipeline at a time on a daemon thread.
+
+    The worker only ever puts events on a queue. dispatch() drains it and
+    calls the callbacks, and is meant to be polled from the Tk thread with
+    root.after(), so every callback may touch widgets safely.
+    """
+
+    def __init__(self, on_status=None, on_progress=None):
+        self.events = queue.Queue()
+        self.on_status = on_status
+        self.on_progress = on_progress
+        self._cancel_event = threading.Event()
+        self._callbacks = {}
+        self._running = False
+
+    @property
+    def busy(self):
+        return self._running
+
+    def start(self, func, *args, on_done=None, on_error=None, on_cancel=None):
+        """Run func(job, *args) in the background; returns False if busy"""
+        if self._running:
+            return False
+
+        self._running = True
+        self._cancel_event.clear()
+        self._callbacks = {'done': on_done, 'error': on_error, 'cancelled': on_cancel}
+
+        job = Job(self.events, self._cancel_event)
+        thread = threading.Thread(target=self._run, args=(job, func, args), daemon=True)
+        thread.start()
+        return True
+
+    def cancel(self):
+        if self._running:
+            self._cancel_event.set()
+
+    def _run(self, job, func, args):
+        try:
+            self.events.put(('done', func(job, *args)))
+        except JobCancelled:
+            self.events.put(('cancelled', None))
+        except Exception as e:
+            self.events.put(('error', e))
+
+    def dispatch(self):
+        """Deliver queued events; call from the UI thread only"""
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return
+
+            kind = event[0]
+            if kind == 'status':
+                if self.on_status:
+                    self.on_status(event[1], event[2])
+            elif kind == 'progress':
+                if self.on_progress:
+                    self.on_progress(event[1], event[2])
+            else:
+                # done / error / cancelled end the job
+                self._running = False
+                callback = self._callbacks.get(kind)
+                if callback:
+                    callback(event[1])
@@ -0,0 +1,113 @@
+# ==========================================
+# SADAR KERNELS
+# FUSED NORMALIZED-DIFFERENCE INDEX
+# ==========================================
+#
+# index = (a - b) / (a + b), NaN where a + b == 0 (or either input is
+# nodata), clipped to [-1, 1]. Results are written into caller-provided
+# buffers so a window loop allocates nothing per iteration.
+#
+# Backends, fastest available first:
+#   numba   - single-pass compiled ufunc
+#   numexpr - multithreaded blocked evaluation
+#   numpy   - in-place ufunc chain (always available)
+
+import numpy as np
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+# ---------------- NUMBA UFUNC ----------------
+def _nd_scalar(a, b):
+    denom = a + b
+    if denom == 0:
+        return np.nan
+    result = (a - b) / denom
+    if result > 1:
+        return 1
+    if result < -1:
+        return -1
+    return result
+
+
+_nd_ufunc = None
+
+
+def _numba_ufunc():
+    """Compile the ufunc on first use, so importing this module stays cheap"""
+    global _nd_ufunc
+    if _nd_ufunc is None:
+        signatures = ['float32(float32, float32)', 'float64(float64, float64)']
+        try:
+            # Cached on disk, so later runs and worker processes skip compiling
+            _nd_ufunc = numba.vectorize(signatures, cache=True)(_nd_scalar)
+        except RuntimeError:
+            # No cache location for this module (e.g. a frozen build)
+            _nd_ufunc = numba.vectorize(signatures)(_nd_scalar)
+    return _nd_ufunc
+
+
+BACKENDS = ('numpy',) + (('numexpr',) if numexpr else ()) + (('numba',) if numba else ())
+DEFAULT_BACKEND = BACKENDS[-1]
+
+
+# ---------------- KERNEL ----------------
+def normalized_difference(a, b, out=None, scratch=None, mask=None, nodata=None,
+                          backend=DEFAULT_BACKEND):
+    """Fused (a - b) / (a + b) with NaN for zero sums and clipping to [-1, 1].
+
+    ``a`` and ``b`` must be floating arrays of the same shape. ``out``
+    receives the index; ``scratch`` (same dtype) and ``mask`` (bool) are
+    work buffers for the numpy backend. Any buffer not given is allocated.
+    Pixels where either input equals ``nodata`` become NaN. Returns ``out``.
+    """
+    dtype = np.result_type(a, b)
+    if out is None:
+        out = np.empty(a.shape, dtype=dtype)
+
+    if backend == 'numba' and numba is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            _numba_ufunc()(a, b, out=out)
+
+    elif backend == 'numexpr' and numexpr is not None:
+        nan = out.dtype.type(np.nan)
+        numexpr.evaluate(
+            "where(a + b == 0, nan, (a - b) / (a + b))",
+            local_dict={'a': a, 'b': b, 'nan': nan},
+            out=out,
+            casting='same_kind'
+        )
+        np.clip(out, -1, 1, out=out)
+
+    else:
+        if scratch is None:
+            scratch = np.empty(a.shape, dtype=dtype)
+        if mask is None:
+            mask = np.empty(a.shape, dtype=bool)
+        np.add(a, b, out=scratch)
+        np.subtract(a, b, out=out)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(out, scratch, out=out)
+        np.clip(out, -1, 1, out=out)
+        np.equal(scratch, 0, out=mask)
+        if mask.any():
+            np.copyto(out, np.nan, where=mask)
+
+    if nodata is not None and not np.isnan(nodata):
+        out[(a == nodata) | (b == nodata)] = np.nan
+
+    return out
+
+
+def warm_up():
+    """Compile the fastest backend now instead of on the first calculation"""
+    if DEFAULT_BACKEND == 'numba':
+        _numba_ufunc()
@@ -0,0 +1,95 @@
+# ==========================================
+# SADAR RUN MANIFEST
+# WHAT EACH BATCH OUTPUT WAS MADE FROM, KEPT IN THE OUTPUT FOLDER
+# ==========================================
+#
+# One row per input image: the input's path, mtime and size, the settings
+# that decide the output contents, the files written and their statistics.
+# A later batch run skips an image while all of that still matches and
+# every recorded output is still on disk.
+
+import json
+import os
+import sqlite3
+import time
+from sadar_cache import file_key, _json_default
+
+# ---------------- SETTINGS ----------------
+MANIFEST_FILE = 'sadar_manifest.sqlite'
+
+
+def settings_text(settings):
+    """Canonical JSON for a settings dict (tuples and lists compare equal)"""
+    return json.dumps(settings, sort_keys=True, default=_json_default)
+
+
+# ---------------- MANIFEST ----------------
+class RunManifest:
+    """Per-image record of finished batch outputs in one output folder"""
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.db_path = os.path.join(output_folder, MANIFEST_FILE)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outputs ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " settings TEXT NOT NULL,"
+            " files TEXT NOT NULL,"
+            " stats TEXT NOT NULL,"
+            " finished REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def lookup(self, image_path, settings):
+        """Recorded stats if image_path's outputs are up to date, else None"""
+        try:
+            key, mtime_ns, size = file_key(image_path)
+        except OSError:
+            return None
+
+        row = self._db.execute(
+            "SELECT mtime_ns, size, settings, files, stats FROM outputs WHERE path = ?", (key,)
+        ).fetchone()
+        if row is None or (row[0], row[1]) != (mtime_ns, size):
+            return None
+        if row[2] != settings_text(settings):
+            return None
+
+        # Outputs deleted or replaced since (sizes as written)
+        for name, written_size in json.loads(row[3]).items():
+            try:
+                if os.path.getsize(os.path.join(self.output_folder, name)) != written_size:
+                    return None
+            except OSError:
+                return None
+        return json.loads(row[4])
+
+    def record(self, image_key, settings, files, stats):
+        """Store a finished image.
+
+        ``image_key`` is the input's file_key() taken before processing, so
+        an input modified mid-run is redone next time.
+        """
+        key, mtime_ns, size = image_key
+        sizes = {
+            os.path.relpath(path, self.output_folder): os.path.getsize(path)
+            for path in files
+        }
+        self._db.execute(
+            "INSERT OR REPLACE INTO outputs (path, mtime_ns, size, settings, files, stats, finished)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, mtime_ns, size, settings_text(settings), json.dumps(sizes),
+             json.dumps(stats, default=_json_default), time.time())
+        )
+        self._db.commit()
+
+    def forget(self, image_path):
+        """Drop the record for image_path (e.g. after a failed run)"""
+        self._db.execute("DELETE FROM outputs WHERE path = ?", (os.path.abspath(image_path),))
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
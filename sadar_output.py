@@ -0,0 +1,239 @@
+# ==========================================
+# SADAR OUTPUT
+# BLOCKWISE INDEX GEOTIFF WRITERS (PLAIN OR CLOUD-OPTIMIZED)
+# ==========================================
+#
+# The COG driver can only copy a finished dataset, so COG outputs are
+# streamed window by window into a tiled, compressed intermediate next to
+# the target and converted (overviews included) when the writer closes.
+#
+# Per-index rasters can also be single-band VRTs over a composite band, so
+# each index is stored (and written) only once.
+#
+# Outputs are float32 (NaN = nodata) or quantized int16: round(value /
+# INT16_SCALE) with the scale, offset and nodata sentinel stored as GDAL
+# band metadata, so readers that honour them get index values back.
+
+import os
+import xml.etree.ElementTree as ET
+import numpy as np
+import rasterio
+import rasterio.shutil
+from rasterio.windows import Window
+from sadar_settings import DEFAULT_OUTPUT_FORMAT, DEFAULT_COMPRESSION, DEFAULT_OUTPUT_DTYPE
+
+# ---------------- SETTINGS ----------------
+COG_BLOCK_SIZE = 512
+COG_OVERVIEW_RESAMPLING = 'AVERAGE'
+PARTIAL_SUFFIX = '.partial.tif'
+PARTIAL_COMPRESSION = {'compress': 'zstd', 'zstd_level': 1}
+WRITE_STRIP_MB = 64                # write_array() converts and writes this much at a time
+
+INT16_SCALE = 1e-4                 # Stored value 10000 == index 1.0
+INT16_OFFSET = 0.0
+INT16_NODATA = -32768
+INT16_LIMIT = 32767                # Clamp for out-of-range values (never hits nodata)
+
+
+def nodata_value(output_dtype=DEFAULT_OUTPUT_DTYPE):
+    return INT16_NODATA if output_dtype == 'int16' else np.nan
+
+
+def quantize(data):
+    """float index values -> int16 at INT16_SCALE (NaN -> INT16_NODATA)"""
+    scaled = np.multiply(data, 1.0 / INT16_SCALE, dtype=np.float32)
+    if INT16_OFFSET:
+        scaled -= INT16_OFFSET / INT16_SCALE
+    np.rint(scaled, out=scaled)
+    np.clip(scaled, -INT16_LIMIT, INT16_LIMIT, out=scaled)
+    scaled[np.isnan(scaled)] = INT16_NODATA
+    return scaled.astype(np.int16)
+
+
+def output_profile(profile, count, output_format=DEFAULT_OUTPUT_FORMAT,
+                   compression=DEFAULT_COMPRESSION, output_dtype=DEFAULT_OUTPUT_DTYPE):
+    """Profile for a float32 or int16 index output shaped like profile"""
+    if output_format == 'GTiff':
+        out = profile.copy()
+        out.update(dtype=output_dtype, count=count, nodata=nodata_value(output_dtype))
+        if output_dtype == 'int16' and str(out.get('predictor')) in ('3', 'FLOATING_POINT'):
+            out['predictor'] = 2        # Floating-point prediction needs float samples
+        return out
+
+    # Intermediate for a COG: tiled like the final file and compressed
+    # with a fast codec, since it is recompressed during the conversion
+    out = {key: profile[key] for key in ('width', 'height', 'crs', 'transform') if key in profile}
+    out.update(
+        driver='GTiff',
+        dtype=output_dtype,
+        count=count,
+        nodata=nodata_value(output_dtype),
+        tiled=True,
+        blockxsize=COG_BLOCK_SIZE,
+        blockysize=COG_BLOCK_SIZE,
+        interleave='band',              # Windows are written one band at a time
+        bigtiff='IF_SAFER',
+        predictor=3 if output_dtype == 'float32' else 2,
+        **PARTIAL_COMPRESSION
+    )
+    return out
+
+
+def cog_options(compression=DEFAULT_COMPRESSION, output_dtype=DEFAULT_OUTPUT_DTYPE):
+    """Creation options for GDAL's COG driver"""
+    options = {
+        'COMPRESS': compression,
+        'BLOCKSIZE': COG_BLOCK_SIZE,
+        'OVERVIEWS': 'AUTO',
+        'OVERVIEW_RESAMPLING': COG_OVERVIEW_RESAMPLING,
+        'BIGTIFF': 'IF_SAFER',
+        'NUM_THREADS': 'ALL_CPUS',
+    }
+    if compression == 'LERC':
+        options['MAX_Z_ERROR'] = 0      # Lossless
+    else:
+        options['PREDICTOR'] = 'FLOATING_POINT' if output_dtype == 'float32' else 'STANDARD'
+    return options
+
+
+# ---------------- WRITER ----------------
+class IndexWriter:
+    """One output file written window by window.
+
+    ``write()`` takes float index values (NaN = nodata) and quantizes them
+    for int16 outputs (already quantized int16 blocks are written as is).
+    ``close()`` finishes the file (converting to COG when asked for);
+    ``discard()`` removes everything written so far.
+    """
+
+    def __init__(self, path, profile, count=1, output_format=DEFAULT_OUTPUT_FORMAT,
+                 compression=DEFAULT_COMPRESSION, output_dtype=DEFAULT_OUTPUT_DTYPE):
+        if output_format not in ('GTiff', 'COG'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        if output_dtype not in ('float32', 'int16'):
+            raise ValueError(f"Unknown output type: {output_dtype}")
+        self.path = path
+        self.output_format = output_format
+        self.compression = compression
+        self.output_dtype = output_dtype
+        self._target = path if output_format == 'GTiff' else path + PARTIAL_SUFFIX
+        self.dst = rasterio.open(
+            self._target, 'w',
+            **output_profile(profile, count, output_format, compression, output_dtype)
+        )
+        if output_dtype == 'int16':
+            self.dst.scales = (INT16_SCALE,) * count
+            self.dst.offsets = (INT16_OFFSET,) * count
+
+    def write(self, data, band=1, window=None):
+        if self.output_dtype == 'int16':
+            if data.dtype != np.int16:
+                data = quantize(data)
+        else:
+            data = data.astype(np.float32, copy=False)
+        self.dst.write(data, band, window=window)
+
+    def set_band_description(self, band, description):
+        self.dst.set_band_description(band, description)
+
+    def update_tags(self, bidx=0, **tags):
+        """GDAL metadata items on the dataset (bidx 0) or one band"""
+        self.dst.update_tags(bidx, **tags)
+
+    def close(self):
+        self.dst.close()
+        if self.output_format == 'COG':
+            rasterio.shutil.copy(self._target, self.path, driver='COG',
+                                 **cog_options(self.compression, self.output_dtype))
+            os.remove(self._target)
+
+    def discard(self):
+        if not self.dst.closed:
+            self.dst.close()
+        for path in (self._target, self.path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def write_array(path, data, profile, output_format=DEFAULT_OUTPUT_FORMAT,
+                compression=DEFAULT_COMPRESSION, output_dtype=DEFAULT_OUTPUT_DTYPE):
+    """Write a whole 2-D index array as a single-band output.
+
+    Written in row strips, so memory-mapped arrays are streamed from disk
+    and never converted (float32/int16) all at once.
+    """
+    rows, cols = data.shape
+    strip_rows = max(1, int(WRITE_STRIP_MB * 1024 * 1024) // (cols * data.itemsize))
+    writer = IndexWriter(path, profile, 1, output_format, compression, output_dtype)
+    try:
+        for row in range(0, rows, strip_rows):
+            strip = data[row:row + strip_rows]
+            writer.write(strip, 1, window=Window(0, row, cols, strip.shape[0]))
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+    return path
+
+
+# ---------------- VIRTUAL BANDS ----------------
+GDAL_TYPE_NAMES = {'float32': 'Float32', 'float64': 'Float64', 'int16': 'Int16'}
+
+
+def _sub(parent, tag, text=None, **attrib):
+    element = ET.SubElement(parent, tag, {k: str(v) for k, v in attrib.items()})
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def write_band_vrt(vrt_path, source_path, band, description=None, tags=None):
+    """Single-band VRT exposing one band of source_path.
+
+    The source is referenced relative to the VRT, so the pair can be moved
+    together. Georeferencing, nodata, scale/offset and the description are
+    copied, ``tags`` become dataset metadata items, and decimated reads use
+    the source's overviews.
+    """
+    with rasterio.open(source_path) as src:
+        i = band - 1
+        dtype = src.dtypes[i]
+        nodata = src.nodatavals[i]
+        block_rows, block_cols = src.block_shapes[i]
+        width, height = src.width, src.height
+        crs, transform = src.crs, src.transform
+        scale, offset = src.scales[i], src.offsets[i]
+        description = description or src.descriptions[i]
+
+    root = ET.Element('VRTDataset', rasterXSize=str(width), rasterYSize=str(height))
+    if crs:
+        # No axis mapping attribute: GDAL then uses x/y order, like the source
+        _sub(root, 'SRS', crs.to_wkt())
+    _sub(root, 'GeoTransform', ', '.join(repr(float(v)) for v in transform.to_gdal()))
+    if tags:
+        metadata = _sub(root, 'Metadata')
+        for key, value in tags.items():
+            _sub(metadata, 'MDI', value, key=key)
+
+    vrt_band = _sub(root, 'VRTRasterBand', dataType=GDAL_TYPE_NAMES[dtype], band=1)
+    if description:
+        _sub(vrt_band, 'Description', description)
+    if nodata is not None:
+        _sub(vrt_band, 'NoDataValue', 'nan' if np.isnan(nodata) else repr(nodata))
+    if (scale, offset) != (1.0, 0.0):
+        _sub(vrt_band, 'Offset', repr(offset))
+        _sub(vrt_band, 'Scale', repr(scale))
+
+    source = _sub(vrt_band, 'SimpleSource')
+    relative = os.path.relpath(os.path.abspath(source_path),
+                               os.path.dirname(os.path.abspath(vrt_path)))
+    _sub(source, 'SourceFilename', relative.replace(os.sep, '/'), relativeToVRT=1)
+    _sub(source, 'SourceBand', band)
+    _sub(source, 'SourceProperties', RasterXSize=width, RasterYSize=height,
+         DataType=GDAL_TYPE_NAMES[dtype], BlockXSize=block_cols, BlockYSize=block_rows)
+    _sub(source, 'SrcRect', xOff=0, yOff=0, xSize=width, ySize=height)
+    _sub(source, 'DstRect', xOff=0, yOff=0, xSize=width, ySize=height)
+
+    ET.indent(root)
+    ET.ElementTree(root).write(vrt_path, encoding='utf-8')
+    return vrt_path
@@ -0,0 +1,198 @@
+# ==========================================
+# SADAR RENDER
+# INDEX PNGS THROUGH A COLORMAP LOOKUP TABLE
+# ==========================================
+#
+# Index arrays are decimated to the output size, mapped through a
+# 256-entry RdBu table straight to uint8 RGB and written with Pillow,
+# with an optional colorbar strip. Same look as the matplotlib figures
+# these replace, without building a figure per PNG.
+
+import io
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# ---------------- SETTINGS ----------------
+# ColorBrewer RdBu, the anchors matplotlib's 'RdBu' is interpolated from
+RDBU_COLORS = (
+    '67001f', 'b2182b', 'd6604d', 'f4a582', 'fddbc7', 'f7f7f7',
+    'd1e5f0', '92c5de', '4393c3', '2166ac', '053061'
+)
+LUT_SIZE = 256
+NAN_COLOR = (255, 255, 255)        # Nodata shows as background, as in the old PNGs
+BACKGROUND = (255, 255, 255)
+TEXT_COLOR = (29, 29, 31)
+
+PREVIEW_SIZE = 1600                # Longest side of a single-index map
+PANEL_SIZE = 800                   # Longest side of each composite panel
+MARGIN = 20
+PNG_COMPRESS_LEVEL = 1             # zlib level: encoding dominates at higher levels
+COLORBAR_WIDTH = 20
+
+
+def build_lut(colors=RDBU_COLORS, size=LUT_SIZE):
+    """(size, 3) uint8 table linearly interpolated between hex anchors"""
+    anchors = np.array([[int(c[i:i + 2], 16) for i in (0, 2, 4)] for c in colors], dtype=np.float64)
+    stops = np.linspace(0.0, 1.0, len(colors))
+    positions = np.linspace(0.0, 1.0, size)
+    lut = np.stack([np.interp(positions, stops, anchors[:, ch]) for ch in range(3)], axis=1)
+    return np.round(lut).astype(np.uint8)
+
+
+RDBU_LUT = build_lut()
+
+
+# ---------------- COLOR MAPPING ----------------
+def decimate(data, max_width, max_height):
+    """Strided view of data at most ~2x the target size (cheap, no copy)"""
+    step = max(1, int(min(data.shape[0] / max_height, data.shape[1] / max_width) // 2))
+    return data[::step, ::step]
+
+
+def colorize(data, vmin=-1.0, vmax=1.0, lut=RDBU_LUT, nan_color=NAN_COLOR):
+    """Map a float array to (rows, cols, 3) uint8 RGB through lut"""
+    n = len(lut)
+    scaled = (np.asarray(data, dtype=np.float32) - vmin) * (n / (vmax - vmin))
+    nan = np.isnan(scaled)
+    has_nan = nan.any()
+    if has_nan:
+        scaled[nan] = 0
+    np.clip(scaled, 0, n - 1, out=scaled)
+    rgb = lut[scaled.astype(np.uint8 if n <= 256 else np.intp)]
+    if has_nan:
+        rgb[nan] = nan_color
+    return rgb
+
+
+def resample(data, size):
+    """float32 copy of data box-resampled to size (width, height); NaN stays NaN"""
+    values = Image.fromarray(np.ascontiguousarray(decimate(data, *size), dtype=np.float32), mode='F')
+    if values.size != size:
+        values = values.resize(size, Image.Resampling.BOX)
+    return np.asarray(values)
+
+
+def index_image(data, max_width, max_height, vmin=-1.0, vmax=1.0, lut=RDBU_LUT):
+    """PIL RGB image of data scaled to fit max_width x max_height"""
+    rows, cols = data.shape
+    scale = min(max_width / cols, max_height / rows)
+    size = (max(1, int(cols * scale)), max(1, int(rows * scale)))
+    # Resample the values, then colorize only the output pixels
+    return Image.fromarray(colorize(resample(data, size), vmin, vmax, lut))
+
+
+def classification_overlay(base, values, threshold, color, alpha=0.55):
+    """RGB image of base (a grayscale PIL image) with values >= threshold tinted.
+
+    ``values`` must already have base's size (see resample()); NaN never
+    counts as the positive class.
+    """
+    gray = np.asarray(base.convert('L'))
+    rgb = np.repeat(gray[:, :, None], 3, axis=2)
+    with np.errstate(invalid='ignore'):
+        mask = values >= threshold
+    tint = np.asarray(color, dtype=np.float32) * alpha
+    rgb[mask] = (rgb[mask] * (1.0 - alpha) + tint).astype(np.uint8)
+    return Image.fromarray(rgb)
+
+
+def thumbnail_png(gray):
+    """PNG bytes of a small uint8 grayscale quicklook"""
+    buffer = io.BytesIO()
+    Image.fromarray(gray, mode='L').save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
+
+
+# ---------------- DECORATIONS ----------------
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1 only has the fixed bitmap font
+        return ImageFont.load_default()
+
+
+def colorbar(height, label=None, vmin=-1.0, vmax=1.0, lut=RDBU_LUT, ticks=5, font_size=14):
+    """Vertical colorbar strip (high values at the top) with tick labels"""
+    font = _font(font_size)
+    label_height = font_size + 8 if label else 0
+    bar_height = max(1, height - label_height - font_size)
+    width = COLORBAR_WIDTH + 10 + 4 * font_size
+
+    strip = Image.new('RGB', (width, height), BACKGROUND)
+    gradient = lut[np.linspace(len(lut) - 1, 0, bar_height).astype(np.intp)]
+    bar = np.repeat(gradient[:, None, :], COLORBAR_WIDTH, axis=1)
+    top = label_height + font_size // 2
+    strip.paste(Image.fromarray(bar), (0, top))
+
+    draw = ImageDraw.Draw(strip)
+    draw.rectangle([0, top, COLORBAR_WIDTH - 1, top + bar_height - 1], outline=TEXT_COLOR)
+    if label:
+        draw.text((0, 0), label, fill=TEXT_COLOR, font=font)
+    for value in np.linspace(vmax, vmin, ticks):
+        y = top + int(round((vmax - value) / (vmax - vmin) * (bar_height - 1)))
+        draw.line([COLORBAR_WIDTH, y, COLORBAR_WIDTH + 4, y], fill=TEXT_COLOR)
+        draw.text((COLORBAR_WIDTH + 8, y), f"{value:g}", fill=TEXT_COLOR, font=font, anchor='lm')
+    return strip
+
+
+def _title_height(title, font_size):
+    return (title.count('\n') + 1) * (font_size + 6) + MARGIN // 2 if title else 0
+
+
+# ---------------- PNG OUTPUT ----------------
+def render_index_png(path, data, title=None, label=None, max_size=PREVIEW_SIZE,
+                     show_colorbar=True, vmin=-1.0, vmax=1.0, lut=RDBU_LUT):
+    """Write one index map (title on top, colorbar on the right) as PNG"""
+    font_size = max(14, max_size // 60)
+    img = index_image(data, max_size, max_size, vmin, vmax, lut)
+    bar = colorbar(img.height, label, vmin, vmax, lut, font_size=font_size) if show_colorbar else None
+    head = _title_height(title, font_size + 4)
+
+    width = MARGIN + img.width + (MARGIN + bar.width if bar else 0) + MARGIN
+    canvas = Image.new('RGB', (width, head + img.height + 2 * MARGIN), BACKGROUND)
+    canvas.paste(img, (MARGIN, head + MARGIN))
+    if bar:
+        canvas.paste(bar, (2 * MARGIN + img.width, head + MARGIN))
+    if title:
+        ImageDraw.Draw(canvas).multiline_text(
+            (MARGIN + img.width // 2, MARGIN), title, fill=TEXT_COLOR,
+            font=_font(font_size + 4), anchor='ma', align='center'
+        )
+    canvas.save(path, compress_level=PNG_COMPRESS_LEVEL)
+    return path
+
+
+def render_composite_png(path, panels, title=None, panel_size=PANEL_SIZE,
+                         show_colorbar=True, vmin=-1.0, vmax=1.0, lut=RDBU_LUT):
+    """Write side-by-side index maps with one shared colorbar as PNG.
+
+    ``panels`` is a sequence of (panel_title, data).
+    """
+    font_size = max(14, panel_size // 45)
+    images = [index_image(data, panel_size, panel_size, vmin, vmax, lut) for _, data in panels]
+    panel_head = max(_title_height(t, font_size) for t, _ in panels)
+    head = _title_height(title, font_size + 4)
+    map_height = max(img.height for img in images)
+    bar = colorbar(map_height, None, vmin, vmax, lut, font_size=font_size) if show_colorbar else None
+
+    width = MARGIN + sum(img.width + MARGIN for img in images) + (bar.width + MARGIN if bar else 0)
+    height = head + panel_head + map_height + 2 * MARGIN
+    canvas = Image.new('RGB', (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(canvas)
+    font = _font(font_size)
+
+    x = MARGIN
+    top = head + panel_head + MARGIN
+    for (panel_title, _), img in zip(panels, images):
+        canvas.paste(img, (x, top))
+        draw.multiline_text((x + img.width // 2, head + MARGIN // 2), panel_title,
+                            fill=TEXT_COLOR, font=font, anchor='ma', align='center')
+        x += img.width + MARGIN
+    if bar:
+        canvas.paste(bar, (x, top))
+    if title:
+        draw.text((width // 2, MARGIN // 2), title, fill=TEXT_COLOR,
+                  font=_font(font_size + 4), anchor='ma')
+    canvas.save(path, compress_level=PNG_COMPRESS_LEVEL)
+    return path
@@ -0,0 +1,256 @@
+# ==========================================
+# SADAR SESSION CACHE
+# OPEN DATASET HANDLES AND DECODED BLOCKS KEPT ACROSS GUI ACTIONS
+# ==========================================
+#
+# The GUI reads the same image many times in a session: header, preview,
+# band statistics, one index, then another. DatasetPool keeps recently
+# used rasterio handles open and BlockCache keeps the decoded band windows,
+# so those steps are served from memory instead of reopening the file and
+# decompressing the same blocks again.
+#
+# Both are keyed on file_key() (path, mtime, size): an image edited on disk
+# gets fresh handles and blocks, and its stale entries age out of the LRU.
+#
+# Prefetcher fills both ahead of time for the images the user is likely to
+# open next.
+
+import os
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import rasterio
+from sadar_cache import file_key
+from sadar_settings import available_memory_mb
+
+# ---------------- SETTINGS ----------------
+DEFAULT_POOL_SIZE = 8              # Idle dataset handles kept open
+DEFAULT_BLOCK_CACHE_MB = 1024      # Decoded band windows kept in memory
+MAX_ITEM_FRACTION = 0.25           # Bigger items are not cached (would flush everything else)
+
+
+def block_cache_mb():
+    """DEFAULT_BLOCK_CACHE_MB, or a quarter of the free RAM if that is less"""
+    free_mb = available_memory_mb()
+    if free_mb is None:
+        return DEFAULT_BLOCK_CACHE_MB
+    return max(64, min(DEFAULT_BLOCK_CACHE_MB, int(free_mb / 4)))
+
+
+# ---------------- DATASET POOL ----------------
+class DatasetPool:
+    """Open rasterio datasets, reused across calls and threads.
+
+    A handle is only ever used by one thread at a time: open() checks an
+    idle handle out (or opens a new one) and puts it back afterwards. Up
+    to ``max_open`` idle handles are kept, least recently used closed first.
+    """
+
+    def __init__(self, max_open=DEFAULT_POOL_SIZE):
+        self.max_open = max_open
+        self.hits = 0
+        self.misses = 0
+        self._idle = OrderedDict()      # (key, id(handle)) -> handle
+        self._keys = {}                 # id(handle) -> key, for handles out of the pool too
+        self._generations = {}          # path -> bumped by invalidate()
+        self._lock = threading.Lock()
+
+    def _key(self, path):
+        key = file_key(path)
+        return key + (self._generations.get(key[0], 0),)
+
+    @contextmanager
+    def open(self, path):
+        """Context manager yielding an open dataset for path"""
+        with self._lock:
+            key = self._key(path)
+            src = None
+            for slot in self._idle:
+                if slot[0] == key:
+                    src = self._idle.pop(slot)
+                    break
+            if src is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if src is None:
+            src = rasterio.open(path)
+            with self._lock:
+                self._keys[id(src)] = key
+
+        try:
+            yield src
+        finally:
+            with self._lock:
+                if key[-1] != self._generations.get(key[0], 0):
+                    self._close(src)          # Invalidated while in use
+                else:
+                    self._idle[(key, id(src))] = src
+                    while len(self._idle) > self.max_open:
+                        self._close(self._idle.popitem(last=False)[1])
+
+    def _close(self, src):
+        self._keys.pop(id(src), None)
+        src.close()
+
+    def identity(self, src):
+        """Key of the file version src was opened on (None if not pooled)"""
+        with self._lock:
+            return self._keys.get(id(src))
+
+    def invalidate(self, path):
+        """Close idle handles of path; handles in use are closed when returned.
+
+        For changes file_key() cannot see, e.g. a sidecar .ovr written next
+        to the image.
+        """
+        path = os.path.abspath(path)
+        with self._lock:
+            self._generations[path] = self._generations.get(path, 0) + 1
+            for slot in [slot for slot in self._idle if slot[0][0] == path]:
+                self._close(self._idle.pop(slot))
+
+    @property
+    def open_count(self):
+        with self._lock:
+            return len(self._keys)
+
+    def close(self):
+        with self._lock:
+            while self._idle:
+                self._close(self._idle.popitem()[1])
+
+
+# ---------------- BLOCK CACHE ----------------
+class BlockCache:
+    """Least recently used numpy arrays up to a total size in bytes.
+
+    Cached arrays are read-only, since every caller shares them.
+    """
+
+    def __init__(self, max_mb=DEFAULT_BLOCK_CACHE_MB):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            array = self._items.get(key)
+            if array is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return array
+
+    def put(self, key, array):
+        """Cache a copy of array (skipped if it is too big to be worth it)"""
+        if array.nbytes > self.max_bytes * MAX_ITEM_FRACTION:
+            return
+        array = array.copy()
+        array.setflags(write=False)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self._items[key] = array
+            self.bytes += array.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+# ---------------- SESSION ----------------
+class SessionCache:
+    """The pool and block cache of one GUI session, with their counters"""
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, block_mb=None):
+        self.pool = DatasetPool(pool_size)
+        self.blocks = BlockCache(block_cache_mb() if block_mb is None else block_mb)
+
+    def stats(self):
+        """Counters for the diagnostics view"""
+        pool, blocks = self.pool, self.blocks
+        return {
+            'handle_hits': pool.hits,
+            'handle_misses': pool.misses,
+            'handles_open': pool.open_count,
+            'block_hits': blocks.hits,
+            'block_misses': blocks.misses,
+            'block_evictions': blocks.evictions,
+            'block_entries': len(blocks),
+            'block_mb': blocks.bytes / (1024 * 1024),
+            'block_max_mb': blocks.max_bytes / (1024 * 1024),
+        }
+
+    def clear(self):
+        """Drop every cached block and idle handle (counters are kept)"""
+        self.blocks.clear()
+        self.pool.close()
+
+    def close(self):
+        self.clear()
+
+
+# ---------------- PREFETCH ----------------
+PREFETCH_POLL_S = 0.2              # How often a paused prefetcher checks again
+
+
+class Prefetcher:
+    """Runs task(item) for upcoming items on one background thread.
+
+    schedule() replaces whatever is still queued, so only the neighbours of
+    the latest selection are fetched (an item already running finishes).
+    Nothing new starts while ``paused()`` is true, e.g. during a
+    calculation. Errors are counted and printed once per item (a file
+    that keeps failing is rescheduled on every selection), and otherwise
+    ignored: the item is simply read again when it is really needed.
+    """
+
+    def __init__(self, task, paused=None):
+        self.task = task
+        self.paused = paused or (lambda: False)
+        self.fetched = 0
+        self.failed = 0
+        self._reported = set()          # Items whose failure was printed
+        self._pending = deque()
+        self._cond = threading.Condition()
+        threading.Thread(target=self._run, name='sadar-prefetch', daemon=True).start()
+
+    def schedule(self, items):
+        with self._cond:
+            self._pending = deque(items)
+            self._cond.notify()
+
+    @property
+    def queued(self):
+        with self._cond:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending or self.paused():
+                    self._cond.wait(PREFETCH_POLL_S)
+                item = self._pending.popleft()
+            try:
+                self.task(item)
+                self.fetched += 1
+            except Exception as e:
+                self.failed += 1
+                if item not in self._reported:
+                    self._reported.add(item)
+                    print(f"Prefetch failed for {item}: {e}")
@@ -0,0 +1,140 @@
+# ==========================================
+# SADAR SETTINGS
+# DEFAULTS SHARED BY THE GUI, CLI AND ENGINE
+# ==========================================
+#
+# Kept free of numpy/rasterio imports so the GUI can build its widgets
+# before the numeric stack is loaded. sadar_engine re-exports all of it.
+
+import os
+import sys
+
+# ---------------- SETTINGS ----------------
+DEFAULT_WINDOW_BUDGET_MB = 256     # Working-set budget for one window
+PREVIEW_MAX_SIZE = 2000            # Longest side of in-memory previews
+
+# Compute precision. Bands are read straight into this dtype and every
+# intermediate stays in it. With float32 (default) the index differs from
+# the float64 path by at most 1 float32 ulp (<= 6e-8 absolute in [-1, 1])
+# for integer inputs below 2**24, i.e. all Sentinel-2 reflectances, and
+# statistics agree to ~1e-6. Outputs are float32 either way.
+PRECISIONS = ('float32', 'float64')
+DEFAULT_PRECISION = 'float32'
+
+# Output GeoTIFF layout. 'GTiff' follows the input profile (as before);
+# 'COG' writes Cloud-Optimized GeoTIFFs (512x512 tiles, compression with a
+# floating-point predictor, internal overviews).
+OUTPUT_FORMATS = ('GTiff', 'COG')
+DEFAULT_OUTPUT_FORMAT = 'GTiff'
+COMPRESSIONS = ('DEFLATE', 'ZSTD', 'LERC')
+DEFAULT_COMPRESSION = 'DEFLATE'
+
+# Output sample type. 'int16' stores round(index * 10000) with a GDAL scale
+# of 1/10000 and -32768 as nodata: half the bytes of float32 at a 0.0001
+# resolution, far finer than any threshold step. GDAL-aware readers (QGIS,
+# rasterio with scales applied, the previews here) see index values.
+OUTPUT_DTYPES = ('float32', 'int16')
+DEFAULT_OUTPUT_DTYPE = 'float32'
+
+# Per-index files written next to the composite. 'tiff' stores every index
+# twice (its own file and a composite band); 'vrt' writes only the
+# composite plus a tiny VRT per index that reads its composite band.
+INDEX_FILE_TYPES = ('tiff', 'vrt')
+DEFAULT_INDEX_FILE_TYPE = 'tiff'
+
+# Bump when a code change alters what the written outputs contain, so
+# incremental batch runs redo images processed by an older version.
+OUTPUT_VERSION = 1
+
+ALL_INDICES = ('NDSI', 'NDWI', 'NDVI')
+
+# Input folder scanning: glob patterns matched case-insensitively against
+# the file name, or against the path below the folder when they contain '/'
+SCAN_INCLUDE = ('*.tif', '*.tiff')
+SCAN_EXCLUDE = ()
+
+# Same defaults as the GUI threshold slider
+DEFAULT_THRESHOLDS = {'NDSI': 0.4, 'NDWI': 0.3, 'NDVI': 0.2}
+
+# How "All Indices" and batch runs pick each index's threshold: the fixed
+# values above, or per scene from the index histogram after the pass
+# (Otsu's method, or the deepest valley between the two main modes)
+THRESHOLD_METHODS = ('fixed', 'otsu', 'valley')
+DEFAULT_THRESHOLD_METHOD = 'fixed'
+
+# ---------------- BAND MAPPING ----------------
+# (band1, band2) for index = (band1 - band2) / (band1 + band2)
+# 'full' is used for full Sentinel-2 stacks (11+ bands), 'fallback' otherwise
+INDEX_BANDS = {
+    'NDSI': {'full': (3, 11), 'fallback': (1, 2)},   # Green & SWIR
+    'NDWI': {'full': (3, 8), 'fallback': (1, 2)},    # Green & NIR
+    'NDVI': {'full': (8, 4), 'fallback': (1, 2)},    # NIR & Red
+}
+
+INDEX_DESCRIPTIONS = {
+    'NDSI': 'NDSI (Snow Index)',
+    'NDWI': 'NDWI (Water Index)',
+    'NDVI': 'NDVI (Vegetation Index)',
+}
+
+
+# Full-scene arrays (the single-index result) bigger than this share of
+# the free RAM are kept in a memory-mapped scratch file instead, in
+# SADAR_SCRATCH_DIR if set (it should have room for the array), else the
+# system temp folder. The OS then pages them in and out as needed.
+MEMMAP_RAM_FRACTION = 0.5
+SCRATCH_DIR = os.environ.get('SADAR_SCRATCH_DIR') or None
+
+
+def default_workers():
+    """Number of worker processes that matches the machine"""
+    return os.cpu_count() or 1
+
+
+def _meminfo_available_mb():
+    """MemAvailable from /proc/meminfo in MB (None if not there).
+
+    Unlike the free page count it includes the page cache the kernel can
+    drop, which after reading a few big scenes is most of the RAM.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def available_memory_mb():
+    """Physical memory available to new allocations in MB (None if unknown)"""
+    if sys.platform.startswith('linux'):
+        available = _meminfo_available_mb()
+        if available is not None:
+            return available
+    try:
+        if os.name == 'nt':
+            import ctypes
+
+            class MemoryStatus(ctypes.Structure):
+                _fields_ = [
+                    ('dwLength', ctypes.c_ulong),
+                    ('dwMemoryLoad', ctypes.c_ulong),
+                    ('ullTotalPhys', ctypes.c_ulonglong),
+                    ('ullAvailPhys', ctypes.c_ulonglong),
+                    ('ullTotalPageFile', ctypes.c_ulonglong),
+                    ('ullAvailPageFile', ctypes.c_ulonglong),
+                    ('ullTotalVirtual', ctypes.c_ulonglong),
+                    ('ullAvailVirtual', ctypes.c_ulonglong),
+                    ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+                ]
+
+            status = MemoryStatus()
+            status.dwLength = ctypes.sizeof(MemoryStatus)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullAvailPhys / (1024 * 1024)
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        # e.g. macOS has no SC_AVPHYS_PAGES; assume it fits
+        return None
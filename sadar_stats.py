@@ -0,0 +1,354 @@
+# ==========================================
+# SADAR STATISTICS
+# SINGLE-PASS, MERGEABLE INDEX STATISTICS
+# ==========================================
+#
+# IndexStats is filled block by block while an index is being computed and
+# merged across tiles and worker processes, so min/max/mean/std, class
+# counts and the value distribution never need another pass over the
+# finished array.
+
+from functools import lru_cache
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# ---------------- SETTINGS ----------------
+HISTOGRAM_BINS = 2000              # Fixed bins over [-1, 1] (0.001 wide)
+VALUE_RANGE = (-1.0, 1.0)
+
+# Value distribution shown in the info panel: [-1,-0.5) [-0.5,0) [0,0.5) [0.5,1]
+RANGE_EDGES = (-1.0, -0.5, 0.0, 0.5, 1.0)
+
+# Percentiles reported in summaries (key 'p<q>'), read off the histogram
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Valley detection: histogram smoothing window and minimum distance
+# between the two modes (index units), the second mode's minimum height
+# relative to the first, and how far below it the valley must dip
+VALLEY_SMOOTHING = 0.05
+VALLEY_MIN_SEPARATION = 0.1
+VALLEY_MIN_PEAK = 0.05
+VALLEY_MAX_DEPTH = 0.9
+
+
+# ---------------- BLOCK ACCUMULATION ----------------
+@lru_cache(maxsize=None)
+def bin_edges(bins, dtype):
+    """bins + 1 edges over [-1, 1] in the data's dtype.
+
+    Values are binned by comparing against these, the same way thresholds
+    are compared, so a count read off the histogram at an edge matches
+    ``values >= edge`` exactly.
+    """
+    half = bins / 2.0
+    edges = ((np.arange(bins + 1) - half) / half).astype(dtype)
+    edges.flags.writeable = False
+    return edges
+
+
+def _bin_indices(values, bins):
+    """Histogram bin of each value in [-1, 1]; 1.0 falls in the last bin"""
+    scaled = (values.astype(np.float64) + 1.0) * (bins / 2.0)
+    indices = scaled.astype(np.int64)
+    np.clip(indices, 0, bins - 1, out=indices)
+    # Values rounded across an edge go to the bin their comparison picks
+    edges = bin_edges(bins, values.dtype)
+    indices -= values < edges[indices]
+    indices += values >= edges[indices + 1]
+    np.clip(indices, 0, bins - 1, out=indices)
+    return indices
+
+
+def _accumulate_numpy(block, thresholds, bins):
+    """(nodata, count, mean, m2, min, max, threshold_counts, hist, top) for one block.
+
+    ``top`` counts the values at or above the histogram's top edge (1.0),
+    which the last bin cannot tell apart from the rest of [0.999, 1.0].
+    """
+    valid = block[~np.isnan(block)]
+    nodata = block.size - valid.size
+    hist = np.bincount(_bin_indices(valid, bins), minlength=bins)
+    above = np.array([np.count_nonzero(valid >= t) for t in thresholds], dtype=np.int64)
+    top = np.count_nonzero(valid >= bin_edges(bins, valid.dtype)[-1])
+
+    if valid.size == 0:
+        return nodata, 0, 0.0, 0.0, np.inf, -np.inf, above, hist, top
+
+    mean = float(valid.mean(dtype=np.float64))
+    deviations = np.subtract(valid, mean, dtype=np.float64)
+    m2 = float(np.square(deviations, out=deviations).sum())
+    return nodata, valid.size, mean, m2, float(valid.min()), float(valid.max()), above, hist, top
+
+
+if numba is not None:
+    def _accumulate_loop(values, thresholds, edges):
+        bins = edges.size - 1
+        hist = np.zeros(bins, dtype=np.int64)
+        above = np.zeros(thresholds.size, dtype=np.int64)
+        nodata = 0
+        top = 0
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        vmin = np.inf
+        vmax = -np.inf
+        for i in range(values.size):
+            v = values[i]
+            if np.isnan(v):
+                nodata += 1
+                continue
+            # Welford update
+            count += 1
+            delta = v - mean
+            mean += delta / count
+            m2 += delta * (v - mean)
+            if v < vmin:
+                vmin = v
+            if v > vmax:
+                vmax = v
+            b = int((np.float64(v) + 1.0) * (bins / 2.0))
+            if b < 0:
+                b = 0
+            elif b >= bins:
+                b = bins - 1
+            if v < edges[b] and b > 0:
+                b -= 1
+            elif v >= edges[b + 1] and b < bins - 1:
+                b += 1
+            hist[b] += 1
+            if v >= edges[bins]:
+                top += 1
+            for t in range(thresholds.size):
+                if v >= thresholds[t]:
+                    above[t] += 1
+        return nodata, count, mean, m2, vmin, vmax, above, hist, top
+
+    try:
+        # Cached on disk, so worker processes load it instead of recompiling
+        _accumulate_loop = numba.njit(nogil=True, cache=True)(_accumulate_loop)
+    except RuntimeError:
+        # No cache location for this module (e.g. a frozen build)
+        _accumulate_loop = numba.njit(nogil=True)(_accumulate_loop)
+
+    def _accumulate(block, thresholds, bins):
+        values = np.ascontiguousarray(block).ravel()
+        # Compare in the data's dtype, as numpy does for `values >= 0.4`
+        return _accumulate_loop(values, np.asarray(thresholds, dtype=values.dtype),
+                                bin_edges(bins, values.dtype))
+else:
+    _accumulate = _accumulate_numpy
+
+
+# ---------------- ACCUMULATOR ----------------
+class IndexStats:
+    """Streaming statistics of one index: one pass per block, mergeable.
+
+    Tracks valid/nodata counts, min/max, mean and variance (Welford, merged
+    with Chan's formula), pixel counts at or above each threshold and a
+    fixed-bin histogram over [-1, 1] (plus the count of values at 1.0,
+    which the last bin shares with [0.999, 1.0)).
+    """
+
+    def __init__(self, thresholds=(), bins=HISTOGRAM_BINS):
+        self.thresholds = tuple(float(t) for t in thresholds)
+        self.bins = bins
+        self.valid = 0
+        self.nodata = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.above = np.zeros(len(self.thresholds), dtype=np.int64)
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.top = 0
+
+    def update(self, block):
+        """Add one block of index values (NaN = nodata)"""
+        nodata, count, mean, m2, vmin, vmax, above, hist, top = _accumulate(
+            block, self.thresholds, self.bins
+        )
+        self.nodata += int(nodata)
+        self.top += int(top)
+        self.above += above
+        self.histogram += hist
+        self._merge_moments(int(count), float(mean), float(m2), float(vmin), float(vmax))
+        return self
+
+    def merge(self, other):
+        """Fold in statistics gathered on another tile or worker"""
+        if other.thresholds != self.thresholds or other.bins != self.bins:
+            raise ValueError("Cannot merge statistics with different thresholds or bins")
+        self.nodata += other.nodata
+        self.above += other.above
+        self.histogram += other.histogram
+        self.top += other.top
+        self._merge_moments(other.valid, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def _merge_moments(self, count, mean, m2, vmin, vmax):
+        if count == 0:
+            return
+        total = self.valid + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.valid * count / total
+        self.valid = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    # ---------------- DERIVED VALUES ----------------
+    @property
+    def total(self):
+        return self.valid + self.nodata
+
+    @property
+    def std(self):
+        """Population standard deviation (same as np.nanstd)"""
+        return float(np.sqrt(self.m2 / self.valid)) if self.valid else np.nan
+
+    def bin_edge(self, value):
+        """Histogram bin index whose lower edge is nearest to value"""
+        cut = int(round((value - VALUE_RANGE[0]) * self.bins / (VALUE_RANGE[1] - VALUE_RANGE[0])))
+        return min(max(cut, 0), self.bins)
+
+    def count_above(self, threshold):
+        """Valid pixels >= threshold.
+
+        Exact for the thresholds tracked during the pass. Any other
+        threshold is rounded to the nearest bin edge (a multiple of 0.001)
+        and answered in O(bins) from the histogram, or from the separate
+        count of values at 1.0 for the top edge; the count at an edge is
+        exact.
+        """
+        threshold = float(threshold)
+        if threshold in self.thresholds:
+            return int(self.above[self.thresholds.index(threshold)])
+        if threshold > self.max:
+            return 0
+        edge = self.bin_edge(threshold)
+        if edge >= self.bins:
+            return self.top
+        return int(self.histogram[edge:].sum())
+
+    def range_counts(self, edges=RANGE_EDGES):
+        """Valid pixels per [edges[i], edges[i+1]) from the histogram (last range closed)"""
+        cuts = [self.bin_edge(e) for e in edges]
+        return [int(self.histogram[lo:hi].sum()) for lo, hi in zip(cuts[:-1], cuts[1:])]
+
+    def edge_value(self, edge):
+        """Index value at histogram edge number edge (0..bins)"""
+        lo, hi = VALUE_RANGE
+        return (lo * (self.bins - edge) + hi * edge) / self.bins
+
+    def percentile(self, q):
+        """q-th percentile (0-100) of the valid values.
+
+        Interpolated linearly inside the histogram bin that holds it, so
+        it is within one bin width (0.001) of np.nanpercentile.
+        """
+        if not self.valid:
+            return np.nan
+        cumulative = np.cumsum(self.histogram)
+        target = q / 100.0 * self.valid
+        b = min(int(np.searchsorted(cumulative, target, side='left')), self.bins - 1)
+        before = cumulative[b - 1] if b else 0
+        inside = self.histogram[b]
+        fraction = (target - before) / inside if inside else 0.0
+        value = self.edge_value(b + fraction)
+        return float(min(max(value, self.min), self.max))
+
+    def otsu_threshold(self):
+        """Threshold maximising the between-class variance (Otsu's method).
+
+        Computed from the histogram in O(bins) and returned on a bin edge,
+        so count_above() at it is exact.
+        """
+        if not self.valid:
+            return np.nan
+        hist = self.histogram.astype(np.float64)
+        centers = self.edge_value(np.arange(self.bins) + 0.5)
+        below = np.cumsum(hist)[:-1]                  # Pixels in bins 0..k
+        below_sum = np.cumsum(hist * centers)[:-1]
+        total, total_sum = hist.sum(), float(np.dot(hist, centers))
+        above = total - below
+        # w0 * w1 * (mean0 - mean1)^2, up to a constant factor
+        with np.errstate(divide='ignore', invalid='ignore'):
+            between = (below_sum * total - below * total_sum) ** 2 / (below * above)
+        between[(below == 0) | (above == 0)] = -1.0
+        if between.max() < 0:
+            return float(self.min)                    # A single populated bin
+        return float(self.edge_value(int(np.argmax(between)) + 1))
+
+    def valley_threshold(self):
+        """Deepest point of the smoothed histogram between its two main modes.
+
+        Falls back to Otsu's threshold when there is no second mode.
+        Returned on a bin edge, like otsu_threshold().
+        """
+        if not self.valid:
+            return np.nan
+        width = max(1, int(round(VALLEY_SMOOTHING * self.bins / 2.0)))
+        smooth = np.convolve(self.histogram.astype(np.float64), np.ones(width) / width, mode='same')
+
+        inner = smooth[1:-1]
+        peaks = np.flatnonzero((inner > smooth[:-2]) & (inner >= smooth[2:])) + 1
+        if peaks.size < 2:
+            return self.otsu_threshold()
+        first = peaks[np.argmax(smooth[peaks])]
+        separation = VALLEY_MIN_SEPARATION * self.bins / 2.0
+        others = peaks[(np.abs(peaks - first) >= separation)
+                       & (smooth[peaks] >= VALLEY_MIN_PEAK * smooth[first])]
+        if others.size == 0:
+            return self.otsu_threshold()
+        second = others[np.argmax(smooth[others])]
+
+        lo, hi = sorted((first, second))
+        valley = lo + int(np.argmin(smooth[lo:hi + 1]))
+        if smooth[valley] > VALLEY_MAX_DEPTH * smooth[second]:
+            return self.otsu_threshold()              # Shoulder, not a valley
+        return float(self.edge_value(valley))
+
+    def auto_threshold(self, method, fallback):
+        """Threshold chosen from the histogram ('otsu' or 'valley').
+
+        Returns fallback when there are no valid pixels.
+        """
+        if method not in ('otsu', 'valley'):
+            raise ValueError(f"Unknown threshold method: {method}")
+        if not self.valid:
+            return fallback
+        return self.otsu_threshold() if method == 'otsu' else self.valley_threshold()
+
+    def summary(self, threshold):
+        """Flat dict with the keys the info panel, PDF and exports use"""
+        total = self.total
+        positive = self.count_above(threshold)
+        negative = self.valid - positive
+        range1, range2, range3, range4 = self.range_counts()
+        has_data = self.valid > 0
+
+        return {
+            'threshold': threshold,
+            'min': self.min if has_data else np.nan,
+            'max': self.max if has_data else np.nan,
+            'mean': self.mean if has_data else np.nan,
+            'std': self.std,
+            'total_pixels': total,
+            'valid_pixels': self.valid,
+            'nodata_pixels': self.nodata,
+            'positive_pixels': positive,
+            'negative_pixels': negative,
+            'positive_percentage': (positive / total) * 100 if total > 0 else 0,
+            'negative_percentage': (negative / total) * 100 if total > 0 else 0,
+            'nodata_percentage': (self.nodata / total) * 100 if total > 0 else 0,
+            'range1': range1,
+            'range2': range2,
+            'range3': range3,
+            'range4': range4,
+            **{f'p{q}': self.percentile(q) for q in PERCENTILES},
+            'otsu_threshold': self.otsu_threshold()
+        }
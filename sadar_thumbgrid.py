@@ -0,0 +1,210 @@
+# ==========================================
+# SADAR THUMBNAIL GRID
+# SCROLLABLE QUICKLOOKS OF A WHOLE FOLDER, DRAWING ONLY VISIBLE ROWS
+# ==========================================
+#
+# The canvas scroll region spans every row, but canvas items (and Tk
+# photo images) exist only for the rows on screen plus one above and
+# below. Scrolling a 1,000-image folder therefore costs the same as a
+# 20-image one. Thumbnails arrive as encoded PNG bytes, in any order, and
+# are only decoded once their row becomes visible.
+
+import io
+import tkinter as tk
+
+# ---------------- SETTINGS ----------------
+THUMB_SIZE = 96                    # Longest side of a thumbnail, in pixels
+CELL_PAD = 8
+LABEL_HEIGHT = 16
+SPARE_ROWS = 1                     # Rows drawn beyond the visible area
+
+
+class ThumbnailGrid(tk.Frame):
+    """Grid of file thumbnails with a vertical scrollbar.
+
+    ``on_select(index)`` is called when a cell is clicked or the selection
+    is moved with the arrow keys.
+    """
+
+    def __init__(self, parent, on_select=None, thumb_size=THUMB_SIZE, visible_rows=2.5,
+                 bg='white', fg='black', muted='gray', highlight='blue', **kwargs):
+        super().__init__(parent, bg=bg, **kwargs)
+        self.on_select = on_select
+        self.thumb_size = thumb_size
+        self.colors = {'bg': bg, 'fg': fg, 'muted': muted, 'highlight': highlight}
+        self.cell_width = thumb_size + CELL_PAD
+        self.cell_height = thumb_size + LABEL_HEIGHT + CELL_PAD
+
+        self.names = []
+        self.images = {}      # index -> encoded PNG bytes
+        self.photos = {}      # index -> PhotoImage, drawn cells only
+        self.selected = None
+        self._drawn = None    # (first_row, last_row, columns) on the canvas
+
+        self.scrollbar = tk.Scrollbar(self)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0,
+                                height=int(visible_rows * self.cell_height),
+                                yscrollincrement=self.cell_height // 2,
+                                yscrollcommand=self._on_yscroll)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.scrollbar.config(command=self.canvas.yview)
+
+        self.canvas.bind('<Configure>', lambda e: self.redraw())
+        self.canvas.bind('<Button-1>', self._on_click)
+        # Widget bindings (not bind_all), so the app's own wheel handlers
+        # stay installed; 'break' keeps them from scrolling along
+        self.canvas.bind('<MouseWheel>', self._on_wheel)
+        self.canvas.bind('<Button-4>', lambda e: self._scroll(-1))
+        self.canvas.bind('<Button-5>', lambda e: self._scroll(1))
+        for key, step in (('<Left>', -1), ('<Right>', 1)):
+            self.canvas.bind(key, lambda e, step=step: self._move(step))
+        self.canvas.bind('<Up>', lambda e: self._move(-self.columns))
+        self.canvas.bind('<Down>', lambda e: self._move(self.columns))
+
+    # ---------------- CONTENT ----------------
+    def set_items(self, names):
+        """Show one empty cell per name (thumbnails come later)"""
+        self.names = list(names)
+        self.images = {}
+        self.photos = {}
+        self.selected = None
+        self.canvas.yview_moveto(0)
+        self.redraw()
+
+    def add_items(self, names):
+        """Append cells (e.g. while a folder is still being scanned)"""
+        first_row = len(self.names) // self.columns
+        self.names.extend(names)
+        if self._drawn is None or self._row_visible(first_row):
+            self.redraw()
+        else:
+            self.canvas.config(scrollregion=(0, 0, self.columns * self.cell_width,
+                                             self._rows() * self.cell_height))
+
+    def add_thumbnails(self, images):
+        """{index: PNG bytes}; redrawn once if any of them is on screen"""
+        self.images.update(images)
+        if self._drawn and any(self._row_visible(i // self._drawn[2]) for i in images):
+            self.redraw()
+
+    def select(self, index):
+        """Highlight cell index and scroll it into view"""
+        self.selected = index
+        row = index // self.columns
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        y = row * self.cell_height
+        if y < top or y + self.cell_height > bottom:
+            rows = self._rows()
+            self.canvas.yview_moveto(max(0.0, row - 1) / rows if rows else 0.0)
+        self.redraw()
+
+    # ---------------- LAYOUT ----------------
+    @property
+    def columns(self):
+        return max(1, self.canvas.winfo_width() // self.cell_width)
+
+    def _rows(self):
+        return -(-len(self.names) // self.columns)
+
+    def _row_visible(self, row):
+        first, last, _ = self._drawn
+        return first <= row <= last
+
+    def redraw(self):
+        """Recreate the cells of the visible rows"""
+        columns = self.columns
+        height = self._rows() * self.cell_height
+        self.canvas.config(scrollregion=(0, 0, columns * self.cell_width, height))
+
+        top = self.canvas.canvasy(0)
+        first = max(0, int(top // self.cell_height) - SPARE_ROWS)
+        last = int((top + self.canvas.winfo_height()) // self.cell_height) + SPARE_ROWS
+
+        self.canvas.delete('cell')
+        photos = {}
+        for index in range(first * columns, min(len(self.names), (last + 1) * columns)):
+            photos[index] = self._draw_cell(index, columns)
+        self.photos = photos        # Cells scrolled away release their images
+        self._drawn = (first, last, columns)
+
+    def _draw_cell(self, index, columns):
+        row, col = divmod(index, columns)
+        x = col * self.cell_width + CELL_PAD // 2
+        y = row * self.cell_height + CELL_PAD // 2
+        size = self.thumb_size
+
+        if index == self.selected:
+            self.canvas.create_rectangle(
+                x - 3, y - 3, x + size + 2, y + size + LABEL_HEIGHT + 2,
+                outline=self.colors['highlight'], width=2, tags='cell'
+            )
+
+        photo = self.photos.get(index)
+        if photo is None:
+            photo = self._photo(index)
+        if photo is not None:
+            self.canvas.create_image(x + size // 2, y + size // 2, image=photo, tags='cell')
+        else:
+            self.canvas.create_rectangle(x, y, x + size, y + size, fill='#e5e5ea',
+                                         outline='', tags='cell')
+
+        name = self.names[index]
+        max_chars = max(4, size // 7)
+        if len(name) > max_chars:
+            name = name[:max_chars - 1] + '…'
+        self.canvas.create_text(
+            x + size // 2, y + size + 2, text=name, anchor='n', font=("Segoe UI", 8),
+            fill=self.colors['fg'] if index == self.selected else self.colors['muted'],
+            tags='cell'
+        )
+        return photo
+
+    def _photo(self, index):
+        """Decode the thumbnail of index (None until it has arrived)"""
+        image = self.images.get(index)
+        if image is None:
+            return None
+        # PIL is loaded by the app's lazy imports before any folder is shown
+        from PIL import Image, ImageTk
+        return ImageTk.PhotoImage(Image.open(io.BytesIO(image)))
+
+    # ---------------- EVENTS ----------------
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        if self._drawn and not (self._row_visible(int(top // self.cell_height))
+                                and self._row_visible(int(bottom // self.cell_height))):
+            self.redraw()
+
+    def _scroll(self, step):
+        self.canvas.yview_scroll(step, 'units')
+        return 'break'
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        return self._scroll(-1 if event.delta > 0 else 1)
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        col = int(x // self.cell_width)
+        if col >= self.columns:
+            return
+        index = int(y // self.cell_height) * self.columns + col
+        if 0 <= index < len(self.names):
+            self._choose(index)
+
+    def _move(self, step):
+        if not self.names:
+            return
+        index = 0 if self.selected is None else self.selected + step
+        if 0 <= index < len(self.names):
+            self._choose(index)
+
+    def _choose(self, index):
+        self.select(index)
+        if self.on_select:
+            self.on_select(index)